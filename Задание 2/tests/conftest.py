@@ -1,12 +1,142 @@
+import os
+
 import pytest
 from utils.api_client import APIClient
+from utils.isolation import allocate_seller_id
+from utils.item_cache import CreatedItemCache
+from utils.response_cache import ResponseCache
+from utils.shadow_inventory import ShadowInventory
+from utils.stub_server import StubServer
+
+pytest_plugins = ["utils.metrics_plugin", "utils.latency_plugin", "utils.history_plugin",
+                  "utils.rate_limit_plugin", "utils.collection_plugin", "utils.profile_plugin"]
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--local-api",
+        action="store_true",
+        default=os.getenv("AVITO_LOCAL_API") == "1",
+        help="гонять тесты против локальной замены сервиса вместо qa-internship.avito.com",
+    )
+    parser.addoption("--http2", action="store_true",
+                     help="api_client ходит по HTTP/2 (h2c для http), при отказе сервера - по HTTP/1.1")
+    parser.addoption("--cassette", default=None, help="файл кассеты для записи или воспроизведения ответов API")
+    parser.addoption(
+        "--cassette-mode",
+        choices=("replay", "record"),
+        default="replay",
+        help="record - писать ответы сети в кассету, replay - отдавать ответы из кассеты без сети",
+    )
+
+
+def pytest_configure(config):
+    cassette_path = config.getoption("--cassette")
+    if cassette_path:
+        # Одинаковые запросы кассета отдаёт в порядке записи, поэтому порядок тестов не должен зависеть от истории
+        config.option.no_smart_order = True
+    # Кассету пересоздаёт только контроллер, воркеры xdist дописывают в неё
+    if cassette_path and config.getoption("--cassette-mode") == "record" and not hasattr(config, "workerinput"):
+        from utils.cassette import Cassette
+
+        Cassette.create(cassette_path)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(config, items):
+    # Счётчик воспроизведения у каждого процесса свой, а раскладка тестов по воркерам меняется от прогона
+    # к прогону. С кассетой все тесты идут одной группой xdist: в одном воркере и в порядке сбора
+    if config.getoption("--cassette"):
+        for item in items:
+            item.add_marker(pytest.mark.xdist_group("cassette"), append=False)
+
+
+@pytest.fixture(scope="session")
+def api_target(request):
+    """Стабильное имя стенда для сравнения прогонов: у локального сервера порт каждый раз новый"""
+    return "local" if request.config.getoption("--local-api") else "https://qa-internship.avito.com"
+
+
+@pytest.fixture(scope="session")
+def base_url(request, api_target):
+    if api_target == "local":
+        return request.getfixturevalue("stub_server").url
+    return api_target
 
 
 @pytest.fixture(scope="session")
-def base_url():
-    return "https://qa-internship.avito.com"
+def seller_id(request):
+    """sellerId для создаваемых объявлений, свой у каждого воркера"""
+    if request.config.getoption("--cassette"):
+        # Ключи кассеты зависят от тела POST, поэтому sellerId должен совпадать между записью и воспроизведением.
+        # С кассетой все тесты идут в одном воркере, и sellerId не зависит от его номера
+        return allocate_seller_id(run_uid="cassette", index=0)
+    return allocate_seller_id()
+
+
+@pytest.fixture(scope="session")
+def cassette(request):
+    path = request.config.getoption("--cassette")
+    if not path:
+        yield None
+        return
+    from utils.cassette import Cassette
+
+    cassette = Cassette(path, request.config.getoption("--cassette-mode"))
+    yield cassette
+    cassette.close()
+
+
+@pytest.fixture(scope="session")
+def shadow_inventory():
+    """Объявления, созданные через api_client за сессию, для сверки со списками продавцов"""
+    return ShadowInventory()
+
+
+@pytest.fixture(scope="session")
+def api_client(request, base_url, metrics_registry, cassette, rate_limiter, shadow_inventory):
+    client = APIClient(base_url, hooks=[metrics_registry], cassette=cassette, rate_limiter=rate_limiter,
+                       http2=request.config.getoption("--http2"), inventory=shadow_inventory)
+    yield client
+    client.close()
+
+
+@pytest.fixture(scope="session")
+def cached_api_client(api_client):
+    """Клиент с кешем GET-ответов для проверок только на чтение: одинаковые GET делят один запрос.
+    Тесты, читающие после записи, используют api_client."""
+    return api_client.with_cache(ResponseCache())
+
+
+@pytest.fixture(scope="session")
+def created_items(api_client):
+    """Кеш созданных объявлений: одинаковый payload за сессию создаётся одним POST"""
+    return CreatedItemCache(api_client)
+
+
+@pytest.fixture(scope="session")
+def run_async():
+    """Выполняет корутину в общем event loop сессии, чтобы пул соединений переиспользовался между тестами"""
+    import asyncio
+
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def async_api_client(base_url, run_async, cassette, rate_limiter):
+    # httpx грузится долго, поэтому импортируется, только если тесту нужен асинхронный клиент
+    from utils.async_api_client import AsyncAPIClient
+
+    client = AsyncAPIClient(base_url, cassette=cassette, rate_limiter=rate_limiter)
+    yield client
+    run_async(client.aclose())
 
 
 @pytest.fixture(scope="session")
-def api_client(base_url):
-    return APIClient(base_url)
+def stub_server():
+    """Локальная замена сервиса объявлений, поднимается только для тестов, которые её запрашивают"""
+    server = StubServer().start()
+    yield server
+    server.stop()
@@ -1,82 +1,32 @@
+import asyncio
 import pytest
 import re
 
+from utils.assertions import raise_errors
+
 
 class TestSellerItemsAPI:
     valid_seller_id = 999665  # ID реального продавца
-    invalid_seller_id = "abcd123"  # Невалидный sellerId (должен быть числом)
-    non_existent_seller_id = 123456789  # ID, у которого точно нет объявлений
-
-    def test_get_seller_items_success(self, api_client):
-        response = api_client.get_seller_items(self.valid_seller_id)
-        assert response.status_code == 200, f"Ожидался код 200, но получен {response.status_code}"
-
-        data = response.json()
-        assert isinstance(data, list), "API должно вернуть список товаров"
-
-    def test_get_seller_items_structure(self, api_client):
-        response = api_client.get_seller_items(self.valid_seller_id)
-        data = response.json()
-
-        errors = []
-        for item in data:
-            if not isinstance(item, dict):
-                errors.append(TypeError(f"Элемент должен быть словарём, получен {type(item)}"))
-                continue
-            for field in ["name", "price", "sellerId"]:
-                if field not in item:
-                    errors.append(KeyError(f"Поле '{field}' отсутствует в товаре: {item}"))
-
-        if errors:
-            if len(errors) == 1:
-                raise errors[0]
-            else:
-                error_message = "Обнаружены ошибки:" + " ".join(map(str, errors))
-                pytest.fail(error_message, pytrace=False)
-
-    def test_get_seller_items_empty(self, api_client):
-        response = api_client.get_seller_items(self.non_existent_seller_id)
-
-        errors = []
-        if response.status_code != 200:
-            errors.append(AssertionError(f"Ожидался код 200, но получен {response.status_code}"))
-
-        data = response.json()
-        if data != []:
-            errors.append(AssertionError(f"Ожидался пустой список [], но получен: {data}"))
 
-        if errors:
-            if len(errors) == 1:
-                raise errors[0]
-            else:
-                error_message = "Обнаружены ошибки:" + " ".join(map(str, errors))
-                pytest.fail(error_message, pytrace=False)
-
-    def test_get_seller_items_invalid_seller_id(self, api_client):
-        response = api_client.get_seller_items(self.invalid_seller_id)
-        assert response.status_code == 400, f"Ожидался код 400, но получен {response.status_code}"
+    @pytest.mark.latency_budget(p95=300)
+    def test_get_seller_items_latency(self, api_client, latency_budget):
+        latency_budget(lambda: api_client.get_seller_items(self.valid_seller_id))
 
     def test_get_seller_items_belongs_to_seller(self, api_client):
-        response = api_client.get_seller_items(self.valid_seller_id)
-        data = response.json()
-
         errors = []
-        for item in data:
-            if item["sellerId"] != self.valid_seller_id:
-                errors.append(AssertionError(f"Найден товар с чужим sellerId: {item['sellerId']}"))
+        with api_client.get_seller_items(self.valid_seller_id, stream=True) as seller_items:
+            assert seller_items.status_code == 200, f"Ожидался код 200, но получен {seller_items.status_code}"
+            for item in seller_items:
+                if item["sellerId"] != self.valid_seller_id:
+                    errors.append(AssertionError(f"Найден товар с чужим sellerId: {item['sellerId']}"))
 
-        if errors:
-            if len(errors) == 1:
-                raise errors[0]
-            else:
-                error_message = "Обнаружены ошибки:" + " ".join(map(str, errors))
-                pytest.fail(error_message, pytrace=False)
+        raise_errors(errors)
 
-    def test_post_and_get_seller_items_match(self, api_client):
+    def test_post_and_get_seller_items_match(self, api_client, shadow_inventory, seller_id):
         item_data = {
             "name": "Игровая консоль",
             "price": 45000,
-            "sellerId": self.valid_seller_id,  # Теперь передаём все данные в `data`
+            "sellerId": seller_id,  # Свой sellerId у воркера, чтобы не видеть чужие объявления
             "statistics": {
                 "contacts": 9,
                 "likes": 25,
@@ -89,37 +39,49 @@ class TestSellerItemsAPI:
         match = re.search(r"([a-f0-9\-]{36})", data["status"])
         assert match, f"Не удалось извлечь ID объявления из {data['status']}"
         item_id = match.group(1)
-
-        get_response = api_client.get_seller_items(self.valid_seller_id)
-        seller_items = get_response.json()
-
-        matching_items = [item for item in seller_items if item.get("id") == item_id]
-        assert matching_items, f"Объявление с ID {item_id} не найдено в списке товаров продавца"
-
-        fetched_item = matching_items[0]
-
+        assert item_id in shadow_inventory.seller_ids(seller_id)
+
+        # Сверяется только своё объявление: объявления соседних тестов воркера под тем же sellerId
+        # могут попадать в известные баги (BUGS.md) и не должны влиять на этот тест
+        diff = shadow_inventory.wait_for_seller(api_client, seller_id, ids=[item_id])
+        raise_errors(diff.errors())
+
+    def test_post_many_and_get_seller_items_match(self, async_api_client, run_async, seller_id):
+        """Параллельно создаём несколько объявлений, затем параллельно читаем их и список продавца"""
+        items_data = [
+            {
+                "name": f"Игровая консоль {i}",
+                "price": 45000 + i,
+                "sellerId": seller_id,
+                "statistics": {"contacts": 9, "likes": 25, "viewCount": 25}
+            }
+            for i in range(5)
+        ]
+
+        async def post_and_fetch():
+            post_responses = await asyncio.gather(*(async_api_client.post_item(item) for item in items_data))
+            item_ids = []
+            for post_response in post_responses:
+                status_text = post_response.json().get("status", "")
+                match = re.search(r"([a-f0-9\-]{36})", status_text)
+                assert match, f"Не удалось извлечь ID объявления из {status_text}"
+                item_ids.append(match.group(1))
+
+            seller_response, *item_responses = await asyncio.gather(
+                async_api_client.get_seller_items(seller_id),
+                *(async_api_client.get_item(item_id) for item_id in item_ids)
+            )
+            return item_ids, seller_response, item_responses
+
+        item_ids, seller_response, item_responses = run_async(post_and_fetch())
+        assert seller_response.status_code == 200, f"Ожидался код 200, но получен {seller_response.status_code}"
+
+        seller_item_ids = {item.get("id") for item in seller_response.json()}
         errors = []
-        for field in ["name", "price", "sellerId"]:
-            expected_value = item_data[field]
-            actual_value = fetched_item.get(field)
-
-            if actual_value != expected_value:
-                errors.append(
-                    AssertionError(f"Поле '{field}' не совпадает. Ожидалось {expected_value}, получено {actual_value}"))
-
-        expected_statistics = item_data["statistics"]
-        actual_statistics = fetched_item.get("statistics", {})
-        for stat_field in ["contacts", "likes", "viewCount"]:
-            expected_value = expected_statistics[stat_field]
-            actual_value = actual_statistics.get(stat_field)
-
-            if actual_value != expected_value:
-                errors.append(
-                    f"Поле 'statistics.{stat_field}' не совпадает. Ожидалось {expected_value}, получено {actual_value}")
+        for item_id, item_response in zip(item_ids, item_responses):
+            if item_id not in seller_item_ids:
+                errors.append(AssertionError(f"Объявление с ID {item_id} не найдено в списке товаров продавца"))
+            if item_response.status_code != 200:
+                errors.append(AssertionError(f"Ожидался код 200 для ID {item_id}, но получен {item_response.status_code}"))
 
-        if errors:
-            if len(errors) == 1:
-                raise errors[0]
-            else:
-                error_message = "Обнаружены ошибки:" + " ".join(map(str, errors))
-                pytest.fail(error_message, pytrace=False)
+        raise_errors(errors)
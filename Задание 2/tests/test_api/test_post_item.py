@@ -1,13 +1,16 @@
+import copy
 import re
 import pytest
 import warnings
 
+from utils.assertions import raise_errors
+from utils.propagation import DEFAULT_TIMEOUT, item_visible, probe_propagation, wait_until_visible
+
 
 class TestPostAPI:
-    item_data = {
+    item_template = {
         "name": "Телевизор",
         "price": 36500,
-        "sellerId": 999665,
         "statistics": {
             "contacts": 9,
             "likes": 25,
@@ -15,39 +18,39 @@ class TestPostAPI:
         }
     }
 
-    def test_post_item_status_code(self, api_client):
-        response = api_client.post_item(self.item_data)
+    @pytest.fixture
+    def item_data(self, seller_id):
+        return dict(copy.deepcopy(self.item_template), sellerId=seller_id)
+
+    def test_post_item_status_code(self, created_items, item_data):
+        response = created_items.post_item(item_data).response
 
         assert response.status_code in [200, 201], f"Ожидался код 200 или 201, но получен {response.status_code}"
 
-    def test_post_item(self, api_client):
-        post_response = api_client.post_item(self.item_data)
+    def test_post_item(self, created_items, item_data):
+        post_response = created_items.post_item(item_data).response
         data = post_response.json()
 
         match = re.search(r"([a-f0-9\-]{36})", data["status"])
         assert match, f"Не удалось извлечь ID объявления из {data['status']}"
 
-    def test_verify_item(self, api_client):
-        post_response = api_client.post_item(self.item_data)
+    def test_verify_item(self, api_client, created_items, item_data):
+        post_response = created_items.post_item(item_data).response
         data = post_response.json()
 
         match = re.search(r"([a-f0-9\-]{36})", data["status"])
         item_id = match.group(1)
 
-        get_response = api_client.get_item(item_id)
-        assert get_response.status_code == 200, f"Ожидался код 200, но получен {get_response.status_code}"
-
-        fetched_data = get_response.json()
-        if isinstance(fetched_data, list):
-            assert len(fetched_data) > 0, "Ответ содержит пустой список объявлений"
-            fetched_data = fetched_data[0]
+        # Сразу после POST объявление может быть ещё не видно на чтение
+        fetched_data = wait_until_visible(lambda: item_visible(api_client, item_id),
+                                          description=f"Объявление {item_id}")
 
         errors = []
 
         for field in ["name", "price", "sellerId"]:
             try:
-                assert fetched_data[field] == self.item_data[field], \
-                    f"Ожидалось {self.item_data[field]}, а получено {fetched_data[field]}"
+                assert fetched_data[field] == item_data[field], \
+                    f"Ожидалось {item_data[field]}, а получено {fetched_data[field]}"
             except KeyError:
                 warnings.warn(f"Поле '{field}' отсутствует в ответе, тест продолжается", UserWarning)
             except AssertionError as e:
@@ -57,79 +60,21 @@ class TestPostAPI:
 
         for stat_field in ["contacts", "likes", "viewCount"]:
             try:
-                assert statistics[stat_field] == self.item_data["statistics"][stat_field], \
-                    f"Ожидалось {self.item_data['statistics'][stat_field]}, а получено {statistics[stat_field]}"
+                assert statistics[stat_field] == item_data["statistics"][stat_field], \
+                    f"Ожидалось {item_data['statistics'][stat_field]}, а получено {statistics[stat_field]}"
             except KeyError:
                 warnings.warn(f"Поле '{stat_field}' отсутствует в разделе statistics, тест продолжается", UserWarning)
             except AssertionError as e:
                 errors.append(AssertionError(str(e)))
 
-        if errors:
-            if len(errors) == 1:
-                raise errors[0]
-            else:
-                error_message = "Обнаружены ошибки:" + " ".join(map(str, errors))
-                pytest.fail(error_message, pytrace=False)
-
-    def test_post_item_empty_body(self, api_client):
-        response = api_client.post_item({})
-        assert response.status_code == 400, f"Ожидался код 400, но получен {response.status_code}"
-
-    @pytest.mark.parametrize("missing_field", ["name", "price", "statistics"])
-    def test_post_item_missing_field(self, api_client, missing_field):
-        item_data = {
-            "name": "Смартфон",
-            "price": 60000,
-            "sellerId": 98765,
-            "statistics": {
-                "contacts": 9,
-                "like": 25,
-                "viewCount": 25
-            }
-        }
-
-        del item_data[missing_field]
-
-        response = api_client.post_item(item_data)
-
-        assert response.status_code in [200, 201], f"Ожидался код 200 или 201, но получен {response.status_code}"
-
-    @pytest.mark.parametrize("missing_field", ["sellerId"])
-    def test_post_item_missing_seller_id(self, api_client, missing_field):
-        item_data = {
-            "name": "Смартфон",
-            "price": 60000,
-            "sellerId": 98765,
-            "statistics": {
-                "contacts": 9,
-                "like": 25,
-                "viewCount": 25
-            }
-        }
-
-        del item_data[missing_field]
-
-        response = api_client.post_item(item_data)
-
-        assert response.status_code == 400, f"Ожидался код 400, но получен {response.status_code}"
-
-    @pytest.mark.parametrize("field, value", [
-        ("price", "дешево"),  # price должен быть числом
-        ("sellerId", "abcd123"),  # sellerId должен быть числом
-        ("statistics", "не json")  # statistics должен быть объектом
-    ])
-    def test_post_item_invalid_data(self, api_client, field, value):
-        item_data = {
-            "name": "Смартфон",
-            "price": 60000,
-            "sellerId": 98765,
-            "statistics": {
-                "contacts": 9,
-                "like": 25,
-                "viewCount": 25
-            }
-            , field: value}
+        raise_errors(errors)
 
-        response = api_client.post_item(item_data)
+    def test_item_propagation(self, api_client, item_data):
+        # Задержка видимости по каждому GET-эндпоинту попадает в отчёт замеров как visible:<endpoint>
+        result = probe_propagation(api_client, item_data)
+        assert not result.lagging, \
+            f"Объявление {result.item_id} не стало видно за {DEFAULT_TIMEOUT} с в {', '.join(result.lagging)}"
 
-        assert response.status_code == 400, f"Ожидался код 400, но получен {response.status_code}"
+    @pytest.mark.latency_budget(p95=500, repeat=3)
+    def test_post_item_latency(self, api_client, item_data, latency_budget):
+        latency_budget(lambda: api_client.post_item(item_data))
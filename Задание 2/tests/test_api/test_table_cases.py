@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+from utils.assertions import raise_errors
+from utils.case_table import load_cases, run_cases
+
+CASES_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "TESTCASES.md"))
+CASES = load_cases(CASES_PATH)
+# id кейсов берутся из TESTCASES.md: его правка сбрасывает манифест сбора, см. utils.collection_plugin
+COLLECTION_DEPENDS = [CASES_PATH]
+
+
+@pytest.fixture(scope="session")
+def case_responses(request, api_client, cached_api_client, seller_id):
+    """Все выбранные табличные кейсы одним параллельным проходом при первом обращении.
+    Область - сессия: при порядке по истории кейсы перемешаны с другими тестами.
+    GET-кейсы читают через cached_api_client, POST - через api_client"""
+    selected = [item.callspec.params["case"] for item in request.session.items
+                if getattr(item, "function", None) is test_table_case]
+    return run_cases(api_client, selected, seller_id, concurrency=api_client.pool_maxsize,
+                     read_client=cached_api_client)
+
+
+# Одна группа xdist: кейсы выполняет один воркер, и общий параллельный проход не дублируется
+@pytest.mark.xdist_group("case_table")
+@pytest.mark.parametrize("case", CASES, ids=[case.id for case in CASES])
+def test_table_case(case, case_responses):
+    response = case_responses[case.id]
+    if isinstance(response, Exception):
+        raise response
+    raise_errors(case.check(response))
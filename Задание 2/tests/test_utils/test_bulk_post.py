@@ -0,0 +1,49 @@
+import time
+
+from utils.api_client import APIClient, extract_item_id, response_item_id
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        if isinstance(self.body, Exception):
+            raise self.body
+        return self.body
+
+
+class TestBulkPost:
+    def test_extract_item_id(self):
+        assert extract_item_id("Сохранили объявление - b55a1222-e2ce-490d-9bec-06210269671e") == \
+            "b55a1222-e2ce-490d-9bec-06210269671e"
+        assert extract_item_id("Ошибка") is None
+        assert extract_item_id(None) is None
+
+    def test_response_item_id(self):
+        item_id = "b55a1222-e2ce-490d-9bec-06210269671e"
+        assert response_item_id(FakeResponse({"status": f"Сохранили объявление - {item_id}"})) == item_id
+        # Список, число, status не строкой или не JSON вовсе - id нет, без AttributeError
+        for body in ([{"status": item_id}], 42, {"status": 1}, ValueError("не JSON")):
+            assert response_item_id(FakeResponse(body)) is None
+
+    def test_post_items_bulk(self, stub_server):
+        payloads = ({"name": f"Товар {i}", "price": i, "sellerId": 333444} for i in range(200))
+        payloads_with_errors = [{"name": "Без продавца", "price": 1}, {"name": "Дорого", "price": "дорого", "sellerId": 1}]
+
+        with APIClient(stub_server.url) as client:
+            started = time.perf_counter()
+            result = client.post_items_bulk(payloads, concurrency=8)
+            elapsed = time.perf_counter() - started
+            failed = client.post_items_bulk(payloads_with_errors)
+
+            seller_ids = {item["id"] for item in client.get_seller_items(333444).json()}
+
+        assert len(result) == 200
+        assert not result.failures
+        assert set(result.created_ids) == seller_ids
+        assert all(status == 200 for status in result.statuses)
+        assert len(result.latencies) == 200 and elapsed < 10
+
+        assert failed.ids == [None, None]
+        assert [failure[:2] for failure in failed.failures] == [(0, 400), (1, 400)]
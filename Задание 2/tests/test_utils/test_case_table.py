@@ -0,0 +1,107 @@
+import pytest
+
+from utils.api_client import APIClient
+from utils.case_table import CaseError, parse_cases, resolve, run_cases
+from utils.schemas import ITEM_LIST
+
+TABLE = """
+Описание, которое парсер пропускает.
+
+| Кейс | Эндпоинт | Аргументы | Код | Схема | Ожидаемые поля |
+|------|----------|-----------|-----|-------|----------------|
+| existing | get_item | ["b55a1222-e2ce-490d-9bec-06210269671e"] | 200 | ITEM_LIST[missing,object] | {"$[0].statistics.likes": 25} |
+| missing | get_item | ["00000000-0000-0000-0000-000000000000"] | 404 | - | - |
+| own-seller | get_seller_items | ["$seller_id"] | 200,201 | - | {"$": []} |
+
+| ID | Название |
+|----|----------|
+| 1  | обычная таблица TESTCASES.md |
+"""
+
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+        self.text = str(body)
+
+    def json(self):
+        return self.body
+
+
+class TestCaseTable:
+    def test_parse(self):
+        existing, missing, own_seller = parse_cases(TABLE)
+
+        assert existing.schema is ITEM_LIST and existing.kinds == {"missing", "object"}
+        assert existing.fields == {"$[0].statistics.likes": 25}
+        assert missing.statuses == (404,) and missing.schema is None and missing.fields == {}
+        assert own_seller.statuses == (200, 201) and own_seller.args == ["$seller_id"]
+
+    @pytest.mark.parametrize("row, message", [
+        ("| a | delete_item | [] | 200 | - | - |", "неизвестный эндпоинт"),
+        ("| a | get_item | [1 | 200 | - | - |", "Expecting"),
+        ("| a | get_item | [] | 200 | NO_SUCH | - |", "неизвестная схема"),
+        ("| a | get_item | [] | 200 | - |", "ожидалось 6 колонок"),
+    ])
+    def test_parse_errors(self, row, message):
+        text = "| Кейс | Эндпоинт | Аргументы | Код | Схема | Ожидаемые поля |\n" + row
+        with pytest.raises(CaseError, match=message):
+            parse_cases(text, "cases.md")
+
+    def test_duplicate_case(self):
+        row = "| a | get_item | [] | 200 | - | - |\n"
+        with pytest.raises(CaseError, match="повтор кейса"):
+            parse_cases("| Кейс | Эндпоинт | Аргументы | Код | Схема | Ожидаемые поля |\n" + row * 2)
+
+    def test_resolve(self):
+        body = [{"statistics": {"likes": 3}}]
+        assert resolve(body, "$") is body
+        assert resolve(body, "$[0].statistics.likes") == 3
+        with pytest.raises(KeyError):
+            resolve(body, "$[0].name")
+
+    def test_check(self):
+        existing = parse_cases(TABLE)[0]
+
+        assert existing.check(FakeResponse(500, None))[0].args == ("Ожидался код 200, но получен 500",)
+        errors = existing.check(FakeResponse(200, [{"name": "x", "price": 1, "sellerId": 1,
+                                                    "statistics": {"likes": 1, "viewCount": 1, "contacts": 1},
+                                                    "extra": True}]))
+        # Лишнее поле не входит в выбранные виды нарушений, а значение поля не совпало
+        assert [str(error) for error in errors] == ["$[0].statistics.likes: ожидалось 25, а получено 1"]
+
+    def test_run_cases(self, stub_server):
+        cases = parse_cases(TABLE)
+        with APIClient(stub_server.url) as client:
+            responses = run_cases(client, cases, seller_id=987654321, concurrency=3)
+
+        assert list(responses) == ["existing", "missing", "own-seller"]
+        for case in cases:
+            assert case.check(responses[case.id]) == []
+
+    def test_run_cases_read_client(self, stub_server):
+        row = "| {} | {} | {} | {} | - | - |"
+        cases = parse_cases("\n".join([
+            "| Кейс | Эндпоинт | Аргументы | Код | Схема | Ожидаемые поля |",
+            row.format("first", "get_item", '["b55a1222-e2ce-490d-9bec-06210269671e"]', 200),
+            row.format("second", "get_item", '["b55a1222-e2ce-490d-9bec-06210269671e"]', 200),
+            row.format("post", "post_item", '[{"name": "Лампа", "price": 1, "sellerId": "$seller_id"}]', 200),
+        ]))
+        with APIClient(stub_server.url) as client:
+            reads = []
+            read_client = client.with_cache(None)
+            read_client.get_item = lambda item_id: reads.append(item_id) or client.get_item(item_id)
+            responses = run_cases(client, cases, seller_id=987652, read_client=read_client)
+
+        # Одинаковые GET отправлены один раз и через read_client, POST - через основной клиент
+        assert reads == ["b55a1222-e2ce-490d-9bec-06210269671e"]
+        assert responses["first"] is responses["second"]
+        assert cases[2].check(responses["post"]) == []
+
+    def test_seller_id_inside_payload(self, stub_server):
+        row = '| own-post | post_item | [{"name": "Лампа", "price": 1, "sellerId": "$seller_id"}] | 200 | - | - |'
+        case, = parse_cases("| Кейс | Эндпоинт | Аргументы | Код | Схема | Ожидаемые поля |\n" + row)
+        with APIClient(stub_server.url) as client:
+            assert case.check(case.call(client, seller_id=987653)) == []
+            assert [item["name"] for item in client.get_seller_items(987653).json()] == ["Лампа"]
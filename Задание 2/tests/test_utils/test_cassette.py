@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from utils.api_client import APIClient, extract_item_id
+from utils.cassette import Cassette, CassetteMiss, request_key
+from utils.stub_server import StubServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def run_api_tests(cassette_path, workers, *args):
+    env = {name: value for name, value in os.environ.items()
+           if not name.startswith("PYTEST_XDIST") and name != "AVITO_LOCAL_API"}
+    return subprocess.run([sys.executable, "-m", "pytest", "-q", "-n", str(workers), f"--cassette={cassette_path}",
+                           "--history-file=", "--collection-cache=", "--metrics-dir=", *args,
+                           os.path.join("Задание 2", "tests", "test_api")],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+
+
+class TestCassette:
+    def test_request_key_ignores_host(self):
+        assert request_key("GET", "http://127.0.0.1:8080/api/1/item/1", None) == \
+            request_key("get", "https://qa-internship.avito.com/api/1/item/1", b"")
+        assert request_key("POST", "http://h/api/1/item", b"{}") != request_key("POST", "http://h/api/1/item", b"[]")
+
+    def test_record_and_replay_without_network(self, tmp_path):
+        path = str(tmp_path / "api.cassette")
+        payload = {"name": "Телевизор", "price": 100, "sellerId": 666777}
+        Cassette.create(path)
+
+        with StubServer() as server:
+            cassette = Cassette(path, "record")
+            with APIClient(server.url, cassette=cassette) as client:
+                first_id = extract_item_id(client.post_item(payload).json()["status"])
+                second_id = extract_item_id(client.post_item(payload).json()["status"])
+                recorded_items = client.get_seller_items(666777).json()
+            cassette.close()
+
+        cassette = Cassette(path)
+        with APIClient("https://qa-internship.avito.com", cassette=cassette) as client:
+            assert extract_item_id(client.post_item(payload).json()["status"]) == first_id
+            assert extract_item_id(client.post_item(payload).json()["status"]) == second_id
+
+            response = client.get_seller_items(666777)
+            assert response.status_code == 200
+            assert response.json() == recorded_items
+            with client.get_seller_items(666777, stream=True) as seller_items:
+                assert [item["id"] for item in seller_items] == [first_id, second_id]
+
+            with pytest.raises(CassetteMiss):
+                client.get_item(first_id)
+        cassette.close()
+
+    def test_async_client_replay(self, tmp_path, run_async):
+        from utils.async_api_client import AsyncAPIClient
+
+        path = str(tmp_path / "api.cassette")
+        Cassette.create(path)
+        with StubServer() as server:
+            cassette = Cassette(path, "record")
+            client = AsyncAPIClient(server.url, cassette=cassette)
+            recorded = run_async(client.get_item("b55a1222-e2ce-490d-9bec-06210269671e")).json()
+            run_async(client.aclose())
+            cassette.close()
+
+        cassette = Cassette(path)
+        client = AsyncAPIClient("https://qa-internship.avito.com", cassette=cassette)
+        assert run_async(client.get_item("b55a1222-e2ce-490d-9bec-06210269671e")).json() == recorded
+        run_async(client.aclose())
+        cassette.close()
+
+    def test_replay_under_xdist(self, tmp_path):
+        # Раскладка тестов по воркерам при воспроизведении может отличаться от записи
+        path = str(tmp_path / "api.cassette")
+        recorded = run_api_tests(path, 3, "--local-api", "--cassette-mode=record")
+        assert recorded.returncode == 0, recorded.stdout[-2000:]
+        for workers in (3, 2):
+            replayed = run_api_tests(path, workers)
+            assert replayed.returncode == 0, replayed.stdout[-2000:]
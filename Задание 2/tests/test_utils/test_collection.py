@@ -0,0 +1,133 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from utils.collection_plugin import Selection
+from utils.startup_bench import parse_importtime
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_pytest(project, *args):
+    env = dict(os.environ, PYTHONPATH=TESTS_DIR)
+    return subprocess.run([sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "-p", "no:anyio", *args],
+                          cwd=project, env=env, capture_output=True, text=True)
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "pytest.ini").write_text("[pytest]\n")
+    (tmp_path / "conftest.py").write_text('pytest_plugins = ["utils.collection_plugin"]\n')
+    (tmp_path / "cases.txt").write_text("alpha\n")
+    # Модуль отмечает импорт в файле: по нему видно, пропустил ли его манифест
+    for name, body in (("get", "def test_get_item():\n    pass\n"),
+                       ("post", "import pytest\n\n\n@pytest.mark.slow\ndef test_post_item():\n    pass\n")):
+        (tmp_path / f"test_{name}.py").write_text(
+            f'open("imported_{name}", "a").write("x")\n' + body)
+    (tmp_path / "test_cases.py").write_text(textwrap.dedent("""
+        import pytest
+
+        COLLECTION_DEPENDS = ["cases.txt"]
+        CASES = open("cases.txt").read().split()
+
+
+        @pytest.mark.parametrize("case", CASES)
+        def test_case(case):
+            pass
+    """))
+    return tmp_path
+
+
+def imports(project, name):
+    path = project / f"imported_{name}"
+    count = len(path.read_text()) if path.exists() else 0
+    if path.exists():
+        path.unlink()
+    return count
+
+
+class TestCollectionManifest:
+    def test_skips_modules_without_matches(self, project):
+        assert run_pytest(project, "-p", "no:xdist").returncode == 0
+        manifest = json.loads((project / ".collection_cache.json").read_text())
+        assert set(manifest["modules"]) == {"test_get.py", "test_post.py", "test_cases.py"}
+        assert imports(project, "get") == imports(project, "post") == 1
+
+        result = run_pytest(project, "-p", "no:xdist", "-k", "get_item")
+        assert "1 passed" in result.stdout
+        assert imports(project, "get") == 1 and imports(project, "post") == 0
+
+        assert "1 passed" in run_pytest(project, "-p", "no:xdist", "-m", "slow").stdout
+        assert imports(project, "get") == 0 and imports(project, "post") == 1
+
+    def test_changed_files_are_collected(self, project):
+        run_pytest(project, "-p", "no:xdist")
+        imports(project, "post")
+
+        # Новый тест в изменённом модуле находится, хотя манифест о нём не знает
+        (project / "test_post.py").write_text('open("imported_post", "a").write("x")\n'
+                                              "def test_get_from_post():\n    pass\n")
+        assert "1 passed" in run_pytest(project, "-p", "no:xdist", "-k", "get_from_post").stdout
+        assert imports(project, "post") == 1
+
+        # id параметров берутся из файла данных: его правка сбрасывает запись модуля
+        (project / "cases.txt").write_text("alpha\nbeta_case\n")
+        assert "1 passed" in run_pytest(project, "-p", "no:xdist", "-k", "beta_case").stdout
+
+    def test_small_selection_runs_without_xdist_workers(self, project):
+        pytest.importorskip("xdist")
+        run_pytest(project, "-p", "no:xdist")
+
+        result = run_pytest(project, "-n", "auto", "-k", "get_item")
+        assert "1 passed" in result.stdout and "bringing up nodes" not in result.stdout
+        result = run_pytest(project, "-n", "auto", "-k", "get_item", "--inline-max=0")
+        assert "1 passed" in result.stdout and "bringing up nodes" in result.stdout
+
+
+class TestSelection:
+    @pytest.mark.parametrize("keyword, markexpr, expected", [
+        ("get_item", "", True),
+        ("not get_item", "", False),
+        ("ITEM and test_get", "", True),
+        ("", "slow", False),
+        ("", "not slow", True),
+        ("", "slow(reason=1)", True),
+        ("(get or post) and not slow", "", True),
+        ("GET_ITEM", "not (slow or parametrize)", False),
+    ])
+    def test_matches(self, keyword, markexpr, expected):
+        entry = {"keywords": ["test_get.py", "test_get_item"], "markers": ["parametrize"]}
+        assert Selection(keyword, markexpr).matches(entry) is expected
+
+    def test_invalid_expression(self):
+        assert not Selection("get_item and").valid
+        assert not Selection("(get_item").valid
+        # Аргументы маркеров грамматика манифеста не разбирает: прогон собирает все модули
+        assert not Selection("", "slow(reason=1)").valid
+        assert not Selection().valid
+
+
+class TestStartup:
+    def test_conftest_does_not_import_http_stack(self):
+        code = "import sys, conftest; print(sorted({'requests', 'httpx', 'asyncio'} & set(sys.modules)))"
+        result = subprocess.run([sys.executable, "-c", code], cwd=TESTS_DIR, capture_output=True, text=True,
+                                check=True)
+        assert result.stdout.strip() == "[]"
+
+    def test_parse_importtime(self):
+        stderr = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       100 |        100 |   encodings",
+            "import time:       200 |        300 | site",
+            "import time:        50 |         50 |     json.decoder",
+            "import time:       100 |        150 |   json",
+            "import time:        40 |         40 |   utils.schemas",
+            "import time:       500 |        690 | conftest",
+        ])
+        assert parse_importtime(stderr, "conftest") == (0.69, {"json": 0.15, "utils.schemas": 0.04})
+        with pytest.raises(ValueError):
+            parse_importtime(stderr, "utils")
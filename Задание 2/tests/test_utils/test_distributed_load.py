@@ -0,0 +1,83 @@
+import json
+import random
+import threading
+
+import pytest
+
+from utils.distributed_load import Coordinator, SketchResult, run_agent, start_local_agents
+from utils.metrics import LatencySketch, percentile
+
+
+class TestLatencySketch:
+    def test_relative_accuracy(self):
+        rng = random.Random(1)
+        values = [rng.lognormvariate(-4, 1) for _ in range(20000)]
+        sketch = LatencySketch(alpha=0.01)
+        for value in values:
+            sketch.add(value)
+
+        exact = sorted(values)
+        for q in (1, 50, 90, 95, 99, 99.9):
+            assert sketch.quantile(q) == pytest.approx(percentile(exact, q), rel=0.01)
+        assert sketch.quantile(100) == exact[-1]
+        # Размер скетча не зависит от числа замеров
+        assert len(sketch.bins) < 1000
+
+    def test_merge_equals_single_sketch(self):
+        rng = random.Random(2)
+        values = [rng.expovariate(50) for _ in range(5000)] + [0.0]
+        whole, left, right = LatencySketch(), LatencySketch(), LatencySketch()
+        for index, value in enumerate(values):
+            whole.add(value)
+            (left if index % 3 else right).add(value)
+
+        merged = LatencySketch.from_dict(json.loads(json.dumps(left.as_dict()))).merge(right)
+        assert dict(merged.bins) == dict(whole.bins)
+        assert (merged.count, merged.zero_count, merged.min, merged.max) == \
+               (whole.count, whole.zero_count, whole.min, whole.max)
+        assert [merged.quantile(q) for q in (50, 99)] == [whole.quantile(q) for q in (50, 99)]
+
+    def test_merge_rejects_other_accuracy(self):
+        with pytest.raises(ValueError, match="разной точностью"):
+            LatencySketch(0.01).merge(LatencySketch(0.02))
+
+
+class TestDistributedLoad:
+    def test_sketch_result_roundtrip(self):
+        result = SketchResult()
+        result.record("get_item", 200, 0.01)
+        result.record("get_item", "ConnectionError", 0.5)
+        result.elapsed = 2.0
+
+        restored = SketchResult.from_dict(json.loads(json.dumps(result.as_dict())))
+        assert restored.summary() == result.summary()
+        assert restored.summary()["total"]["errors_by_status"] == {"ConnectionError": 1}
+
+    def test_local_agent_processes(self, stub_server):
+        with Coordinator(agents=2) as coordinator:
+            processes = start_local_agents(coordinator.address, 2)
+            try:
+                result = coordinator.run(stub_server.url, {"get_item": 70, "get_item_statistics": 30},
+                                         concurrency=2, rps=100, duration=1.0, seed=1, start_delay=0.5)
+            finally:
+                for process in processes:
+                    process.wait(timeout=30)
+
+        summary = result.summary()
+        agents = summary["agents"]
+        assert sorted(agent["name"] for agent in agents) == ["local-0", "local-1"]
+        assert summary["total"]["requests"] == sum(agent["requests"] for agent in agents)
+        assert summary["total"]["error_rate"] == 0
+        # Каждый агент держит свою половину общего RPS
+        assert all(30 <= agent["requests"] <= 60 for agent in agents)
+        assert all(abs(agent["start_skew_ms"]) < 500 for agent in agents)
+        assert all(process.returncode == 0 for process in processes)
+
+    def test_agent_error_reaches_coordinator(self):
+        with Coordinator(agents=1) as coordinator:
+            agent = threading.Thread(target=lambda: pytest.raises(Exception, run_agent, coordinator.address))
+            agent.start()
+            # Сервиса на этом адресе нет: агент не может подготовить сценарий
+            with pytest.raises(RuntimeError, match="ConnectionError"):
+                coordinator.run("http://127.0.0.1:9", duration=0.1)
+            agent.join()
@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+from utils.api_client import APIClient
+from utils.fuzzer import PayloadFuzzer, expected_status, shrink_candidates
+
+
+class PriceBugClient:
+    """Сервис с ошибкой: отрицательная цена роняет его в 500"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def post_item(self, data):
+        self.calls += 1
+        price = data.get("price")
+        if isinstance(price, (int, float)) and not isinstance(price, bool) and price < 0:
+            return SimpleNamespace(status_code=500, text=f"internal error: price {price}")
+        if expected_status("post_item", data) == 400:
+            return SimpleNamespace(status_code=400, text='{"status": "400"}')
+        return SimpleNamespace(status_code=200, text='{"status": "Сохранили объявление - '
+                                                     'b55a1222-e2ce-490d-9bec-06210269671e"}')
+
+
+class TestFuzzer:
+    def test_oracle(self):
+        assert expected_status("post_item", {"sellerId": 111111, "name": "a", "price": 1}) == 200
+        assert expected_status("post_item", {"sellerId": 111111, "price": None}) == 400
+        assert expected_status("post_item", {"sellerId": True, "name": "a"}) == 400
+        assert expected_status("post_item", {"name": "a"}) == 400
+        assert expected_status("post_item", {"sellerId": 111111, "name": "a", "statistics": {"likes": "1"}}) == 400
+        assert expected_status("post_item_on_payload", {"sellerID": 999999, "name": "", "price": 0}) == 200
+        # sellerId вне SELLER_ID_RANGE, в том числе 0 (BUGS.md, пункт 5), - ошибка
+        for seller_id in (0, -1, 111110, 1000000, 10 ** 20):
+            assert expected_status("post_item", {"sellerId": seller_id, "name": "a"}) == 400
+
+    def test_shrink_candidates(self):
+        candidates = list(shrink_candidates({"a": 5, "s": {"likes": 2}}))
+        assert {"s": {"likes": 2}} in candidates
+        assert {"a": 0, "s": {"likes": 2}} in candidates
+        assert {"a": 5, "s": {}} in candidates
+        # sellerId упрощается до нижней границы диапазона, а не до 0
+        candidates = list(shrink_candidates({"sellerId": 500000}))
+        assert {"sellerId": 111111} in candidates and {"sellerId": 0} not in candidates
+
+    def test_dedup_and_shrink(self):
+        client = PriceBugClient()
+        report = PayloadFuzzer(client, seed=3).run(cases=300, concurrency=4)
+
+        # Разные отрицательные цены схлопываются в одну сигнатуру на каждый ожидаемый статус
+        failures = {failure["expected"]: failure for failure in report["failures"]}
+        assert len(failures) == len(report["failures"]) == 2
+        assert sum(failure["count"] for failure in failures.values()) == report["outcomes"]["500"]
+        assert failures[400]["minimal_payload"] == {"price": -1}
+        assert failures[200]["minimal_payload"] == {"sellerId": 111111, "price": -1}
+
+    def test_stub_matches_oracle(self, stub_server):
+        with APIClient(stub_server.url, retries=0) as client:
+            for endpoint in ("post_item", "post_item_on_payload"):
+                report = PayloadFuzzer(client, endpoint, seed=1).run(cases=200, concurrency=4)
+                assert report["failures"] == []
+                assert report["outcomes"] == {"ok": 200}
@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+from utils.history_plugin import HISTORY_LENGTH, RunHistory
+
+
+def items(*nodeids):
+    return [SimpleNamespace(nodeid=nodeid) for nodeid in nodeids]
+
+
+class TestRunHistory:
+    def test_record_and_save(self, tmp_path):
+        path = str(tmp_path / "history.json")
+        history = RunHistory.load(path, "local")
+        history.record("t::a", "passed", 0.1)
+        history.record("t::a", "failed", 0.2)  # упал на call после успешного setup
+        history.record("t::a", "passed", 0.05)
+        history.record("t::b", "skipped", 0.0)
+        history.save()
+
+        runs = RunHistory.load(path, "local").runs
+        assert runs["t::a"]["outcomes"] == ["failed"]
+        assert abs(runs["t::a"]["durations"][0] - 0.35) < 1e-9
+        assert "t::b" not in runs
+        assert RunHistory.load(path, "https://qa-internship.avito.com").runs == {}
+
+    def test_history_is_bounded(self, tmp_path):
+        path = str(tmp_path / "history.json")
+        for run in range(HISTORY_LENGTH + 5):
+            history = RunHistory.load(path, "local")
+            history.record("t::a", "passed", run)
+            history.save()
+
+        runs = RunHistory.load(path, "local").runs["t::a"]
+        assert len(runs["durations"]) == len(runs["outcomes"]) == HISTORY_LENGTH
+        assert runs["durations"][-1] == HISTORY_LENGTH + 4
+
+    def test_order(self):
+        history = RunHistory(None, "local", {
+            "t::slow_post": {"durations": [2.0], "outcomes": ["passed"]},
+            "t::invalid_id": {"durations": [0.01], "outcomes": ["passed"]},
+            "t::flaky": {"durations": [1.5], "outcomes": ["failed", "passed"]},
+            "t::broken": {"durations": [3.0], "outcomes": ["passed", "failed"]},
+            "t::medium": {"durations": [0.5], "outcomes": ["passed"]},
+        })
+        collected = items("t::slow_post", "t::medium", "t::new", "t::invalid_id", "t::flaky", "t::broken")
+        history.order(collected)
+
+        # Упавший в прошлый раз, затем новые и недавно падавшие, затем стабильные от быстрых к медленным
+        assert [item.nodeid for item in collected] == [
+            "t::broken", "t::new", "t::flaky", "t::invalid_id", "t::medium", "t::slow_post"
+        ]
+
+    def test_order_without_history_keeps_collection_order(self):
+        collected = items("t::c", "t::a", "t::b")
+        RunHistory(None, "local").order(collected)
+        assert [item.nodeid for item in collected] == ["t::c", "t::a", "t::b"]
@@ -0,0 +1,101 @@
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from utils.api_client import APIClient
+from utils.metrics import MetricsRegistry
+from utils.propagation import probe_propagation
+from utils.stub_server import ItemStore, ServerRateLimit, StubServer
+
+ITEM_ID = "0cd4183f-a699-4486-83f8-b513dfde477a"
+
+
+def _fan_out(client, calls=64):
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        return list(executor.map(lambda _: client.get_item_statistics(ITEM_ID).status_code, range(calls)))
+
+
+class TestHTTP2:
+    def test_h2c_multiplexes_one_connection(self):
+        with StubServer() as server:
+            with APIClient(server.url, http2=True) as client:
+                response = client.get_item(ITEM_ID)
+                assert response.http_version == "HTTP/2"
+                assert response.json()[0]["name"] == "Перстень"
+                assert _fan_out(client) == [200] * 64
+            # Все параллельные запросы - потоки одного соединения
+            assert server.connections == 1
+
+            with APIClient(server.url) as client:
+                _fan_out(client)
+            assert server.connections > 2
+
+    def test_fallback_to_http1(self):
+        with StubServer(http2=False) as server:
+            with APIClient(server.url, http2=True) as client:
+                response = client.post_item({"sellerId": 111222, "name": "Телефон", "price": 1})
+                assert response.status_code == 200
+                assert response.http_version == "HTTP/1.1"
+                assert client.get_item(ITEM_ID).status_code == 200
+            # Первое соединение ушло на проверку h2c через OPTIONS, дальше хост обслуживается по HTTP/1.1
+            assert server.connections == 2
+            # POST ушёл один раз: после неудачной преамбулы повторяется только идемпотентный запрос
+            assert len(server.store.by_seller(111222)) == 1
+
+    def test_post_is_not_replayed_after_h2c_failure(self):
+        with StubServer(http2=False) as server:
+            with APIClient(server.url, http2=True, retries=0) as client:
+                adapter = client.session.get_adapter(server.url)
+                # Без проверки OPTIONS первый POST идёт сразу как h2c, а сервер понимает только HTTP/1.1
+                adapter._probe_h2c = lambda origin, timeout, clients: None
+                with pytest.raises(requests.ConnectionError):
+                    client.post_item({"sellerId": 111223, "name": "Телефон", "price": 1})
+            assert server.store.by_seller(111223) == []
+
+    def test_tls_and_proxy_settings(self):
+        with StubServer() as server:
+            with APIClient(server.url, http2=True, retries=0) as client:
+                # Настройки TLS к http не относятся
+                client.session.verify = "/nonexistent/ca.pem"
+                assert client.get_item(ITEM_ID).status_code == 200
+                with pytest.raises(OSError):
+                    client.session.get("https://127.0.0.1:1/", timeout=1)
+
+                # Прокси из requests не пропускается: через закрытый порт запрос не проходит
+                with socket.socket() as sock:
+                    sock.bind(("127.0.0.1", 0))
+                    closed_port = sock.getsockname()[1]
+                client.session.proxies = {"http": f"http://127.0.0.1:{closed_port}"}
+                with pytest.raises(requests.ConnectionError):
+                    client.get_item(ITEM_ID)
+
+    def test_streaming_large_body(self):
+        store = ItemStore()
+        for price in range(1500):
+            store.create({"sellerId": 333444, "name": "Товар" * 10, "price": price})
+
+        with StubServer(store=store) as server, APIClient(server.url, http2=True) as client:
+            # Тело больше окна управления потоком HTTP/2 (64 КБ)
+            assert len(client.get_seller_items(333444).content) > 65535
+            with client.get_seller_items(333444, stream=True) as items:
+                assert [item["price"] for item in items] == list(range(1500))
+
+    def test_retry_after_and_hooks(self):
+        registry = MetricsRegistry()
+        with StubServer(rate_limit=ServerRateLimit(rate=5, burst=1)) as server:
+            with APIClient(server.url, http2=True, hooks=[registry]) as client:
+                statuses = [client.get_item(ITEM_ID).status_code for _ in range(2)]
+        # Второй GET получил 429 и повторился после Retry-After внутри адаптера
+        assert statuses == [200, 200]
+        assert [record.status for record in registry.records] == [200, 200]
+        assert all(record.ttfb is not None for record in registry.records)
+
+    def test_read_after_write_probe(self):
+        with StubServer(store=ItemStore(visibility_delay=0.1)) as server:
+            with APIClient(server.url, http2=True) as client:
+                result = probe_propagation(client, {"sellerId": 555666, "name": "Телефон", "price": 1})
+            assert not result.lagging
+            assert result.max_lag == pytest.approx(0.1, abs=0.5)
+            assert server.connections == 1
@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+from utils.api_client import APIClient
+from utils.item_cache import CreatedItemCache, payload_fingerprint
+from utils.metrics import MetricsRegistry
+
+
+class TestCreatedItemCache:
+    def test_fingerprint_ignores_key_order(self):
+        assert payload_fingerprint("post_item", {"a": 1, "b": {"c": 2, "d": 3}}) == \
+            payload_fingerprint("post_item", {"b": {"d": 3, "c": 2}, "a": 1})
+        assert payload_fingerprint("post_item", {"a": 1}) != payload_fingerprint("post_item_on_payload", {"a": 1})
+
+    def test_same_payload_posted_once(self, stub_server):
+        registry = MetricsRegistry()
+        with APIClient(stub_server.url, hooks=[registry]) as client:
+            cache = CreatedItemCache(client)
+            payload = {"name": "Телевизор", "price": 100, "sellerId": 444555}
+
+            first = cache.post_item(payload)
+            second = cache.post_item(dict(payload))
+            fresh = cache.post_item(payload, fresh=True)
+            on_payload = cache.post_item_on_payload(444555, "Телевизор", 100)
+            cache.post_item_on_payload(444555, "Телевизор", 100)
+
+        assert first is second
+        assert first.id and fresh.id and first.id != fresh.id
+        assert on_payload.id not in (first.id, fresh.id)
+        assert len(registry) == 3, "Ожидалось три POST: кешированный, fresh и через payload"
+
+    def test_failed_create_is_not_cached(self):
+        statuses = [500, 200]
+
+        class FlakyClient:
+            def post_item(self, data):
+                status = statuses.pop(0)
+                body = {"status": "Сохранили объявление - b55a1222-e2ce-490d-9bec-06210269671e"} \
+                    if status == 200 else {"status": "500"}
+                return SimpleNamespace(status_code=status, json=lambda: body)
+
+        cache = CreatedItemCache(FlakyClient())
+        payload = {"name": "Телевизор", "sellerId": 444555}
+        assert cache.post_item(payload).id is None
+        retried = cache.post_item(payload)
+        assert retried.id == "b55a1222-e2ce-490d-9bec-06210269671e"
+        assert cache.post_item(payload) is retried and not statuses
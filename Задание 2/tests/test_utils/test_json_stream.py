@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from utils.api_client import APIClient
+from utils.json_stream import iter_json_array
+
+
+def chunked(data, size):
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+class TestJsonStream:
+    @pytest.mark.parametrize("chunk_size", [1, 2, 7, 1024])
+    def test_split_anywhere(self, chunk_size):
+        items = [{"name": "Телевизор", "price": 36500, "statistics": {"likes": 1}}, 12345, "строка", [1, [2]], None]
+        data = json.dumps(items, ensure_ascii=False, indent=1).encode("utf-8")
+        assert list(iter_json_array(chunked(data, chunk_size))) == items
+
+    def test_empty_array(self):
+        assert list(iter_json_array([b" [ ", b"] "])) == []
+
+    @pytest.mark.parametrize("data", [b'{"status": "400"}', b"[1, 2", b"[1 2]", b"[1] [2]"])
+    def test_malformed(self, data):
+        with pytest.raises(ValueError):
+            list(iter_json_array(chunked(data, 3)))
+
+    def test_lazy(self):
+        def chunks():
+            yield b'[{"id": 1},'
+            raise AssertionError("Второй кусок не должен читаться")
+
+        assert next(iter_json_array(chunks())) == {"id": 1}
+
+    def test_stream_seller_items(self, stub_server):
+        with APIClient(stub_server.url) as client:
+            for price in range(50):
+                client.post_item({"name": "Телевизор", "price": price, "sellerId": 222333})
+
+            with client.get_seller_items(222333, stream=True) as seller_items:
+                assert seller_items.status_code == 200
+                prices = [item["price"] for item in seller_items]
+
+        assert prices == list(range(50))
@@ -0,0 +1,73 @@
+import os
+import random
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from utils.latency_plugin import LatencyBudget
+from utils.metrics import mann_whitney_greater
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_pytest(project, *args):
+    env = {name: value for name, value in os.environ.items() if name != "AVITO_LATENCY"}
+    env["PYTHONPATH"] = TESTS_DIR
+    return subprocess.run([sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "-p", "no:anyio",
+                           "-p", "no:xdist", "-rs", *args], cwd=project, env=env, capture_output=True, text=True)
+
+
+class TestLatencyBudget:
+    def test_within_budget(self):
+        results = {}
+        budget = LatencyBudget("check", "local", {"p95": 1000}, 5, None, results)
+
+        samples = budget(lambda: None)
+        assert len(samples) == 5
+        assert results["local"]["check"] == samples
+
+    def test_budget_exceeded(self):
+        budget = LatencyBudget("check", "local", {"p95": 0.000001}, 3, None, {})
+        with pytest.raises(pytest.fail.Exception, match="p95 = .* превышает бюджет"):
+            budget(lambda: sum(range(1000)))
+
+    def test_failed_responses_fail_budget(self):
+        results = {}
+        statuses = iter([200, 200, 404, 200, 500])
+        budget = LatencyBudget("check", "local", {"p95": 1000}, 4, None, results)
+        with pytest.raises(pytest.fail.Exception, match=r"ответы с ошибкой \(404 x1, 500 x1\)"):
+            budget(lambda: SimpleNamespace(status_code=next(statuses)))
+        assert results == {}
+
+    def test_regression_against_baseline(self):
+        baseline = [0.000001] * 20
+        budget = LatencyBudget("check", "local", {}, 20, baseline, {})
+        with pytest.raises(pytest.fail.Exception, match="статистически значимое замедление"):
+            budget(lambda: sum(range(10000)))
+
+    def test_mann_whitney(self):
+        rng = random.Random(1)
+        fast = [rng.gauss(0.10, 0.01) for _ in range(30)]
+        slow = [rng.gauss(0.13, 0.01) for _ in range(30)]
+        same = [rng.gauss(0.10, 0.01) for _ in range(30)]
+
+        assert mann_whitney_greater(slow, fast) < 0.001
+        assert mann_whitney_greater(fast, slow) > 0.99
+        assert mann_whitney_greater(same, fast) > 0.01
+
+    def test_opt_in(self, tmp_path):
+        (tmp_path / "pytest.ini").write_text("[pytest]\n")
+        (tmp_path / "conftest.py").write_text(
+            'import pytest\n\npytest_plugins = ["utils.latency_plugin"]\n\n\n'
+            '@pytest.fixture\ndef api_target():\n    return "local"\n')
+        (tmp_path / "test_budget.py").write_text(
+            "import pytest\n\n\n@pytest.mark.latency_budget(p95=1000, repeat=2)\n"
+            "def test_latency(latency_budget):\n    latency_budget(lambda: None)\n\n\n"
+            "def test_other():\n    pass\n")
+
+        skipped = run_pytest(tmp_path)
+        assert skipped.returncode == 0 and "1 passed, 1 skipped" in skipped.stdout, skipped.stdout
+        enabled = run_pytest(tmp_path, "--latency")
+        assert enabled.returncode == 0 and "2 passed" in enabled.stdout, enabled.stdout
@@ -0,0 +1,44 @@
+import pytest
+
+from utils.load_runner import format_report, parse_mix, run_load
+from utils.metrics import percentile
+
+
+class TestLoadRunner:
+    def test_parse_mix(self):
+        assert parse_mix("get_item=70,get_seller_items=20,post_item=10") == {
+            "get_item": 70.0, "get_seller_items": 20.0, "post_item": 10.0
+        }
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+        assert percentile(values, 99) == 99
+        assert percentile([], 99) == 0.0
+
+    def test_run_load_concurrency(self, stub_server):
+        mix = {"get_item": 70, "get_seller_items": 20, "post_item": 10}
+        summary = run_load(stub_server.url, mix, concurrency=4, duration=0.5, seed=1).summary()
+
+        total = summary["total"]
+        assert total["requests"] > 0, "Нагрузка не отправила ни одного запроса"
+        assert total["error_rate"] == 0, f"Ожидался прогон без ошибок, получено {total['errors_by_status']}"
+        assert total["p50_ms"] <= total["p95_ms"] <= total["p99_ms"]
+        assert set(summary["endpoints"]) <= set(mix)
+        assert "TOTAL" in format_report(summary)
+
+    def test_run_load_target_rps(self, stub_server):
+        summary = run_load(stub_server.url, {"get_item_statistics": 1}, concurrency=4, rps=100, duration=1, seed=1).summary()
+
+        assert summary["total"]["requests"] == pytest.approx(100, abs=2)
+        assert summary["total"]["throughput_rps"] == pytest.approx(100, rel=0.3)
+
+    def test_run_load_unknown_endpoint(self, stub_server):
+        with stub_server.store.lock:
+            created = len(stub_server.store.items)
+        with pytest.raises(ValueError):
+            run_load(stub_server.url, {"get_item": 1, "delete_item": 1}, duration=0.1)
+        # Смесь проверяется до того, как сценарий создаст объявление
+        with stub_server.store.lock:
+            assert len(stub_server.store.items) == created
@@ -0,0 +1,61 @@
+import csv
+import json
+
+import pytest
+from urllib3.exceptions import NewConnectionError
+
+from utils.api_client import APIClient
+from utils.metrics import MetricsRegistry, histogram, is_error_status
+from utils.transport import TimedHTTPConnection
+
+
+class TestMetrics:
+    def test_client_records_every_call(self, stub_server):
+        registry = MetricsRegistry()
+        with APIClient(stub_server.url, hooks=[registry]) as client:
+            client.post_item({"name": "Телевизор", "price": 100, "sellerId": 111222})
+            client.get_seller_items(111222)
+            client.get_item("123abc")
+
+        records = registry.records
+        assert [record.endpoint for record in records] == ["post_item", "get_seller_items", "get_item"]
+        assert [record.status for record in records] == [200, 200, 400]
+        assert records[1].template == "/api/1/{sellerId}/item"
+
+        first = records[0]
+        assert first.connect > 0, "Первый запрос должен открыть соединение"
+        assert first.request_bytes > 0 and first.response_bytes > 0
+        assert 0 < first.ttfb <= first.total
+        assert records[1].connect == 0, "Повторный запрос должен переиспользовать соединение"
+
+    def test_reports(self, tmp_path):
+        registry = MetricsRegistry()
+        registry.extend([
+            {"endpoint": "get_item", "template": "/api/1/item/{id}", "method": "GET", "status": 200, "total": 0.003},
+            {"endpoint": "get_item", "template": "/api/1/item/{id}", "method": "GET", "status": 502, "total": 0.120},
+        ])
+
+        summary = registry.summary()["get_item"]
+        assert summary["requests"] == 2
+        assert summary["errors"] == 1
+        assert summary["histogram_ms"]["2-5"] == 1 and summary["histogram_ms"]["100-200"] == 1
+        assert "get_item /api/1/item/{id}" in registry.histogram_report()
+
+        registry.write_json(tmp_path / "run.json")
+        registry.write_csv(tmp_path / "run.csv")
+        assert len(json.loads((tmp_path / "run.json").read_text(encoding="utf-8"))["records"]) == 2
+        with open(tmp_path / "run.csv", encoding="utf-8") as f:
+            assert [row["status"] for row in csv.DictReader(f)] == ["200", "502"]
+
+    def test_histogram_bounds(self):
+        counts = histogram([0.0005, 0.001, 6.0])
+        assert counts["0-1"] == 1 and counts["1-2"] == 1 and counts[">5000"] == 1
+
+    def test_is_error_status(self):
+        assert [is_error_status(status) for status in (200, 201, 400, 404)] == [False] * 4
+        assert [is_error_status(status) for status in (0, None, "ConnectionError", 429, 500, 503)] == [True] * 6
+
+    def test_empty_getaddrinfo(self, monkeypatch):
+        monkeypatch.setattr("socket.getaddrinfo", lambda *args, **kwargs: [])
+        with pytest.raises(NewConnectionError, match="getaddrinfo returns an empty list"):
+            TimedHTTPConnection("example.invalid", 80)._new_conn()
@@ -0,0 +1,116 @@
+import json
+import math
+import os
+
+import pytest
+
+from utils.metrics import MetricsRegistry, RequestRecord
+from utils.metrics_plugin import prune_runs
+from utils.metrics_store import MetricsStore, main, parse_duration, report, trends
+
+DAY = 86400
+# 2025-02-10 00:00:00 UTC
+START = 1739145600.0
+
+
+def make_record(started_at, endpoint="get_item", status=200, total=0.01):
+    templates = {"get_item": "/api/1/item/{id}", "post_item": "/api/1/item"}
+    return RequestRecord(started_at=started_at, endpoint=endpoint, template=templates[endpoint],
+                         method="POST" if endpoint == "post_item" else "GET", status=status, dns=0.0, connect=0.001,
+                         tls=0.0, ttfb=None, total=total, request_bytes=0, response_bytes=120)
+
+
+class TestMetricsStore:
+    def test_parse_duration(self):
+        assert parse_duration("30s") == 30
+        assert parse_duration("1.5h") == 5400
+        assert parse_duration("7d") == 7 * DAY
+        with pytest.raises(ValueError):
+            parse_duration("неделя")
+
+    def test_append_and_load(self, tmp_path):
+        store = MetricsStore(str(tmp_path))
+        records = [make_record(START + i * 3600, total=i / 1000) for i in range(48)]
+        records.append(make_record(START + 10, "post_item", status=0, total=3.0))
+        assert store.append(records) == 49
+
+        frame = store.load()
+        assert len(frame) == 49
+        assert store.days() == ["2025-02-10", "2025-02-11"]
+        get_item = frame.endpoint("get_item")
+        assert list(get_item["started_at"]) == [START + i * 3600 for i in range(48)]
+        assert get_item["total"][5] == pytest.approx(0.005)
+        assert math.isnan(get_item["ttfb"][0])
+        assert list(frame.endpoint("post_item")["status"]) == [0]
+
+        # Период режется по границе внутри суток, партиции другого эндпоинта не читаются
+        window = store.load(since=START + 12 * 3600, until=START + DAY + 3600, endpoint="get_item")
+        assert list(window.endpoint("get_item")["started_at"]) == [START + i * 3600 for i in range(12, 25)]
+        assert len(window.endpoint("post_item")["started_at"]) == 0
+
+    def test_torn_tail_is_ignored(self, tmp_path):
+        store = MetricsStore(str(tmp_path))
+        store.append([make_record(START + i) for i in range(3)])
+        with open(os.path.join(str(tmp_path), "2025-02-10", "0.total"), "ab") as f:
+            f.write(b"\x00\x01")  # писатель упал посреди записи
+        assert len(store.load()) == 3
+
+        # Следующая запись сначала обрезает хвост, иначе значения колонки сместились бы
+        store.append([make_record(START + 10, total=0.5)])
+        frame = store.load().endpoint("get_item")
+        assert list(frame["started_at"]) == [START, START + 1, START + 2, START + 10]
+        assert frame["total"][3] == pytest.approx(0.5)
+
+    def test_prune(self, tmp_path):
+        store = MetricsStore(str(tmp_path / "store"))
+        store.append([make_record(START + day * DAY) for day in range(3)])
+        assert store.prune(START + 2 * DAY) == ["2025-02-10", "2025-02-11"]
+        assert store.days() == ["2025-02-12"] and len(store.load()) == 1
+
+        for name in ("run-20250210-120000", "run-20250211-120000", "run-20250212-120000"):
+            for extension in (".json", ".csv"):
+                (tmp_path / (name + extension)).write_text("")
+        assert prune_runs(str(tmp_path), keep=1) == ["run-20250210-120000", "run-20250211-120000"]
+        assert sorted(os.listdir(tmp_path)) == ["run-20250212-120000.csv", "run-20250212-120000.json", "store"]
+        assert prune_runs(str(tmp_path), keep=0) == []
+
+    def test_report_windows(self, tmp_path):
+        store = MetricsStore(str(tmp_path))
+        records = []
+        for hour in range(3):
+            for i in range(100):
+                status = 500 if hour == 2 and i < 10 else 200
+                records.append(make_record(START + hour * 3600 + i, total=(hour + 1) * (i + 1) / 1000,
+                                           status=status))
+        # Пачки приходят не по порядку: отчёт всё равно режет окна верно
+        store.append(records[200:])
+        store.append(records[:200])
+
+        rows = report(store.load(), window=3600)
+        assert [row["requests"] for row in rows] == [100, 100, 100]
+        assert [row["p50_ms"] for row in rows] == pytest.approx([50, 100, 150], rel=1e-3)
+        assert rows[0]["p99_ms"] == pytest.approx(99, rel=1e-3)
+        assert [row["error_rate"] for row in rows] == [0, 0, 0.1]
+
+        change = trends(rows)["get_item"]
+        assert change["windows"] == 3
+        assert change["p95_change"] == pytest.approx(2.0, rel=1e-3)
+        assert change["error_rate_change"] == pytest.approx(0.1)
+
+        total = report(store.load(), endpoint="get_item")
+        assert len(total) == 1 and total[0]["requests"] == 300
+
+    def test_import_run_json(self, tmp_path, capsys):
+        registry = MetricsRegistry()
+        for i in range(5):
+            registry(make_record(START + i))
+        run_path = str(tmp_path / "run.json")
+        registry.write_json(run_path)
+        store_path = str(tmp_path / "store")
+
+        main(["--store", store_path, "import", run_path])
+        main(["--store", store_path, "report", "--since", "2025-02-10", "--json", str(tmp_path / "report.json")])
+
+        assert "5 замеров загружено" in capsys.readouterr().out
+        with open(tmp_path / "report.json", encoding="utf-8") as f:
+            assert json.load(f)[0]["requests"] == 5
@@ -0,0 +1,73 @@
+import json
+import os
+import subprocess
+import sys
+
+from utils.profiling import TestProfile, classify, trim_harness
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PYTEST_CALL = ("/venv/_pytest/python.py", "pytest_pyfunc_call", 1)
+TEST_FRAME = ("/tests/test_api/test_get_item.py", "test_get_item", 10)
+
+
+def decode_loop(text):
+    for _ in range(3000):
+        json.loads(text)
+
+
+class TestProfiling:
+    def test_classify(self):
+        client = ("/tests/utils/api_client.py", "get_item", 1)
+        assert classify([PYTEST_CALL, TEST_FRAME, client, ("/lib/socket.py", "readinto", 1)]) == "network"
+        decode = [("/requests/models.py", "json", 1), ("/lib/json/decoder.py", "decode", 1)]
+        assert classify([PYTEST_CALL, TEST_FRAME, *decode]) == "json"
+        check = [("/tests/utils/schemas.py", "check", 1), ("/lib/re/__init__.py", "match", 1)]
+        assert classify([PYTEST_CALL, TEST_FRAME, *check]) == "validation"
+        assert classify([PYTEST_CALL, TEST_FRAME]) == "validation"
+        assert classify([PYTEST_CALL, TEST_FRAME, client, ("/lib/threading.py", "wait", 1)]) == "idle"
+        # Поток локального сервиса и поток ввода-вывода execnet не относятся к клиенту
+        assert classify([("/lib/socketserver.py", "serve_forever", 1), ("/lib/json/encoder.py", "encode", 1)]) is None
+        assert classify([("/execnet/gateway_base.py", "read", 1)]) is None
+
+    def test_trim_harness(self):
+        stack = [("/venv/pluggy/_callers.py", "_multicall", 1), PYTEST_CALL, TEST_FRAME]
+        assert trim_harness(stack) == [TEST_FRAME]
+        worker = [("/lib/threading.py", "_bootstrap", 1), ("/lib/threading.py", "run", 1),
+                  ("/lib/concurrent/futures/thread.py", "_worker", 1)]
+        assert trim_harness(worker) == worker[2:]
+
+    def test_profile_decode_loop(self):
+        text = json.dumps([{"id": str(index), "statistics": {"likes": index}} for index in range(50)])
+        with TestProfile("t::decode", interval=0.001) as profile:
+            decode_loop(text)
+            retained = [bytearray(1024) for _ in range(2000)]
+
+        result = profile.as_dict(top=5)
+        assert result["samples"] > 0
+        categories = result["categories_ms"]
+        assert max(categories, key=categories.get) == "json"
+        assert any(spot["category"] == "json" for spot in result["hot_spots"])
+        # Больше всего памяти к концу вызова держит список bytearray из этого файла
+        assert result["allocations"][0]["line"].startswith("test_profiling.py:")
+        assert result["peak_kb"] >= len(retained)
+        for line in profile.sampler.folded().splitlines():
+            stack, count = line.rsplit(" ", 1)
+            assert int(count) > 0 and ";" in stack
+
+    def test_marker_writes_profiles(self, tmp_path):
+        (tmp_path / "conftest.py").write_text('pytest_plugins = ["utils.profile_plugin"]\n')
+        (tmp_path / "test_marked.py").write_text(
+            "import json\nimport pytest\n\n\n"
+            "@pytest.mark.profile\n"
+            "def test_profiled():\n    for _ in range(20000):\n        json.loads('[1, 2, 3]')\n\n\n"
+            "def test_plain():\n    pass\n")
+        result = subprocess.run([sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "-p", "no:xdist",
+                                 "-p", "no:anyio", "--profile-interval=1"], cwd=tmp_path,
+                                env=dict(os.environ, PYTHONPATH=TESTS_DIR), capture_output=True, text=True)
+
+        assert "2 passed" in result.stdout and "Профиль тестов" in result.stdout
+        files = sorted(os.listdir(tmp_path / ".test_profiles"))
+        assert files == ["test_marked.py_test_profiled.folded", "test_marked.py_test_profiled.json"]
+        profile = json.loads((tmp_path / ".test_profiles" / files[1]).read_text())
+        assert profile["nodeid"] == "test_marked.py::test_profiled"
+        assert "json" in profile["categories_ms"]
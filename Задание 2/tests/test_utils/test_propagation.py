@@ -0,0 +1,60 @@
+import pytest
+
+from utils.api_client import APIClient
+from utils.metrics import MetricsRegistry
+from utils.propagation import PropagationTimeout, probe_propagation, wait_until_visible
+from utils.stub_server import ItemStore, StubServer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestPropagation:
+    def test_wait_until_visible_backoff(self):
+        clock = FakeClock()
+        results = iter([None, None, None, {"id": 1}])
+
+        assert wait_until_visible(lambda: next(results), clock=clock, sleep=clock.sleep) == {"id": 1}
+        assert len(clock.sleeps) == 3
+        # Каждая пауза не больше предыдущего шага backoff и растёт вместе с ним
+        assert clock.sleeps[0] <= 0.02 and clock.sleeps[2] <= 0.08 and clock.sleeps[2] > clock.sleeps[0]
+
+    def test_wait_until_visible_deadline(self):
+        clock = FakeClock()
+        with pytest.raises(PropagationTimeout, match="не стало видно за 1"):
+            wait_until_visible(lambda: None, timeout=1, clock=clock, sleep=clock.sleep)
+        assert clock.now == pytest.approx(1)
+        assert max(clock.sleeps) <= 0.5
+
+    def test_probe_delayed_store(self):
+        registry = MetricsRegistry()
+        with StubServer(store=ItemStore(visibility_delay=0.2)) as server, \
+                APIClient(server.url, hooks=[registry]) as client:
+            result = probe_propagation(client, {"name": "Лампа", "price": 10, "sellerId": 424242}, timeout=3)
+
+        assert not result.lagging
+        assert all(0.2 <= lag < 2 for lag in result.visible_after.values())
+        assert all(attempts > 1 for attempts in result.attempts.values())
+        summary = registry.summary()
+        assert {"visible:get_item", "visible:get_seller_items", "visible:get_item_statistics"} <= set(summary)
+        assert summary["visible:get_item"]["errors"] == 0
+
+    def test_probe_timeout(self):
+        registry = MetricsRegistry()
+        with StubServer(store=ItemStore(visibility_delay=5)) as server, \
+                APIClient(server.url, hooks=[registry]) as client:
+            result = probe_propagation(client, {"name": "Лампа", "price": 10, "sellerId": 424242}, timeout=0.3,
+                                       endpoints=("get_item",))
+
+        assert result.lagging == ["get_item"] and result.max_lag is None
+        assert registry.summary()["visible:get_item"]["errors"] == 1
@@ -0,0 +1,115 @@
+import asyncio
+import multiprocessing
+import time
+
+import pytest
+
+from utils.api_client import APIClient
+from utils.async_api_client import AsyncAPIClient
+from utils.rate_limit import SharedRateLimiter, retry_after
+from utils.stub_server import ServerRateLimit, StubServer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+def _reserve_many(path, count, results):
+    limiter = SharedRateLimiter(path, rate=20, burst=1)
+    results.extend([limiter.reserve("get_item") for _ in range(count)])
+    limiter.close()
+
+
+class TestRateLimit:
+    def test_burst_then_spacing(self, tmp_path):
+        clock = FakeClock()
+        limiter = SharedRateLimiter(str(tmp_path / "limits"), rate=10, burst=3, clock=clock)
+
+        waits = [limiter.reserve("get_item") for _ in range(5)]
+        # Три запроса сразу, дальше по одному в 1/rate секунды
+        assert waits == pytest.approx([0, 0, 0, 0.1, 0.2])
+        # Эндпоинты считаются отдельно
+        assert limiter.reserve("post_item") == 0
+
+        clock.now += 10
+        assert limiter.reserve("get_item") == 0
+
+    def test_shared_between_instances(self, tmp_path):
+        clock = FakeClock()
+        path = str(tmp_path / "limits")
+        first = SharedRateLimiter(path, rate=10, burst=1, clock=clock)
+        second = SharedRateLimiter(path, rate=10, burst=1, clock=clock)
+
+        assert first.reserve("get_item") == 0
+        assert second.reserve("get_item") == pytest.approx(0.1)
+        assert first.reserve("get_item") == pytest.approx(0.2)
+
+    def test_shared_between_processes(self, tmp_path):
+        path = str(tmp_path / "limits")
+        with multiprocessing.Manager() as manager:
+            results = manager.list()
+            processes = [multiprocessing.Process(target=_reserve_many, args=(path, 5, results)) for _ in range(3)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            waits = sorted(results)
+
+        # 15 запросов при 20 в секунду: расписание общее, ожидания не повторяются
+        assert len(waits) == 15
+        assert waits[-1] == pytest.approx(14 / 20, abs=0.1)
+        assert all(later - earlier > 0.02 for earlier, later in zip(waits, waits[1:]))
+
+    def test_throttled_backoff_and_recovery(self, tmp_path):
+        clock = FakeClock()
+        limiter = SharedRateLimiter(str(tmp_path / "limits"), rate=8, burst=2, clock=clock)
+
+        limiter.record("get_item", 429, delay=1.0)
+        assert limiter.rate("get_item") == 4
+        # После паузы без накопленного burst
+        assert limiter.reserve("get_item") == pytest.approx(1.0)
+
+        for _ in range(50):
+            limiter.record("get_item", 200)
+        assert limiter.rate("get_item") == 8
+
+    def test_retry_after(self):
+        assert retry_after(FakeResponse({"Retry-After": "3"}), attempt=0) == 3
+        assert retry_after(FakeResponse({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}), attempt=0) == 0
+        assert retry_after(FakeResponse({}), attempt=2) == 2
+        assert retry_after(FakeResponse({}), attempt=10) == 10
+
+    def test_client_retries_throttled(self, tmp_path):
+        with StubServer(rate_limit=ServerRateLimit(rate=4, burst=1)) as server:
+            with APIClient(server.url, retries=0) as client:
+                statuses = [client.get_item("0cd4183f-a699-4486-83f8-b513dfde477a").status_code for _ in range(6)]
+            assert 429 in statuses
+
+            limiter = SharedRateLimiter(str(tmp_path / "limits"), rate=40, burst=1)
+            with APIClient(server.url, rate_limiter=limiter) as client:
+                statuses = [client.get_item("0cd4183f-a699-4486-83f8-b513dfde477a").status_code for _ in range(3)]
+            # Слишком высокий темп: 429 повторяются после Retry-After, а темп снижается
+            assert statuses == [200] * 3
+            assert limiter.rate("get_item") < 40
+
+    def test_async_client_paced(self, tmp_path):
+        limiter = SharedRateLimiter(str(tmp_path / "limits"), rate=10, burst=1)
+
+        async def run(url):
+            async with AsyncAPIClient(url, rate_limiter=limiter) as client:
+                responses = await asyncio.gather(*(client.get_seller_items(12345) for _ in range(5)))
+            return [response.status_code for response in responses]
+
+        with StubServer(rate_limit=ServerRateLimit(rate=12, burst=1)) as server:
+            started = time.monotonic()
+            assert asyncio.run(run(server.url)) == [200] * 5
+        assert time.monotonic() - started >= 0.35
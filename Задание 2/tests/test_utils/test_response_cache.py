@@ -0,0 +1,79 @@
+from utils.api_client import APIClient, extract_item_id
+from utils.metrics import MetricsRegistry
+from utils.response_cache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache:
+    item_id = "b55a1222-e2ce-490d-9bec-06210269671e"
+
+    def test_fresh_entries_share_one_fetch(self, stub_server):
+        registry = MetricsRegistry()
+        with APIClient(stub_server.url, hooks=[registry], cache=ResponseCache()) as client:
+            first = client.get_item(self.item_id)
+            second = client.get_item(self.item_id)
+            client.get_item("123abc")
+            client.get_item("123abc")
+
+        assert first is second
+        assert len(registry) == 3, "Ошибочные ответы не кешируются, успешный запрашивается один раз"
+
+    def test_stale_entry_revalidated_with_etag(self, stub_server):
+        clock = FakeClock()
+        cache = ResponseCache(ttls={"get_item": 10}, clock=clock)
+        registry = MetricsRegistry()
+        with APIClient(stub_server.url, hooks=[registry], cache=cache) as client:
+            first = client.get_item(self.item_id)
+            clock.now = 11
+            second = client.get_item(self.item_id)
+            third = client.get_item(self.item_id)
+
+        assert first is second is third
+        assert [record.status for record in registry.records] == [200, 304]
+        assert cache.revalidated == 1
+
+    def test_lru_bound(self):
+        cache = ResponseCache(max_entries=2)
+        for key in ("1", "2", "3"):
+            cache.store("get_item", key, object())
+        assert len(cache) == 2
+        assert cache.lookup("get_item", "1") == (None, False)
+
+    def test_post_invalidates_seller_list(self, stub_server):
+        with APIClient(stub_server.url, cache=ResponseCache()) as client:
+            assert client.get_seller_items(555666).json() == []
+
+            response = client.post_item({"name": "Телевизор", "price": 100, "sellerId": 555666})
+            item_id = extract_item_id(response.json()["status"])
+
+            assert [item["id"] for item in client.get_seller_items(555666).json()] == [item_id]
+
+    def test_with_cache_shares_session(self, stub_server):
+        with APIClient(stub_server.url) as client:
+            cached = client.with_cache(ResponseCache())
+            assert cached.session is client.session
+            assert client.cache is None
+
+    def test_post_through_plain_client_invalidates_copies(self, stub_server):
+        with APIClient(stub_server.url) as client:
+            cached = client.with_cache(ResponseCache())
+            assert cached.get_seller_items(555667).json() == []
+
+            client.post_item({"name": "Телевизор", "price": 100, "sellerId": 555667})
+            assert len(cached.get_seller_items(555667).json()) == 1
+
+    def test_get_started_before_invalidation_is_not_stored(self):
+        cache = ResponseCache()
+        generation = cache.generation
+        cache.invalidate("get_seller_items", "555668")  # POST завершился, пока GET был в пути
+        cache.store("get_seller_items", "555668", object(), generation)
+        assert len(cache) == 0
+        cache.store("get_seller_items", "555668", object(), cache.generation)
+        assert len(cache) == 1
@@ -0,0 +1,72 @@
+from utils.schemas import (ITEM, ITEM_LIST, ITEM_OR_LIST, JSON_LIST, POST_ITEM, POST_STATUS, SELLER_ITEM_LIST,
+                           STATISTICS_LIST)
+
+
+def valid_item(**overrides):
+    item = {
+        "createdAt": "2025-02-10 12:00:00.000000 +0300 +0300",
+        "id": "b55a1222-e2ce-490d-9bec-06210269671e",
+        "name": "Телевизор",
+        "price": 36500,
+        "sellerId": 999665,
+        "statistics": {"likes": 25, "viewCount": 25, "contacts": 9},
+    }
+    item.update(overrides)
+    return item
+
+
+class TestSchemas:
+    def test_valid_item(self):
+        assert ITEM.validate(valid_item()) == []
+        assert ITEM_LIST.validate([valid_item(), valid_item(price=10.5)]) == []
+
+    def test_item_or_list(self):
+        assert ITEM_OR_LIST.validate(valid_item()) == []
+        assert ITEM_OR_LIST.validate([valid_item()]) == []
+        assert [(v.kind, v.path) for v in ITEM_OR_LIST.validate(valid_item(extra=1))] == [("extra", "$")]
+        assert [v.kind for v in ITEM_OR_LIST.validate("не объект")] == ["object"]
+
+    def test_json_list(self):
+        assert JSON_LIST.validate([1, "два", {"три": 3}, True]) == []
+        assert [v.kind for v in JSON_LIST.validate({})] == ["object"]
+
+    def test_seller_item_list(self):
+        item = valid_item()
+        del item["statistics"]
+        assert SELLER_ITEM_LIST.validate([item]) == []
+        del item["name"]
+        assert [(v.kind, v.path) for v in SELLER_ITEM_LIST.validate([item])] == [("missing", "$[0]")]
+
+    def test_reports_every_violation(self):
+        item = valid_item(price="дешево", sellerId=True, extra=1, statistics={"likes": "10", "viewCount": 1})
+        del item["name"]
+
+        violations = ITEM_LIST.validate([valid_item(), item, "не объект"])
+        found = {(violation.kind, violation.path) for violation in violations}
+        assert found == {
+            ("missing", "$[1]"),
+            ("extra", "$[1]"),
+            ("type", "$[1].price"),
+            ("type", "$[1].sellerId"),
+            ("missing", "$[1].statistics"),
+            ("type", "$[1].statistics.likes"),
+            ("object", "$[2]"),
+        }
+
+    def test_violation_errors(self):
+        violations = ITEM.validate({"name": 1, "price": 1, "sellerId": 1})
+        errors = {type(violation.as_error()) for violation in violations}
+        assert errors == {KeyError, TypeError}
+
+    def test_statistics_list(self):
+        assert STATISTICS_LIST.validate([{"likes": 1, "viewCount": 2, "contacts": 3}]) == []
+        assert [v.kind for v in STATISTICS_LIST.validate({"likes": 1})] == ["object"]
+
+    def test_post_status(self):
+        assert POST_STATUS.validate({"status": "Сохранили объявление - b55a1222-e2ce-490d-9bec-06210269671e"}) == []
+        assert [v.kind for v in POST_STATUS.validate({"status": "Ошибка"})] == ["value"]
+
+    def test_post_item_seller_id_range(self):
+        assert POST_ITEM.validate({"sellerId": 111111}) == []
+        assert [(v.kind, v.path) for v in POST_ITEM.validate({"sellerId": 0})] == [("value", "$.sellerId")]
+        assert [v.kind for v in POST_ITEM.validate({"sellerId": True})] == ["type"]
@@ -0,0 +1,67 @@
+from utils.api_client import APIClient
+from utils.shadow_inventory import ShadowInventory, ShadowItem, expected_fields, item_hash
+
+
+class TestShadowInventory:
+    def test_expected_fields(self):
+        payload = {"sellerID": 1, "name": "Лампа", "price": 10}
+        assert expected_fields("post_item_on_payload", payload) == {"sellerId": 1, "name": "Лампа", "price": 10}
+        payload = {"sellerId": 1, "name": "Лампа", "statistics": {"likes": 2, "extra": 3}}
+        assert expected_fields("post_item", payload) == {"sellerId": 1, "name": "Лампа", "statistics": {"likes": 2}}
+        assert item_hash("a", {"price": 45000}) == item_hash("a", {"price": 45000.0})
+        assert item_hash("a", {"price": 45000}) != item_hash("b", {"price": 45000})
+
+    def test_incremental_check(self, stub_server, monkeypatch):
+        seller_id = 555000
+        inventory = ShadowInventory()
+        payloads = ({"name": f"Товар {i}", "price": i, "sellerId": seller_id, "statistics": {"likes": i}}
+                    for i in range(2000))
+        with APIClient(stub_server.url, inventory=inventory) as client:
+            result = client.post_items_bulk(payloads, concurrency=8)
+            assert set(result.created_ids) == inventory.seller_ids(seller_id)
+
+            diff = inventory.check_seller(client, seller_id)
+            assert diff.consistent and diff.checked == 2000
+            assert not inventory.sellers[seller_id].pending
+
+            # Следующая сверка хеширует только новое объявление, у остальных проверяет наличие
+            hashed = []
+            hash_of = ShadowItem.hash_of
+            monkeypatch.setattr(ShadowItem, "hash_of",
+                                lambda shadow, item: hashed.append(item) or hash_of(shadow, item))
+            client.post_item_on_payload(seller_id, "Ещё товар", 1)
+            assert len(inventory.sellers[seller_id].pending) == 1
+            diff = inventory.check_seller(client, seller_id)
+            assert diff.consistent and diff.checked == 2001
+            assert [item["name"] for item in hashed] == ["Ещё товар"]
+            assert not inventory.sellers[seller_id].pending
+
+    def test_detects_lost_duplicated_and_changed(self, stub_server):
+        seller_id = 555001
+        inventory = ShadowInventory()
+        with APIClient(stub_server.url, inventory=inventory) as client:
+            ids = [client.post_item({"name": f"Товар {i}", "price": 100, "sellerId": seller_id}).json()["status"][-36:]
+                   for i in range(4)]
+            assert inventory.wait_for_seller(client, seller_id).consistent
+
+            # Сервис теряет сверенное объявление и меняет цену у другого
+            store = stub_server.store
+            with store.lock:
+                del store.items_by_seller[seller_id][ids[0]]
+                store.items[ids[1]]["price"] = 1
+            # Поля сверенных раньше объявлений сравниваются только при full=True
+            assert inventory.check_seller(client, seller_id).missing == [ids[0]]
+            assert not inventory.check_seller(client, seller_id).changed
+            diff = inventory.check_seller(client, seller_id, full=True)
+            assert diff.missing == [ids[0]]
+            assert diff.changed == {ids[1]: ({"sellerId": seller_id, "name": "Товар 1", "price": 100},
+                                             {"sellerId": seller_id, "name": "Товар 1", "price": 1})}
+
+            items = client.get_seller_items(seller_id).json()
+        duplicated = inventory.check(seller_id, items + [item for item in items if item["id"] == ids[2]], full=True)
+        assert duplicated.duplicated == {ids[2]: 2}
+        assert len(duplicated.errors()) == 3
+        # ids сужает сверку до своих объявлений теста
+        assert inventory.check(seller_id, items, ids=[ids[3]]).consistent
+        # Объявления, созданные не через этот клиент, в сверке не участвуют
+        assert inventory.check(seller_id, items + [{"id": "чужое"}]).duplicated == {}
@@ -0,0 +1,56 @@
+import pytest
+
+from utils.soak import Sample, SoakReport, kendall_tau, process_stats, run_soak
+from utils.stub_server import StubServer
+
+
+def make_samples(values, metric):
+    base = {"elapsed_s": 0.0, "rss_mb": 40.0, "fds": 10, "sockets": 4, "threads": 1, "requests": 100,
+            "p95_ms": 10.0, "error_rate": 0.0}
+    return [Sample(**dict(base, elapsed_s=float(i), **{metric: value})) for i, value in enumerate(values)]
+
+
+class TestSoak:
+    def test_process_stats(self):
+        rss_mb, fds, sockets = process_stats()
+        assert rss_mb > 0
+        assert fds >= sockets >= 0
+
+    def test_kendall_tau(self):
+        assert kendall_tau([1, 2, 3, 4]) == 1
+        assert kendall_tau([4, 3, 2, 1]) == -1
+        assert kendall_tau([5, 5, 5, 5]) == 0
+
+    def test_growth_detection(self):
+        # Сокеты растут на один каждое окно - утечка соединений
+        leaking = SoakReport(make_samples([4 + i for i in range(10)], "sockets"))
+        assert leaking.leaks == ["sockets"]
+
+        # Шум RSS в пределах допуска и единичный всплеск задержки утечкой не считаются
+        noisy = SoakReport(make_samples([40.0, 41.5, 40.2, 41.0, 40.7, 41.2, 40.9, 41.1], "rss_mb"))
+        assert noisy.leaks == []
+        spike = SoakReport(make_samples([10, 10, 11, 10, 80, 10, 11, 10], "p95_ms"))
+        assert spike.leaks == []
+
+        drifting = SoakReport(make_samples([10, 11, 12, 14, 15, 17, 19, 21, 23], "p95_ms"))
+        assert drifting.leaks == ["p95_ms"]
+
+    def test_too_few_samples(self):
+        report = SoakReport(make_samples([1, 2, 3], "fds"))
+        assert report.trends == {} and report.leaks == []
+        assert "меньше трёх" in report.format()
+
+    @pytest.mark.parametrize("client", ["sync", "async"])
+    def test_run_soak_stays_bounded(self, client):
+        samples = []
+        # Свой сервис: его серверные сокеты живут в том же процессе и тоже попадают в замер
+        with StubServer() as server:
+            report = run_soak(server.url, duration=1.2, interval=0.2, concurrency=4, client=client, seed=1,
+                              on_sample=samples.append)
+
+        assert len(report.samples) == len(samples) >= 5
+        assert all(sample.requests > 0 and sample.error_rate == 0 for sample in report.samples)
+        # Пул переиспользует соединения: после прогрева число сокетов не растёт
+        after_warmup = report.samples[1:]
+        assert max(sample.sockets for sample in after_warmup) - min(sample.sockets for sample in after_warmup) <= 2
+        assert "fds" not in report.leaks and "sockets" not in report.leaks
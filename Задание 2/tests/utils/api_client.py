@@ -1,25 +1,269 @@
-import requests
+import copy
+import re
+import time
+import weakref
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from utils.json_stream import ItemStream
+from utils.metrics import RequestRecord
+from utils.rate_limit import THROTTLED_STATUSES, retry_after
+from utils.schemas import ITEM_ID_PATTERN
+
+ITEM_ID_RE = re.compile(ITEM_ID_PATTERN)
+
+
+def extract_item_id(status_text):
+    """ID объявления из статуса вида 'Сохранили объявление - <uuid>' или None"""
+    match = ITEM_ID_RE.search(status_text or "")
+    return match.group(0) if match else None
+
+
+def response_item_id(response):
+    """ID объявления из ответа на создание или None, если тело не JSON-объект со строковым status"""
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    status = body.get("status") if isinstance(body, dict) else None
+    return extract_item_id(status) if isinstance(status, str) else None
+
+
+class BulkPostResult:
+    """Итог пакетного создания: списки выровнены по порядку входных payload, id равен None при ошибке"""
+
+    def __init__(self, entries):
+        entries = sorted(entries)
+        self.ids = [entry[1] for entry in entries]
+        self.statuses = [entry[2] for entry in entries]
+        self.latencies = [entry[3] for entry in entries]
+        # (индекс payload, статус или имя исключения, описание)
+        self.failures = [(entry[0], entry[2], entry[4]) for entry in entries if entry[1] is None]
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def created_ids(self):
+        return [item_id for item_id in self.ids if item_id is not None]
 
 
 class APIClient:
-    def __init__(self, base_url):
+    def __init__(self, base_url, pool_connections=4, pool_maxsize=16, retries=3, backoff_factor=0.3,
+                 connect_timeout=3.05, read_timeout=10, hooks=None, cache=None, cassette=None, rate_limiter=None,
+                 http2=False, inventory=None):
         self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_maxsize = pool_maxsize
+        self.session = self._build_session(pool_connections, pool_maxsize, retries, backoff_factor, cassette,
+                                           respect_retry_after=rate_limiter is None, http2=http2)
+        # Каждый hook получает RequestRecord по завершении вызова, см. utils.metrics
+        self.hooks = list(hooks or [])
+        # Необязательный utils.response_cache.ResponseCache для GET-запросов
+        self.cache = cache
+        # Кеши этого клиента и всех его копий из with_cache: POST через любую из них сбрасывает все
+        self.caches = weakref.WeakSet([cache] if cache is not None else [])
+        # Необязательный utils.rate_limit.SharedRateLimiter: темп запросов и повтор после 429
+        self.rate_limiter = rate_limiter
+        # Необязательная utils.shadow_inventory.ShadowInventory: запоминает созданные объявления для сверки
+        self.inventory = inventory
+
+    @staticmethod
+    def _build_session(pool_connections, pool_maxsize, retries, backoff_factor, cassette=None,
+                       respect_retry_after=True, http2=False):
+        # requests и транспорт импортируются при создании первого клиента, а не при импорте модуля:
+        # APIClient импортируют conftest и модули тестов, а прогон с -k может не создать ни одного клиента
+        import requests
+        from urllib3.util.retry import Retry
+
+        from utils.transport import CassetteAdapter, HTTP2Adapter, TimedHTTPAdapter
+
+        # Повторяем запрос при обрыве соединения и 5xx. POST повторяется только при ошибке
+        # соединения (до отправки запроса), чтобы не создавать дубли объявлений.
+        # GET с 429 и Retry-After urllib3 повторяет сам; с лимитером 429 обрабатывает _request,
+        # чтобы пауза и снижение темпа стали общими для всех клиентов прогона.
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            raise_on_status=False,
+            respect_retry_after_header=respect_retry_after,
+        )
+        if cassette is not None:
+            # utils.cassette.Cassette: запись ответов или воспроизведение без сети
+            adapter = CassetteAdapter(cassette, pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                      max_retries=retry)
+        elif http2:
+            # Все параллельные запросы к хосту - потоки одного соединения, по http - h2c с откатом на HTTP/1.1
+            adapter = HTTP2Adapter(pool_maxsize=pool_maxsize, max_retries=retry)
+        else:
+            adapter = TimedHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"Connection": "keep-alive"})
+        return session
+
+    def with_cache(self, cache):
+        """Копия клиента с кешем GET-ответов поверх того же пула соединений"""
+        client = copy.copy(self)
+        client.cache = cache
+        if cache is not None:
+            self.caches.add(cache)
+        return client
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _request(self, endpoint, template, method, url, **kwargs):
+        limiter = self.rate_limiter
+        if limiter is None:
+            return self._send(endpoint, template, method, url, **kwargs)
+
+        attempt = 0
+        while True:
+            limiter.acquire(endpoint)
+            response = self._send(endpoint, template, method, url, **kwargs)
+            # 429 значит, что запрос не обработан, поэтому повторять можно и POST
+            if response.status_code not in THROTTLED_STATUSES or attempt >= limiter.max_retries:
+                limiter.record(endpoint, response.status_code)
+                return response
+            limiter.record(endpoint, response.status_code, retry_after(response, attempt))
+            response.close()
+            attempt += 1
+
+    def _send(self, endpoint, template, method, url, **kwargs):
+        if not self.hooks:
+            return self.session.request(method, url, timeout=self.timeout, **kwargs)
+
+        from utils.transport import start_timings
+
+        timings = start_timings()
+        started_at = time.time()
+        started = time.perf_counter()
+        response = None
+        try:
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            return response
+        finally:
+            finished = time.perf_counter()
+            headers_at = timings["headers_at"]
+            record = RequestRecord(
+                started_at=started_at,
+                endpoint=endpoint,
+                template=template,
+                method=method,
+                status=response.status_code if response is not None else 0,
+                dns=timings["dns"],
+                connect=timings["connect"],
+                tls=timings["tls"],
+                ttfb=headers_at - started if headers_at is not None else None,
+                total=finished - started,
+                request_bytes=len(response.request.body or b"") if response is not None else 0,
+                response_bytes=self._response_size(response, kwargs.get("stream", False)),
+            )
+            for hook in self.hooks:
+                hook(record)
+
+    def _get(self, endpoint, key, template, url, **kwargs):
+        if self.cache is None or kwargs.get("stream"):
+            return self._request(endpoint, template, "GET", url, **kwargs)
+
+        entry, fresh = self.cache.lookup(endpoint, key)
+        if fresh:
+            return entry.response
+        if entry is not None:
+            kwargs["headers"] = dict(kwargs.get("headers") or {}, **entry.validators())
+
+        generation = self.cache.generation
+        response = self._request(endpoint, template, "GET", url, **kwargs)
+        if entry is not None and response.status_code == 304:
+            self.cache.refresh(entry)
+            return entry.response
+        if response.status_code == 200:
+            self.cache.store(endpoint, key, response, generation)
+        return response
+
+    def _invalidate_seller(self, seller_id):
+        # Вызывается после ответа на POST: сброс до отправки оставлял окно, в которое параллельный GET
+        # успевал положить в кеш список без нового объявления
+        for cache in list(self.caches):
+            cache.invalidate("get_seller_items", str(seller_id))
+
+    @staticmethod
+    def _response_size(response, stream):
+        if response is None:
+            return 0
+        if stream:
+            # Тело потокового ответа ещё не прочитано, берём размер из заголовка
+            return int(response.headers.get("Content-Length") or 0)
+        return len(response.content)
 
     def get_item(self, item_id):
         url = f"{self.base_url}/api/1/item/{item_id}"
-        response = requests.get(url, headers={"Accept": "application/json"})
-        return response
+        return self._get("get_item", str(item_id), "/api/1/item/{id}", url, headers={"Accept": "application/json"})
 
-    def get_seller_items(self, seller_id):
+    def get_seller_items(self, seller_id, stream=False):
+        """При stream=True возвращает ItemStream, который отдаёт объявления по одному по мере чтения ответа"""
         url = f"{self.base_url}/api/1/{seller_id}/item"
-        response = requests.get(url, headers={"Accept": "application/json"})
-        return response
+        response = self._get("get_seller_items", str(seller_id), "/api/1/{sellerId}/item", url,
+                             headers={"Accept": "application/json"}, stream=stream)
+        return ItemStream(response) if stream else response
 
     def post_item(self, data):
         url = f"{self.base_url}/api/1/item"
-        response = requests.post(url, json=data)
+        try:
+            response = self._request("post_item", "/api/1/item", "POST", url, json=data)
+        finally:
+            # Даже при ошибке соединения сервис мог успеть создать объявление
+            if isinstance(data, dict):
+                self._invalidate_seller(data.get("sellerId", data.get("sellerID")))
+        if self.inventory is not None:
+            self.inventory.record("post_item", data, response)
         return response
 
+    def post_items_bulk(self, payloads, concurrency=16):
+        """Создаёт объявления параллельно поверх общего пула соединений.
+
+        payloads может быть генератором: в работе одновременно не больше concurrency запросов,
+        а concurrency ограничен размером пула, чтобы соединения не открывались заново.
+        """
+        import requests
+
+        concurrency = max(1, min(concurrency, self.pool_maxsize))
+        entries = []
+
+        def post(index, payload):
+            started = time.perf_counter()
+            try:
+                response = self.post_item(payload)
+            except requests.RequestException as e:
+                return index, None, type(e).__name__, time.perf_counter() - started, str(e)
+            latency = time.perf_counter() - started
+            item_id = None
+            if response.status_code in (200, 201):
+                item_id = response_item_id(response)
+            return index, item_id, response.status_code, latency, None if item_id else response.text
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending = set()
+            for index, payload in enumerate(payloads):
+                if len(pending) >= concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    entries.extend(future.result() for future in done)
+                pending.add(executor.submit(post, index, payload))
+            entries.extend(future.result() for future in wait(pending)[0])
+        return BulkPostResult(entries)
+
     def post_item_on_payload(self, seller_id, name, price):
         url = f"{self.base_url}/api/1/item"
         payload = {
@@ -27,10 +271,16 @@ class APIClient:
             "name": name,
             "price": price
         }
-        response = requests.post(url, json=payload, headers={"Content-Type": "application/json", "Accept": "application/json"})
+        try:
+            response = self._request("post_item_on_payload", "/api/1/item", "POST", url, json=payload,
+                                     headers={"Content-Type": "application/json", "Accept": "application/json"})
+        finally:
+            self._invalidate_seller(seller_id)
+        if self.inventory is not None:
+            self.inventory.record("post_item_on_payload", payload, response)
         return response
 
     def get_item_statistics(self, item_id):
         url = f"{self.base_url}/api/1/statistic/{item_id}"
-        response = requests.get(url, headers={"Accept": "application/json"})
-        return response
+        return self._get("get_item_statistics", str(item_id), "/api/1/statistic/{id}", url,
+                         headers={"Accept": "application/json"})
@@ -0,0 +1,12 @@
+import pytest
+
+
+def raise_errors(errors):
+    """Одна ошибка поднимается как есть, несколько - одним падением со всеми сообщениями"""
+    if not errors:
+        return
+    if len(errors) == 1:
+        error = errors[0]
+        raise error if isinstance(error, BaseException) else AssertionError(error)
+    error_message = "Обнаружены ошибки:" + " ".join(map(str, errors))
+    pytest.fail(error_message, pytrace=False)
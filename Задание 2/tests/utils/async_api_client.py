@@ -0,0 +1,95 @@
+import asyncio
+
+import httpx
+
+from utils.rate_limit import THROTTLED_STATUSES, retry_after
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """Запись ответов в utils.cassette.Cassette или воспроизведение из неё без сети"""
+
+    def __init__(self, cassette, transport):
+        self.cassette = cassette
+        self.transport = transport
+
+    async def handle_async_request(self, request):
+        body = await request.aread()
+        if self.cassette.recording:
+            response = await self.transport.handle_async_request(request)
+            content = await response.aread()
+            self.cassette.record(request.method, str(request.url), body, response.status_code,
+                                 dict(response.headers), content)
+            return httpx.Response(response.status_code, headers=response.headers, content=content)
+
+        status, headers, content = self.cassette.play(request.method, str(request.url), body)
+        return httpx.Response(status, headers=headers, content=content)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class AsyncAPIClient:
+    def __init__(self, base_url, concurrency=32, retries=3, connect_timeout=3.05, read_timeout=10, cassette=None,
+                 rate_limiter=None):
+        self.base_url = base_url
+        # Общий с синхронным клиентом utils.rate_limit.SharedRateLimiter; ждём через asyncio.sleep
+        self.rate_limiter = rate_limiter
+        # Ограничиваем число одновременных запросов, чтобы не заваливать сервис
+        self.semaphore = asyncio.Semaphore(concurrency)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        transport = httpx.AsyncHTTPTransport(limits=limits, retries=retries)
+        if cassette is not None:
+            transport = CassetteTransport(cassette, transport)
+        self.client = httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(read_timeout, connect=connect_timeout))
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def _request(self, endpoint, method, url, **kwargs):
+        limiter = self.rate_limiter
+        attempt = 0
+        while True:
+            if limiter is not None:
+                await asyncio.sleep(limiter.reserve(endpoint))
+            async with self.semaphore:
+                response = await self.client.request(method, url, **kwargs)
+            if limiter is None:
+                return response
+            if response.status_code not in THROTTLED_STATUSES or attempt >= limiter.max_retries:
+                limiter.record(endpoint, response.status_code)
+                return response
+            limiter.record(endpoint, response.status_code, retry_after(response, attempt))
+            await response.aclose()
+            attempt += 1
+
+    async def get_item(self, item_id):
+        url = f"{self.base_url}/api/1/item/{item_id}"
+        return await self._request("get_item", "GET", url, headers={"Accept": "application/json"})
+
+    async def get_seller_items(self, seller_id):
+        url = f"{self.base_url}/api/1/{seller_id}/item"
+        return await self._request("get_seller_items", "GET", url, headers={"Accept": "application/json"})
+
+    async def post_item(self, data):
+        url = f"{self.base_url}/api/1/item"
+        return await self._request("post_item", "POST", url, json=data)
+
+    async def post_item_on_payload(self, seller_id, name, price):
+        url = f"{self.base_url}/api/1/item"
+        payload = {
+            "sellerID": seller_id,
+            "name": name,
+            "price": price
+        }
+        return await self._request("post_item_on_payload", "POST", url, json=payload,
+                                   headers={"Content-Type": "application/json", "Accept": "application/json"})
+
+    async def get_item_statistics(self, item_id):
+        url = f"{self.base_url}/api/1/statistic/{item_id}"
+        return await self._request("get_item_statistics", "GET", url, headers={"Accept": "application/json"})
@@ -0,0 +1,182 @@
+"""Табличные тест-кейсы: строки таблицы в TESTCASES.md становятся параметризованными тестами.
+
+Таблица узнаётся по заголовку CASE_COLUMNS, каждая строка - один вызов метода APIClient:
+
+    | Кейс | Эндпоинт | Аргументы | Код | Схема | Ожидаемые поля |
+    | get_item-404 | get_item | ["00000000-0000-0000-0000-000000000000"] | 404 | - | - |
+
+Аргументы - JSON-список позиционных аргументов метода, "$seller_id" (в том числе внутри payload)
+подставляется sellerId воркера.
+Код - один или несколько через запятую. Схема - имя из utils.schemas, в квадратных скобках можно
+ограничить виды нарушений: ITEM_LIST[missing,object]. Ожидаемые поля - JSON-объект
+путь -> значение, путь вида $[0].statistics.likes; "$" - всё тело ответа.
+"""
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from utils import schemas
+
+CASE_COLUMNS = ("Кейс", "Эндпоинт", "Аргументы", "Код", "Схема", "Ожидаемые поля")
+READ_ENDPOINTS = ("get_item", "get_seller_items", "get_item_statistics")
+ENDPOINTS = READ_ENDPOINTS + ("post_item", "post_item_on_payload")
+SELLER_ID_PLACEHOLDER = "$seller_id"
+SCHEMA_RE = re.compile(r"^(\w+)(?:\[([\w,\s]+)\])?$")
+PATH_STEP_RE = re.compile(r"\.([^.\[\]]+)|\[(\d+)\]")
+EMPTY = ("", "-")
+
+
+class CaseError(ValueError):
+    pass
+
+
+class Case:
+    def __init__(self, case_id, endpoint, args, statuses, schema=None, kinds=None, fields=None, line=None):
+        self.id = case_id
+        self.endpoint = endpoint
+        self.args = args
+        self.statuses = statuses
+        self.schema = schema
+        # Какие виды нарушений схемы считаются ошибкой, None - все
+        self.kinds = kinds
+        self.fields = fields or {}
+        self.line = line
+
+    def __repr__(self):
+        return f"Case({self.id!r})"
+
+    def call(self, client, seller_id=None):
+        return getattr(client, self.endpoint)(*_substitute(self.args, seller_id))
+
+    def check(self, response):
+        """Список ошибок ответа: код, затем схема и ожидаемые поля"""
+        if response.status_code not in self.statuses:
+            expected = " или ".join(map(str, self.statuses))
+            return [AssertionError(f"Ожидался код {expected}, но получен {response.status_code}")]
+        if self.schema is None and not self.fields:
+            return []
+        try:
+            body = response.json()
+        except ValueError:
+            return [AssertionError(f"Ответ не JSON: {response.text[:200]}")]
+
+        errors = []
+        if self.schema is not None:
+            errors.extend(violation.as_error() for violation in self.schema.validate(body)
+                          if self.kinds is None or violation.kind in self.kinds)
+        for path, expected in self.fields.items():
+            try:
+                actual = resolve(body, path)
+            except (KeyError, IndexError, TypeError):
+                errors.append(KeyError(f"{path}: нет в ответе"))
+                continue
+            if actual != expected:
+                errors.append(AssertionError(f"{path}: ожидалось {expected!r}, а получено {actual!r}"))
+        return errors
+
+
+def _substitute(value, seller_id):
+    if value == SELLER_ID_PLACEHOLDER:
+        return seller_id
+    if isinstance(value, list):
+        return [_substitute(item, seller_id) for item in value]
+    if isinstance(value, dict):
+        return {key: _substitute(item, seller_id) for key, item in value.items()}
+    return value
+
+
+def resolve(body, path):
+    """Значение по пути вида $[0].statistics.likes"""
+    if not path.startswith("$"):
+        raise CaseError(f"Путь должен начинаться с $: {path}")
+    value = body
+    for key, index in PATH_STEP_RE.findall(path[1:]):
+        value = value[int(index)] if index else value[key]
+    return value
+
+
+def _parse_schema(cell, where):
+    if cell in EMPTY:
+        return None, None
+    match = SCHEMA_RE.match(cell)
+    schema = getattr(schemas, match.group(1), None) if match else None
+    if schema is None or not hasattr(schema, "validate"):
+        raise CaseError(f"{where}: неизвестная схема {cell!r}")
+    kinds = frozenset(kind.strip() for kind in match.group(2).split(",")) if match.group(2) else None
+    return schema, kinds
+
+
+def _parse_row(cells, where):
+    case_id, endpoint, args, statuses, schema, fields = cells
+    if endpoint not in ENDPOINTS:
+        raise CaseError(f"{where}: неизвестный эндпоинт {endpoint!r}")
+    try:
+        args = json.loads(args) if args not in EMPTY else []
+        fields = json.loads(fields) if fields not in EMPTY else {}
+        statuses = tuple(int(status) for status in statuses.split(","))
+    except ValueError as e:
+        raise CaseError(f"{where}: {e}") from None
+    if not isinstance(args, list) or not isinstance(fields, dict):
+        raise CaseError(f"{where}: аргументы - JSON-список, ожидаемые поля - JSON-объект")
+    return Case(case_id, endpoint, args, statuses, *_parse_schema(schema, where), fields, where)
+
+
+def parse_cases(text, source="<text>"):
+    """Все строки таблиц кейсов из markdown-текста в порядке появления"""
+    cases = []
+    in_table = False
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line.startswith("|"):
+            in_table = False
+            continue
+        cells = tuple(cell.strip() for cell in line.strip("|").split("|"))
+        if cells == CASE_COLUMNS:
+            in_table = True
+        elif in_table and not set("".join(cells)) <= set("-: "):
+            where = f"{source}:{number}"
+            if len(cells) != len(CASE_COLUMNS):
+                raise CaseError(f"{where}: ожидалось {len(CASE_COLUMNS)} колонок, получено {len(cells)}")
+            cases.append(_parse_row(cells, where))
+
+    seen = set()
+    for case in cases:
+        if case.id in seen:
+            raise CaseError(f"{case.line}: повтор кейса {case.id!r}")
+        seen.add(case.id)
+    return cases
+
+
+@lru_cache(maxsize=None)
+def load_cases(path):
+    """Разбирает файл один раз на процесс: сбор и запуск тестов берут один и тот же список"""
+    with open(path, encoding="utf-8") as f:
+        return tuple(parse_cases(f.read(), path))
+
+
+def run_cases(client, cases, seller_id=None, concurrency=16, read_client=None):
+    """Выполняет независимые кейсы параллельно, case.id -> ответ или исключение запроса.
+
+    GET-кейсы идут через read_client (например, с кешем ответов), если он задан; одинаковые GET-вызовы
+    выполняются один раз - параллельные промахи кеша не отправили бы их повторно.
+    """
+    read_client = read_client or client
+
+    def call(case):
+        try:
+            return case.call(read_client if case.endpoint in READ_ENDPOINTS else client, seller_id)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {}
+        keys = []
+        for case in cases:
+            key = case.id
+            if case.endpoint in READ_ENDPOINTS:
+                key = json.dumps([case.endpoint, _substitute(case.args, seller_id)], ensure_ascii=False)
+            if key not in futures:
+                futures[key] = executor.submit(call, case)
+            keys.append(key)
+        return {case.id: futures[key].result() for case, key in zip(cases, keys)}
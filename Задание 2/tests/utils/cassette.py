@@ -0,0 +1,128 @@
+"""Кассеты запись/воспроизведение ответов API для офлайн-прогонов.
+
+Формат файла: MAGIC, затем записи подряд. Запись - заголовок RECORD_HEADER (sha256 ключа запроса,
+статус, длины блоков) и два zlib-блока: JSON заголовков ответа и тело. Ключ запроса -
+метод + путь с query + тело, без схемы и хоста, поэтому кассета, записанная на локальном
+сервере, воспроизводится и для стенда, и наоборот.
+
+При воспроизведении файл отображается в память через mmap, индекс строится при первом
+обращении по заголовкам записей, а тела распаковываются только для отданных ответов.
+Одинаковые запросы (например, повторный POST того же payload) отдаются в порядке записи.
+"""
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from urllib.parse import urlsplit
+
+import requests
+
+MAGIC = b"APICAS1\n"
+RECORD_HEADER = struct.Struct("<32sHII")
+SKIPPED_HEADERS = {"connection", "keep-alive", "transfer-encoding", "content-encoding", "content-length"}
+
+
+class CassetteMiss(requests.ConnectionError):
+    """В кассете нет записи для запроса: в режиме воспроизведения сеть не используется"""
+
+
+def request_key(method, url, body):
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    digest = hashlib.sha256(f"{method.upper()} {path}\n".encode("utf-8"))
+    digest.update(body or b"")
+    return digest.digest()
+
+
+class Cassette:
+    def __init__(self, path, mode="replay"):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Неизвестный режим кассеты: {mode}")
+        self.path = path
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.file = None
+        self.mapped = None
+        self.index = None
+        self.played = {}
+
+    @staticmethod
+    def create(path):
+        """Создаёт пустую кассету, затирая старую запись"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+
+    @property
+    def recording(self):
+        return self.mode == "record"
+
+    def record(self, method, url, body, status, headers, content):
+        headers = {name: value for name, value in headers.items() if name.lower() not in SKIPPED_HEADERS}
+        packed_headers = zlib.compress(json.dumps(headers, ensure_ascii=False).encode("utf-8"))
+        packed_body = zlib.compress(content or b"")
+        record = RECORD_HEADER.pack(request_key(method, url, body), status, len(packed_headers), len(packed_body))
+
+        with self.lock:
+            if self.file is None:
+                if not os.path.exists(self.path):
+                    self.create(self.path)
+                self.file = open(self.path, "ab")
+            # Воркеры xdist пишут в одну кассету, запись целиком под межпроцессной блокировкой
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+            try:
+                self.file.write(record + packed_headers + packed_body)
+                self.file.flush()
+            finally:
+                fcntl.flock(self.file, fcntl.LOCK_UN)
+
+    def _load_index(self):
+        self.file = open(self.path, "rb")
+        self.mapped = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mapped[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} не является кассетой")
+
+        index = {}
+        offset = len(MAGIC)
+        size = len(self.mapped)
+        while offset + RECORD_HEADER.size <= size:
+            key, status, headers_length, body_length = RECORD_HEADER.unpack_from(self.mapped, offset)
+            data_offset = offset + RECORD_HEADER.size
+            index.setdefault(key, []).append((status, data_offset, headers_length, body_length))
+            offset = data_offset + headers_length + body_length
+        self.index = index
+
+    def play(self, method, url, body):
+        """Возвращает (status, headers, content) следующей записи для запроса"""
+        key = request_key(method, url, body)
+        with self.lock:
+            if self.index is None:
+                self._load_index()
+            entries = self.index.get(key)
+            if not entries:
+                raise CassetteMiss(f"В кассете {self.path} нет ответа на {method} {url}")
+            position = self.played.get(key, 0)
+            self.played[key] = position + 1
+            status, offset, headers_length, body_length = entries[min(position, len(entries) - 1)]
+            packed_headers = self.mapped[offset:offset + headers_length]
+            packed_body = self.mapped[offset + headers_length:offset + headers_length + body_length]
+
+        headers = json.loads(zlib.decompress(packed_headers).decode("utf-8"))
+        content = zlib.decompress(packed_body)
+        headers["Content-Length"] = str(len(content))
+        return status, headers, content
+
+    def close(self):
+        with self.lock:
+            if self.mapped is not None:
+                self.mapped.close()
+                self.mapped = None
+            if self.file is not None:
+                self.file.close()
+                self.file = None
@@ -0,0 +1,345 @@
+"""pytest-плагин с манифестом сбора: прогон с -k или -m не импортирует модули, где нечего выбрать.
+
+После сбора в манифест (--collection-cache, относительно rootdir) записывается для каждого
+модуля тестов mtime и размер файла, а для каждого теста - имена, по которым его ищут -k и -m.
+В следующем прогоне модуль, который не менялся и в котором выражению не соответствует ни один тест,
+пропускается целиком. Манифест сбрасывается, если изменился conftest, модуль из utils или pytest.ini:
+от них зависят id параметров. Свои данные модуль перечисляет в COLLECTION_DEPENDS:
+
+    COLLECTION_DEPENDS = [CASES_PATH]
+
+Если по манифесту выбрано не больше --inline-max тестов, -n auto запускает их без воркеров xdist:
+подъём воркеров дольше самого прогона.
+
+Выражения -k и -m разбираются здесь же, без внутренних модулей pytest: and, or, not, скобки и имена.
+Чего эта грамматика не знает (например, аргументов маркеров), то манифест не использует и собирает всё.
+"""
+import fnmatch
+import json
+import os
+import re
+import sys
+
+import pytest
+
+manifest_key = pytest.StashKey()
+selection_key = pytest.StashKey()
+
+MANIFEST_VERSION = 1
+# Символы имени в выражениях -k и -m, как у pytest
+EXPRESSION_TOKEN_RE = re.compile(r"\(|\)|[\w:+\-.\[\]\\/]+")
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("collection", "манифест сбора тестов")
+    group.addoption("--collection-cache", default=".collection_cache.json",
+                    help="файл манифеста сбора (относительно rootdir), пусто - собирать все модули")
+    group.addoption("--inline-max", type=int, default=10,
+                    help="при -n auto до стольких выбранных тестов выполнять без воркеров xdist")
+
+
+def file_stat(path):
+    """[mtime_ns, размер] или None, если файла нет"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _tokenize(text):
+    tokens = []
+    position = 0
+    while True:
+        while position < len(text) and text[position].isspace():
+            position += 1
+        if position == len(text):
+            return tokens
+        match = EXPRESSION_TOKEN_RE.match(text, position)
+        if match is None:
+            raise SyntaxError(f"неожиданный символ {text[position]!r} в выражении {text!r}")
+        tokens.append(match.group(0))
+        position = match.end()
+
+
+def compile_expression(text):
+    """Выражение -k или -m в функцию evaluate(matcher), где matcher(name) -> bool.
+    SyntaxError - если выражение не разобрано"""
+    tokens = _tokenize(text)
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take(expected=None):
+        nonlocal position
+        token = peek()
+        if token is None or expected is not None and token != expected:
+            raise SyntaxError(f"ожидалось {expected or 'имя'} на месте {token!r} в выражении {text!r}")
+        position += 1
+        return token
+
+    def parse_or():
+        terms = [parse_and()]
+        while peek() == "or":
+            take()
+            terms.append(parse_and())
+        return lambda matcher: any(term(matcher) for term in terms)
+
+    def parse_and():
+        terms = [parse_not()]
+        while peek() == "and":
+            take()
+            terms.append(parse_not())
+        return lambda matcher: all(term(matcher) for term in terms)
+
+    def parse_not():
+        token = take()
+        if token == "not":
+            inner = parse_not()
+            return lambda matcher: not inner(matcher)
+        if token == "(":
+            inner = parse_or()
+            take(")")
+            return inner
+        if token in ("and", "or", ")"):
+            raise SyntaxError(f"неожиданное {token!r} в выражении {text!r}")
+        return lambda matcher: matcher(token)
+
+    evaluate = parse_or()
+    if peek() is not None:
+        raise SyntaxError(f"лишнее {peek()!r} в выражении {text!r}")
+    return evaluate
+
+
+def item_keywords(item):
+    """Имена, по которым -k находит тест: узлы от модуля до теста, extra keywords, атрибуты функции и маркеры"""
+    directory = getattr(pytest, "Directory", ())
+    names = set()
+    for node in item.listchain():
+        if isinstance(node, pytest.Session) or isinstance(node, directory) and isinstance(node.parent, pytest.Session):
+            continue
+        names.add(node.name)
+    names.update(item.listextrakeywords())
+    function = getattr(item, "function", None)
+    if function is not None:
+        names.update(function.__dict__)
+    names.update(mark.name for mark in item.iter_markers())
+    return names
+
+
+class Selection:
+    """Выражения -k и -m одного прогона"""
+
+    def __init__(self, keyword="", markexpr=""):
+        self.keyword = self.markexpr = None
+        self.valid = bool(keyword.strip() or markexpr.strip())
+        # Синтаксическую ошибку в выражении покажет сам pytest, манифест в этом случае не используется
+        try:
+            if keyword.strip():
+                self.keyword = compile_expression(keyword)
+            if markexpr.strip():
+                self.markexpr = compile_expression(markexpr)
+        except SyntaxError:
+            self.keyword = self.markexpr = None
+            self.valid = False
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.option.keyword, config.option.markexpr)
+
+    def matches(self, entry):
+        """entry - запись теста из манифеста: {"keywords": [...], "markers": [...]}"""
+        if self.keyword is not None:
+            # Как у pytest: подстрока любого из имён без учёта регистра
+            keywords = [name.lower() for name in entry["keywords"]]
+            if not self.keyword(lambda name: any(name.lower() in keyword for keyword in keywords)):
+                return False
+        if self.markexpr is not None:
+            markers = set(entry["markers"])
+            return self.markexpr(lambda name: name in markers)
+        return True
+
+
+class CollectionManifest:
+    """Модули тестов с их тестами и файлы, от которых зависит сбор; пути относительно rootdir"""
+
+    def __init__(self, path, root, shared=None, modules=None):
+        self.path = path
+        self.root = root
+        self.shared = shared if shared is not None else {}
+        self.modules = modules if modules is not None else {}
+        self.changed = False
+        self._shared_fresh = None
+
+    @classmethod
+    def load(cls, path, root):
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+            except ValueError:
+                data = {}
+            if data.get("version") == MANIFEST_VERSION and data.get("pytest") == pytest.__version__:
+                return cls(path, root, data["shared"], data["modules"])
+        return cls(path, root)
+
+    def _abspath(self, relpath):
+        return os.path.join(self.root, relpath)
+
+    def _relpath(self, path):
+        return os.path.relpath(path, self.root)
+
+    def _unchanged(self, stats):
+        return all(file_stat(self._abspath(relpath)) == stat for relpath, stat in stats.items())
+
+    @property
+    def shared_fresh(self):
+        if self._shared_fresh is None:
+            self._shared_fresh = bool(self.shared) and self._unchanged(self.shared)
+        return self._shared_fresh
+
+    def entry(self, path):
+        """Записи тестов модуля или None, если модуль не записан или изменился он или его зависимости"""
+        module = self.modules.get(self._relpath(path))
+        if module is None or not self.shared_fresh:
+            return None
+        if file_stat(path) != module["stat"] or not self._unchanged(module["depends"]):
+            return None
+        return module["items"]
+
+    def skippable(self, path, selection):
+        items = self.entry(path)
+        return items is not None and not any(selection.matches(item) for item in items)
+
+    def predict(self, paths, selection):
+        """Сколько тестов выберут -k и -m среди модулей paths, None - если манифест знает не все модули"""
+        count = 0
+        for path in paths:
+            items = self.entry(path)
+            if items is None:
+                return None
+            count += sum(1 for item in items if selection.matches(item))
+        return count
+
+    def update(self, items, inipath=None):
+        """Записывает собранные тесты; модули, пропущенные по манифесту, остаются прежними"""
+        collected = {}
+        depends = {}
+        for item in items:
+            module = getattr(item, "module", None)
+            relpath = self._relpath(str(item.path))
+            if relpath not in collected:
+                paths = getattr(module, "COLLECTION_DEPENDS", ())
+                depends[relpath] = {self._relpath(os.path.abspath(p)): file_stat(p) for p in paths}
+                collected[relpath] = []
+            collected[relpath].append({
+                "keywords": sorted(item_keywords(item)),
+                "markers": sorted({mark.name for mark in item.iter_markers()}),
+            })
+
+        previous = (self.shared, self.modules)
+        shared, modules = previous if self.shared_fresh else ({}, {})
+        self.modules = {relpath: module for relpath, module in modules.items()
+                        if file_stat(self._abspath(relpath)) is not None}
+        for relpath, entries in collected.items():
+            self.modules[relpath] = {"stat": file_stat(self._abspath(relpath)), "depends": depends[relpath],
+                                     "items": entries}
+        self.shared = {**shared, **self._loaded_files([str(inipath)] if inipath else [])}
+        # Прогон с -k обычно собирает то же, что уже записано: файл тогда не переписывается
+        self.changed = (self.shared, self.modules) != previous
+        self._shared_fresh = None
+
+    def _loaded_files(self, extra=()):
+        """conftest, utils и прочие модули из rootdir, уже импортированные к концу сбора"""
+        files = {}
+        for module in list(sys.modules.values()):
+            filename = getattr(module, "__file__", None)
+            if not filename or "site-packages" in filename:
+                continue
+            relpath = self._relpath(os.path.abspath(filename))
+            if relpath.startswith(os.pardir) or relpath in self.modules:
+                continue
+            files[relpath] = file_stat(filename)
+        for path in extra:
+            files[self._relpath(path)] = file_stat(path)
+        return files
+
+    def save(self):
+        if not self.path or not self.changed:
+            return
+        data = {"version": MANIFEST_VERSION, "pytest": pytest.__version__,
+                "shared": self.shared, "modules": self.modules}
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, sort_keys=True)
+        # Воркеры xdist читают манифест одновременно с записью
+        os.replace(tmp_path, self.path)
+
+
+def _manifest(config):
+    manifest = config.stash.get(manifest_key, None)
+    if manifest is None:
+        path = config.getoption("--collection-cache")
+        path = os.path.join(str(config.rootpath), path) if path else None
+        manifest = CollectionManifest.load(path, str(config.rootpath))
+        config.stash[manifest_key] = manifest
+    return manifest
+
+
+def _selection(config):
+    selection = config.stash.get(selection_key, None)
+    if selection is None:
+        selection = config.stash[selection_key] = Selection.from_config(config)
+    return selection
+
+
+def _test_files(config):
+    """Модули тестов из аргументов запуска (по умолчанию - testpaths)"""
+    patterns = config.getini("python_files")
+    base = str(config.invocation_params.dir)
+    for arg in config.args:
+        path = os.path.join(base, arg.split("::")[0])
+        if os.path.isfile(path):
+            yield path
+            continue
+        for directory, dirnames, filenames in os.walk(path):
+            dirnames[:] = [name for name in dirnames if not name.startswith((".", "__"))]
+            for filename in filenames:
+                if any(fnmatch.fnmatch(filename, pattern) for pattern in patterns):
+                    yield os.path.join(directory, filename)
+
+
+def pytest_ignore_collect(collection_path, config):
+    if not collection_path.is_file():
+        return None
+    selection = _selection(config)
+    if selection.valid and _manifest(config).skippable(str(collection_path), selection):
+        return True
+    return None
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_auto_num_workers(config):
+    # Вызывается до pytest_configure: манифест читается здесь же
+    selection = _selection(config)
+    if not selection.valid:
+        return None
+    count = _manifest(config).predict(list(_test_files(config)), selection)
+    if count is not None and count <= config.getoption("--inline-max"):
+        return 0
+    return None
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(config, items):
+    # Записываются все собранные тесты до отбора -k и -m; воркеры xdist собирают одно и то же, пишет один
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput is not None and workerinput["workerid"] != "gw0":
+        return
+    # Из модулей, указанных с ::, и при --lf собирается только часть тестов
+    if any("::" in arg for arg in config.args) or config.getoption("lf", False):
+        return
+    manifest = _manifest(config)
+    manifest.update(items, config.inipath)
+    manifest.save()
@@ -0,0 +1,341 @@
+"""Распределённый нагрузочный прогон: координатор и агенты в отдельных процессах или на других машинах.
+
+Один процесс Python упирается в GIL на нескольких тысячах RPS, поэтому сценарий из
+utils.load_runner делится между агентами: каждый - отдельный процесс со своим APIClient
+и своей долей RPS. Агенты подключаются к координатору по TCP, обмен - JSON-строками:
+
+    агент -> hello {name, cores}      координатор -> assign {сценарий и доля нагрузки}
+    агент -> ready                    координатор -> start {at: общее время старта, time.time()}
+    агент -> result {скетчи, статусы} | error {message}
+
+Задержки возвращаются не выборками, а скетчами utils.metrics.LatencySketch: их размер не
+зависит от числа запросов, а слияние скетчей агентов даёт те же перцентили, что и один общий.
+Часы агентов на разных машинах должны быть синхронизированы (NTP), расхождение старта видно в отчёте.
+
+Примеры (из директории tests):
+    python -m utils.distributed_load coordinator --local --local-agents 4 --rps 2000 --duration 30
+    python -m utils.distributed_load coordinator --listen 0.0.0.0:7070 --agents 8 --base-url https://...
+    python -m utils.distributed_load agent --coordinator 10.0.0.1:7070
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from utils.api_client import APIClient
+from utils.load_runner import (DEFAULT_MIX, DEFAULT_SELLER_ID, build_scenario, check_mix, format_report, parse_mix,
+                               run_calls)
+from utils.metrics import LatencySketch, is_error_status
+from utils.soak import start_stub_process
+
+# Сколько ждать агентов и их ответов сверх длительности прогона, с
+CONNECT_TIMEOUT = 30.0
+RESULT_GRACE = 60.0
+
+
+class SketchResult:
+    """Аналог utils.load_runner.LoadResult, который хранит скетчи вместо списков задержек"""
+
+    def __init__(self, alpha=0.01):
+        self.alpha = alpha
+        self.lock = threading.Lock()
+        self.sketches = defaultdict(lambda: LatencySketch(self.alpha))
+        self.statuses = defaultdict(Counter)
+        self.elapsed = 0.0
+
+    def record(self, endpoint, status, latency):
+        with self.lock:
+            self.sketches[endpoint].add(latency)
+            self.statuses[endpoint][status] += 1
+
+    def merge(self, other):
+        for endpoint, sketch in other.sketches.items():
+            self.sketches[endpoint].merge(sketch)
+            self.statuses[endpoint].update(other.statuses[endpoint])
+        # Агенты стартуют одновременно, поэтому длительность общего прогона - самый долгий агент
+        self.elapsed = max(self.elapsed, other.elapsed)
+        return self
+
+    def summary(self):
+        endpoints = {}
+        total_sketch = LatencySketch(self.alpha)
+        total_statuses = Counter()
+        for endpoint, sketch in self.sketches.items():
+            total_sketch.merge(sketch)
+            total_statuses.update(self.statuses[endpoint])
+            endpoints[endpoint] = self._describe(sketch, self.statuses[endpoint])
+
+        total = self._describe(total_sketch, total_statuses)
+        total["throughput_rps"] = total["requests"] / self.elapsed if self.elapsed else 0.0
+        total["elapsed_s"] = self.elapsed
+        return {"total": total, "endpoints": endpoints}
+
+    @staticmethod
+    def _describe(sketch, statuses):
+        requests_count = sum(statuses.values())
+        errors = {str(status): count for status, count in statuses.items() if is_error_status(status)}
+        return {
+            "requests": requests_count,
+            "p50_ms": sketch.quantile(50) * 1000,
+            "p95_ms": sketch.quantile(95) * 1000,
+            "p99_ms": sketch.quantile(99) * 1000,
+            "error_rate": sum(errors.values()) / requests_count if requests_count else 0.0,
+            "errors_by_status": errors,
+        }
+
+    def as_dict(self):
+        # Статусы парами: ключи JSON-объекта стали бы строками, а 200 и "ConnectionError" различаются типом
+        return {"alpha": self.alpha, "elapsed": self.elapsed,
+                "sketches": {endpoint: sketch.as_dict() for endpoint, sketch in self.sketches.items()},
+                "statuses": {endpoint: list(counter.items()) for endpoint, counter in self.statuses.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        result = cls(data["alpha"])
+        result.elapsed = data["elapsed"]
+        for endpoint, sketch in data["sketches"].items():
+            result.sketches[endpoint] = LatencySketch.from_dict(sketch)
+        for endpoint, pairs in data["statuses"].items():
+            result.statuses[endpoint].update(dict(pairs))
+        return result
+
+
+def send_message(stream, message_type, **fields):
+    stream.write(json.dumps(dict(fields, type=message_type), ensure_ascii=False).encode("utf-8") + b"\n")
+    stream.flush()
+
+
+def read_message(stream, expected=None):
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("Соединение закрыто до ответа")
+    message = json.loads(line)
+    if message["type"] == "error":
+        raise RuntimeError(message["message"])
+    if expected and message["type"] != expected:
+        raise RuntimeError(f"Ожидалось сообщение {expected}, получено {message['type']}")
+    return message
+
+
+def parse_address(address):
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def run_agent(address, name=None, connect_timeout=CONNECT_TIMEOUT):
+    """Подключается к координатору, выполняет одно задание и возвращает свой SketchResult"""
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            sock = socket.create_connection(parse_address(address) if isinstance(address, str) else address)
+            break
+        except ConnectionRefusedError:
+            # Координатор мог ещё не начать слушать
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+    with sock, sock.makefile("rwb") as stream:
+        send_message(stream, "hello", name=name or f"{socket.gethostname()}:{os.getpid()}", cores=os.cpu_count())
+        try:
+            task = read_message(stream, "assign")
+            client = APIClient(task["base_url"], pool_maxsize=task["concurrency"], retries=0, http2=task["http2"])
+            with client:
+                check_mix(task["mix"])
+                calls = build_scenario(client, task["seller_id"])
+                send_message(stream, "ready")
+                start = read_message(stream, "start")
+
+                time.sleep(max(0.0, start["at"] - time.time()))
+                started_at = time.time()
+                result = run_calls(calls, task["mix"], task["concurrency"], task["rps"], task["duration"],
+                                   random.Random(task["seed"]), SketchResult(task["alpha"]))
+        except Exception as e:
+            send_message(stream, "error", message=f"{type(e).__name__}: {e}")
+            raise
+        send_message(stream, "result", result=result.as_dict(), start_skew=started_at - start["at"])
+        return result
+
+
+class AgentConnection:
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.stream = sock.makefile("rwb")
+        self.address = address
+        hello = read_message(self.stream, "hello")
+        self.name = hello["name"]
+        self.cores = hello["cores"]
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+
+class DistributedResult:
+    def __init__(self, merged, agents):
+        self.merged = merged
+        # (имя агента, ядра, summary агента, расхождение старта в секундах)
+        self.agents = agents
+
+    def summary(self):
+        summary = self.merged.summary()
+        summary["agents"] = [{"name": name, "cores": cores, "requests": agent["total"]["requests"],
+                              "throughput_rps": agent["total"]["throughput_rps"],
+                              "p99_ms": agent["total"]["p99_ms"], "start_skew_ms": skew * 1000}
+                             for name, cores, agent, skew in self.agents]
+        return summary
+
+
+class Coordinator:
+    """Принимает agents подключений, раздаёт им доли сценария, запускает одновременно и сливает результаты"""
+
+    def __init__(self, agents, host="127.0.0.1", port=0, accept_timeout=CONNECT_TIMEOUT):
+        self.expected = agents
+        self.server = socket.create_server((host, port))
+        self.server.settimeout(accept_timeout)
+        self.connections = []
+
+    @property
+    def address(self):
+        return self.server.getsockname()[:2]
+
+    def accept(self):
+        while len(self.connections) < self.expected:
+            try:
+                sock, address = self.server.accept()
+            except socket.timeout:
+                raise TimeoutError(f"Подключилось {len(self.connections)} агентов из {self.expected}") from None
+            sock.setblocking(True)
+            self.connections.append(AgentConnection(sock, address))
+
+    def run(self, base_url, mix=None, concurrency=8, rps=None, duration=10.0, seller_id=DEFAULT_SELLER_ID,
+            seed=None, http2=False, alpha=0.01, start_delay=1.0):
+        mix = mix or DEFAULT_MIX
+        check_mix(mix)
+        self.accept()
+        agents = len(self.connections)
+        for index, agent in enumerate(self.connections):
+            agent.sock.settimeout(duration + start_delay + RESULT_GRACE)
+            send_message(agent.stream, "assign", base_url=base_url, mix=mix, concurrency=concurrency,
+                         rps=rps / agents if rps else None, duration=duration, seller_id=seller_id,
+                         seed=None if seed is None else seed + index, http2=http2, alpha=alpha)
+        for agent in self.connections:
+            read_message(agent.stream, "ready")
+
+        # Старт по общим часам, а не по приходу сообщения: агенты начинают нагрузку одновременно
+        start_at = time.time() + start_delay
+        for agent in self.connections:
+            send_message(agent.stream, "start", at=start_at)
+
+        merged = SketchResult(alpha)
+        summaries = []
+        for agent in self.connections:
+            message = read_message(agent.stream, "result")
+            result = SketchResult.from_dict(message["result"])
+            merged.merge(result)
+            summaries.append((agent.name, agent.cores, result.summary(), message["start_skew"]))
+        return DistributedResult(merged, summaries)
+
+    def close(self):
+        for agent in self.connections:
+            agent.close()
+        self.server.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def start_local_agents(address, count):
+    """Агенты на этой машине отдельными процессами, по одному на ядро - в обход GIL"""
+    tests_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    host, port = address
+    return [subprocess.Popen([sys.executable, "-m", "utils.distributed_load", "agent",
+                              "--coordinator", f"{host}:{port}", "--name", f"local-{index}"], cwd=tests_dir,
+                             stdout=subprocess.DEVNULL)
+            for index in range(count)]
+
+
+def format_distributed_report(summary):
+    lines = [format_report(summary), "", f"{'agent':<24}{'cores':>6}{'requests':>10}{'RPS':>10}{'p99, ms':>10}"
+                                         f"{'skew, ms':>10}"]
+    for agent in summary["agents"]:
+        lines.append(f"{agent['name']:<24}{agent['cores']:>6}{agent['requests']:>10}{agent['throughput_rps']:>10.1f}"
+                     f"{agent['p99_ms']:>10.2f}{agent['start_skew_ms']:>10.2f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Распределённый нагрузочный прогон API объявлений")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    coordinator_parser = commands.add_parser("coordinator", help="раздать сценарий агентам и собрать отчёт")
+    coordinator_parser.add_argument("--listen", default="127.0.0.1:0", help="адрес для подключения агентов")
+    coordinator_parser.add_argument("--agents", type=int, default=0, help="сколько внешних агентов ждать")
+    coordinator_parser.add_argument("--local-agents", type=int, default=0,
+                             help="сколько агентов запустить на этой машине (обычно по числу ядер)")
+    coordinator_parser.add_argument("--base-url", default="https://qa-internship.avito.com")
+    coordinator_parser.add_argument("--local", action="store_true", help="поднять локальную замену сервиса отдельным процессом")
+    coordinator_parser.add_argument("--mix", default="get_item=70,get_seller_items=20,post_item=10")
+    coordinator_parser.add_argument("--concurrency", type=int, default=8, help="потоков на агента")
+    coordinator_parser.add_argument("--rps", type=float, default=None, help="общий целевой RPS, делится между агентами")
+    coordinator_parser.add_argument("--duration", type=float, default=10.0, help="длительность в секундах")
+    coordinator_parser.add_argument("--seller-id", type=int, default=DEFAULT_SELLER_ID)
+    coordinator_parser.add_argument("--seed", type=int, default=None)
+    coordinator_parser.add_argument("--http2", action="store_true")
+    coordinator_parser.add_argument("--json", dest="json_path", help="сохранить отчёт в JSON")
+
+    agent_parser = commands.add_parser("agent", help="подключиться к координатору и выполнить его задание")
+    agent_parser.add_argument("--coordinator", required=True, help="адрес координатора host:port")
+    agent_parser.add_argument("--name", default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "agent":
+        run_agent(args.coordinator, args.name)
+        return 0
+
+    agents = args.agents + args.local_agents
+    if not agents:
+        parser.error("нужен хотя бы один агент: --agents или --local-agents")
+    stub = None
+    base_url = args.base_url
+    if args.local:
+        stub, base_url = start_stub_process()
+
+    processes = []
+    host, port = parse_address(args.listen)
+    try:
+        with Coordinator(agents, host, port) as coordinator:
+            print(f"Координатор ждёт {agents} агентов на {coordinator.address[0]}:{coordinator.address[1]}",
+                  flush=True)
+            processes = start_local_agents(coordinator.address, args.local_agents)
+            result = coordinator.run(base_url, parse_mix(args.mix), args.concurrency, args.rps, args.duration,
+                                     args.seller_id, args.seed, args.http2)
+        for process in processes:
+            process.wait()
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        if stub is not None:
+            stub.terminate()
+            stub.wait()
+
+    summary = result.summary()
+    print(format_distributed_report(summary))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
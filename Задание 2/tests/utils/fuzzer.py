@@ -0,0 +1,287 @@
+"""Генеративный фаззинг POST /api/1/item поверх APIClient.
+
+Payload генерируются по схеме utils.schemas.POST_ITEM с упором на граничные значения и
+неверные типы. Ожидаемый ответ считает оракул expected_status, ответ сравнивается с ним,
+расхождения группируются по сигнатуре ответа и ужимаются до минимального воспроизведения.
+
+Пример (из директории tests):
+    python -m utils.fuzzer --local --cases 2000 --rate 100 --concurrency 8 --seed 1
+"""
+import argparse
+import json
+import random
+import re
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from utils.api_client import APIClient
+from utils.load_runner import Pacer
+from utils.schemas import ITEM_ID_PATTERN, POST_ITEM, POST_STATUS, IntRange, Schema
+
+INT_BOUNDARIES = [0, 1, -1, 111111, 999999, 2 ** 31 - 1, 2 ** 31, -2 ** 31, 2 ** 53, 2 ** 63 - 1, 2 ** 63, 10 ** 20]
+FLOAT_BOUNDARIES = [0.0, -0.0, 0.5, -1.5, 1e-9, 36500.99, 1e15, 1.7976931348623157e308]
+STRINGS = ["", " ", "Телевизор", "a" * 1000, "😀", "<script>alert(1)</script>", "null", "0", "\u0000", "ё" * 255]
+WRONG_TYPES = [None, True, False, "строка", "123", [], {}, [1], {"a": 1}, 1.5, 0]
+SIGNATURE_NOISE = re.compile(rf"{ITEM_ID_PATTERN}|-?\d+(\.\d+)?")
+
+
+def expected_status(endpoint, payload):
+    """Оракул: 200 для корректного payload, 400 для некорректного"""
+    if endpoint == "post_item_on_payload":
+        payload = {"sellerId": payload.get("sellerID"), "name": payload.get("name"), "price": payload.get("price")}
+    if POST_ITEM.validate(payload):
+        return 400
+    # Пустое объявление: ни имени, ни цены
+    if not payload.get("name") and payload.get("price") is None:
+        return 400
+    return 200
+
+
+def generate_value(spec, rng, invalid_rate):
+    if rng.random() < invalid_rate:
+        return rng.choice(WRONG_TYPES)
+    if isinstance(spec, Schema):
+        return generate_payload(spec, rng, invalid_rate)
+    if isinstance(spec, IntRange):
+        # Границы диапазона и соседние с ними значения, иначе - случайное из диапазона
+        boundaries = [spec.low - 1, spec.low, spec.high, spec.high + 1, 0, -1, 2 ** 63]
+        return rng.choice(boundaries) if rng.random() < 0.5 else rng.randint(spec.low, spec.high)
+    types = spec if isinstance(spec, tuple) else (spec,)
+    kind = rng.choice(types)
+    if kind is int:
+        return rng.choice(INT_BOUNDARIES) if rng.random() < 0.5 else rng.randint(-10 ** 6, 10 ** 6)
+    if kind is float:
+        return rng.choice(FLOAT_BOUNDARIES) if rng.random() < 0.5 else round(rng.uniform(-10 ** 6, 10 ** 6), 2)
+    if kind is str:
+        return rng.choice(STRINGS)
+    return None
+
+
+def generate_payload(schema, rng, invalid_rate=0.2):
+    payload = {}
+    for field, spec in schema.fields.items():
+        keep = 0.9 if field in schema.required else 0.8
+        if rng.random() < keep:
+            payload[field] = generate_value(spec, rng, invalid_rate)
+    if rng.random() < 0.05:
+        payload["unexpected"] = rng.choice(WRONG_TYPES)
+    return payload
+
+
+def as_call_payload(endpoint, payload):
+    """Для post_item_on_payload фаззим только поля, которые этот метод умеет отправить"""
+    if endpoint == "post_item_on_payload":
+        return {"sellerID": payload.get("sellerId"), "name": payload.get("name", ""), "price": payload.get("price")}
+    return payload
+
+
+def response_signature(endpoint, expected, status, body):
+    """Сигнатура для дедупликации: id и числа в теле ответа не различают ошибки между собой"""
+    normalized = SIGNATURE_NOISE.sub("#", body or "")[:200]
+    return endpoint, expected, status, normalized
+
+
+class Failure:
+    def __init__(self, signature, payload, status, body):
+        self.signature = signature
+        self.count = 1
+        self.payload = payload
+        self.minimal_payload = payload
+        self.status = status
+        self.body = body
+
+    def as_dict(self):
+        endpoint, expected, status, _ = self.signature
+        return {
+            "endpoint": endpoint,
+            "expected": expected,
+            "status": status,
+            "count": self.count,
+            "minimal_payload": self.minimal_payload,
+            "example_payload": self.payload,
+            "body": self.body[:500],
+        }
+
+
+class PayloadFuzzer:
+    def __init__(self, client, endpoint="post_item", seed=None, invalid_rate=0.2):
+        if endpoint not in ("post_item", "post_item_on_payload"):
+            raise ValueError(f"Фаззинг поддерживает только POST-эндпоинты, получен {endpoint}")
+        self.client = client
+        self.endpoint = endpoint
+        self.rng = random.Random(seed)
+        self.invalid_rate = invalid_rate
+
+    def send(self, payload):
+        """Отправляет payload и возвращает (status, body); исключение транспорта - это тоже ответ"""
+        try:
+            if self.endpoint == "post_item_on_payload":
+                response = self.client.post_item_on_payload(
+                    payload.get("sellerID"), payload.get("name"), payload.get("price"))
+            else:
+                response = self.client.post_item(payload)
+        except (requests.RequestException, ValueError) as e:
+            return type(e).__name__, str(e)
+        return response.status_code, response.text
+
+    def check(self, payload):
+        """None, если ответ совпал с оракулом, иначе (signature, status, body)"""
+        expected = expected_status(self.endpoint, payload)
+        status, body = self.send(payload)
+        ok = status in (200, 201) if expected == 200 else status == expected
+        if ok and expected == 200:
+            try:
+                ok = not POST_STATUS.validate(json.loads(body))
+            except ValueError:
+                ok = False
+        if ok:
+            return None
+        return response_signature(self.endpoint, expected, status, body), status, body
+
+    def shrink(self, payload, signature, max_steps=100):
+        """Жадно упрощает payload, пока расхождение воспроизводится с той же сигнатурой"""
+        steps = 0
+        improved = True
+        while improved and steps < max_steps:
+            improved = False
+            for candidate in shrink_candidates(payload):
+                steps += 1
+                result = self.check(candidate)
+                if result is not None and result[0] == signature:
+                    payload = candidate
+                    improved = True
+                    break
+                if steps >= max_steps:
+                    break
+        return payload
+
+    def run(self, cases=1000, rate=None, concurrency=8, shrink=True):
+        pacer = Pacer(rate)
+        statuses = Counter()
+        failures = {}
+        started = time.perf_counter()
+
+        def run_case(payload):
+            pacer.sleep_until(pacer.next_slot())
+            return payload, self.check(payload)
+
+        payloads = (as_call_payload(self.endpoint, generate_payload(POST_ITEM, self.rng, self.invalid_rate))
+                    for _ in range(cases))
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending = set()
+
+            def collect(done):
+                for future in done:
+                    payload, result = future.result()
+                    if result is None:
+                        statuses["ok"] += 1
+                        continue
+                    signature, status, body = result
+                    statuses[str(status)] += 1
+                    if signature in failures:
+                        failures[signature].count += 1
+                    else:
+                        failures[signature] = Failure(signature, payload, status, body)
+
+            for payload in payloads:
+                if len(pending) >= concurrency * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending.add(executor.submit(run_case, payload))
+            collect(wait(pending)[0])
+
+        if shrink:
+            for failure in failures.values():
+                failure.minimal_payload = self.shrink(failure.payload, failure.signature)
+
+        return {
+            "endpoint": self.endpoint,
+            "cases": cases,
+            "elapsed_s": time.perf_counter() - started,
+            "outcomes": dict(statuses),
+            "failures": [failure.as_dict() for failure in sorted(failures.values(), key=lambda f: -f.count)],
+        }
+
+
+def _simpler_values(value, spec=None):
+    if isinstance(spec, IntRange) and isinstance(value, int) and not isinstance(value, bool):
+        # Целое из диапазона упрощается до нижней границы, а не до 0, который сам по себе нарушение
+        return [spec.low] if spec.low <= value <= spec.high else [0, spec.low]
+    if isinstance(value, bool) or value is None or not value:
+        return []
+    if isinstance(value, int):
+        # Половина с округлением к нулю, чтобы отрицательные числа сходились к -1, а не застревали
+        return [0, 1, -1, value // 2 if value > 0 else -(-value // 2)]
+    if isinstance(value, float):
+        return [0, int(value)]
+    if isinstance(value, str):
+        return ["", value[:len(value) // 2]]
+    if isinstance(value, (list, dict)):
+        return [type(value)()]
+    return []
+
+
+def shrink_candidates(payload, schema=POST_ITEM):
+    """Кандидаты на упрощение: сначала удаление полей, потом упрощение значений, вглубь statistics"""
+    fields = schema.fields if isinstance(schema, Schema) else {}
+    for field in payload:
+        yield {key: value for key, value in payload.items() if key != field}
+    for field, value in payload.items():
+        for simpler in _simpler_values(value, fields.get(field)):
+            if simpler != value:
+                yield dict(payload, **{field: simpler})
+        if isinstance(value, dict):
+            for nested in shrink_candidates(value, fields.get(field)):
+                yield dict(payload, **{field: nested})
+
+
+def format_report(report):
+    lines = [f"{report['endpoint']}: {report['cases']} случаев за {report['elapsed_s']:.1f} с, исходы {report['outcomes']}"]
+    for failure in report["failures"]:
+        lines.append(f"  ожидался {failure['expected']}, получен {failure['status']} ({failure['count']} раз)")
+        lines.append(f"    минимальный payload: {json.dumps(failure['minimal_payload'], ensure_ascii=False)}")
+        lines.append(f"    ответ: {failure['body'][:200]}")
+    if not report["failures"]:
+        lines.append("  расхождений с оракулом не найдено")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Фаззинг POST /api/1/item")
+    parser.add_argument("--base-url", default="https://qa-internship.avito.com")
+    parser.add_argument("--local", action="store_true", help="поднять локальную замену сервиса и фаззить её")
+    parser.add_argument("--endpoint", choices=("post_item", "post_item_on_payload"), default="post_item")
+    parser.add_argument("--cases", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=50.0, help="запросов в секунду, чтобы не заваливать стенд")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--no-shrink", action="store_true")
+    parser.add_argument("--json", dest="json_path", help="сохранить отчёт в JSON")
+    args = parser.parse_args(argv)
+
+    server = None
+    base_url = args.base_url
+    if args.local:
+        from utils.stub_server import StubServer
+        server = StubServer().start()
+        base_url = server.url
+
+    try:
+        with APIClient(base_url, pool_maxsize=args.concurrency, retries=0) as client:
+            fuzzer = PayloadFuzzer(client, args.endpoint, args.seed)
+            report = fuzzer.run(args.cases, args.rate, args.concurrency, shrink=not args.no_shrink)
+    finally:
+        if server is not None:
+            server.stop()
+
+    print(format_report(report))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""pytest-плагин с историей прогонов: порядок тестов по истории и бюджеты на быстрый отказ.
+
+После каждого прогона длительность и исход каждого теста дописываются в файл истории
+(--history-file, отдельно для каждого стенда, как baseline в utils.latency_plugin).
+В следующем прогоне первыми идут недавно падавшие и новые тесты, за ними остальные от быстрых
+к медленным: если стенд сломан, дешёвые проверки валидации и уже падавшие тесты покажут это за секунды.
+
+--fail-budget N останавливает прогон после N падений (то же, что --maxfail, работает и с xdist),
+--time-budget S пропускает тесты, которые не успели начаться за S секунд от старта прогона.
+"""
+import json
+import os
+import statistics
+import time
+
+import pytest
+
+history_key = pytest.StashKey()
+started_at_key = pytest.StashKey()
+
+# Сколько последних прогонов хранится по каждому тесту
+HISTORY_LENGTH = 10
+STAGING_TARGET = "https://qa-internship.avito.com"
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("history", "история прогонов и быстрый отказ")
+    group.addoption("--history-file", default=".test_history.json",
+                    help="файл истории длительностей и исходов (относительно rootdir), пусто - не вести")
+    group.addoption("--no-smart-order", action="store_true",
+                    help="не переупорядочивать тесты по истории")
+    group.addoption("--fail-budget", type=int, default=None, help="остановить прогон после N падений")
+    group.addoption("--time-budget", type=float, default=None,
+                    help="не начинать новые тесты позже чем через столько секунд от старта прогона")
+
+
+class RunHistory:
+    """История одного стенда: nodeid -> {"durations": [...], "outcomes": [...]}, новые записи в конце"""
+
+    def __init__(self, path, target, runs=None):
+        self.path = path
+        self.target = target
+        self.runs = runs if runs is not None else {}
+        self.current = {}
+
+    @classmethod
+    def load(cls, path, target):
+        runs = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                runs = json.load(f).get(target, {})
+        return cls(path, target, runs)
+
+    def record(self, nodeid, outcome, duration):
+        """Складывает фазы теста: setup, call и teardown приходят отдельными отчётами"""
+        entry = self.current.setdefault(nodeid, {"outcome": "passed", "duration": 0.0})
+        entry["duration"] += duration
+        if outcome == "failed" or (outcome == "skipped" and entry["outcome"] == "passed"):
+            entry["outcome"] = outcome
+
+    def failure_rank(self, nodeid):
+        """0 - упал в прошлом прогоне, 1 - новый или падал недавно, 2 - стабильно проходит"""
+        runs = self.runs.get(nodeid)
+        if not runs:
+            return 1
+        outcomes = runs["outcomes"]
+        if outcomes[-1] == "failed":
+            return 0
+        return 1 if "failed" in outcomes else 2
+
+    def expected_duration(self, nodeid, default):
+        runs = self.runs.get(nodeid)
+        return statistics.median(runs["durations"]) if runs else default
+
+    def order(self, items):
+        """Недавно падавшие и новые тесты первыми, дальше от быстрых к медленным; порядок равных сохраняется"""
+        known = [statistics.median(runs["durations"]) for runs in self.runs.values() if runs["durations"]]
+        default = statistics.median(known) if known else 0.0
+        items.sort(key=lambda item: (self.failure_rank(item.nodeid), self.expected_duration(item.nodeid, default)))
+
+    def save(self):
+        if not self.path or not self.current:
+            return
+        data = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        runs = data.setdefault(self.target, {})
+        for nodeid, entry in self.current.items():
+            # Пропущенный тест ничего не говорит о длительности и стабильности
+            if entry["outcome"] == "skipped":
+                continue
+            previous = runs.setdefault(nodeid, {"durations": [], "outcomes": []})
+            previous["durations"] = (previous["durations"] + [round(entry["duration"], 4)])[-HISTORY_LENGTH:]
+            previous["outcomes"] = (previous["outcomes"] + [entry["outcome"]])[-HISTORY_LENGTH:]
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+
+def _history_path(config):
+    path = config.getoption("--history-file")
+    return os.path.join(str(config.rootpath), path) if path else None
+
+
+def _target(config):
+    # То же имя стенда, что у фикстуры api_target: она недоступна на этапе сбора тестов
+    return "local" if config.getoption("--local-api", False) else STAGING_TARGET
+
+
+def pytest_configure(config):
+    config.stash[history_key] = RunHistory.load(_history_path(config), _target(config))
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput is None:
+        config.pluginmanager.register(HistoryRecorder(config.stash[history_key]), "history-recorder")
+    # Воркеры xdist считают бюджет времени от старта контроллера
+    config.stash[started_at_key] = workerinput["history_started_at"] if workerinput else time.time()
+    fail_budget = config.getoption("--fail-budget")
+    if fail_budget and not config.option.maxfail:
+        # xdist сам останавливает воркеры по maxfail, его DSession читает опцию позже в своём pytest_configure
+        config.option.maxfail = fail_budget
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    node.workerinput["history_started_at"] = node.config.stash[started_at_key]
+
+
+def pytest_collection_modifyitems(config, items):
+    # Порядок должен совпасть на всех воркерах xdist: он строится из одного и того же файла истории
+    if not config.getoption("--no-smart-order"):
+        config.stash[history_key].order(items)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    budget = item.config.getoption("--time-budget")
+    if budget is not None and time.time() - item.config.stash[started_at_key] > budget:
+        pytest.skip(f"бюджет времени {budget} с исчерпан")
+
+
+class HistoryRecorder:
+    """Пишет исходы тестов в историю. Под xdist отчёты воркеров пересылаются контроллеру,
+    поэтому регистрируется только в нём"""
+
+    def __init__(self, history):
+        self.history = history
+
+    def pytest_runtest_logreport(self, report):
+        self.history.record(report.nodeid, report.outcome, report.duration)
+
+    def pytest_sessionfinish(self):
+        self.history.save()
@@ -0,0 +1,26 @@
+import hashlib
+import os
+import uuid
+
+from utils.schemas import SELLER_ID_RANGE
+
+
+def worker_index():
+    """Номер воркера pytest-xdist (gw0, gw1, ...), 0 при обычном запуске"""
+    worker = os.getenv("PYTEST_XDIST_WORKER", "gw0")
+    return int(worker[2:]) if worker.startswith("gw") else 0
+
+
+def allocate_seller_id(run_uid=None, index=None):
+    """Выдаёт воркеру sellerId, не пересекающийся с другими воркерами того же прогона.
+
+    Все воркеры одного прогона видят общий PYTEST_XDIST_TESTRUNUID, от него берётся
+    случайное смещение в диапазоне, а номер воркера гарантирует различие внутри прогона.
+    Явные run_uid и index дают воспроизводимый sellerId, например для кассет.
+    """
+    run_uid = run_uid or os.getenv("PYTEST_XDIST_TESTRUNUID") or uuid.uuid4().hex
+    index = worker_index() if index is None else index
+    low, high = SELLER_ID_RANGE
+    span = high - low + 1
+    offset = int(hashlib.sha1(run_uid.encode("utf-8")).hexdigest()[:8], 16) % span
+    return low + (offset + index) % span
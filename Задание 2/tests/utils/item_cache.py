@@ -0,0 +1,56 @@
+import hashlib
+import json
+import threading
+
+from utils.api_client import response_item_id
+
+
+def payload_fingerprint(endpoint, payload):
+    """Стабильный отпечаток payload: порядок ключей не важен"""
+    raw = json.dumps([endpoint, payload], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class CreatedItem:
+    def __init__(self, payload, response):
+        self.payload = payload
+        self.response = response
+        self.id = response_item_id(response)
+
+
+class CreatedItemCache:
+    """Создаёт объявление один раз на сессию для каждого уникального payload.
+
+    Тесты, которым нужен именно новый POST (например, проверка кода ответа на создание
+    под нагрузкой), передают fresh=True - такой результат в кеш не попадает. Ответ без id
+    объявления (4xx, 5xx) тоже не кешируется: следующий тест с тем же payload повторит POST.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.items = {}
+        self.lock = threading.Lock()
+        self.key_locks = {}
+
+    def _get_or_create(self, endpoint, payload, create, fresh):
+        if fresh:
+            return CreatedItem(payload, create())
+
+        key = payload_fingerprint(endpoint, payload)
+        with self.lock:
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key in self.items:
+                return self.items[key]
+            created = CreatedItem(payload, create())
+            if created.id is not None:
+                self.items[key] = created
+            return created
+
+    def post_item(self, data, fresh=False):
+        return self._get_or_create("post_item", data, lambda: self.client.post_item(data), fresh)
+
+    def post_item_on_payload(self, seller_id, name, price, fresh=False):
+        payload = {"sellerID": seller_id, "name": name, "price": price}
+        return self._get_or_create("post_item_on_payload", payload,
+                                   lambda: self.client.post_item_on_payload(seller_id, name, price), fresh)
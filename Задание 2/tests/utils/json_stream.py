@@ -0,0 +1,96 @@
+import codecs
+import json
+
+WHITESPACE = " \t\r\n"
+
+
+def iter_json_array(chunks):
+    """Отдаёт элементы JSON-массива по мере поступления байтов, не загружая весь ответ в память.
+
+    chunks - итератор байтовых кусков, например response.iter_content().
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    state = "start"  # start -> value -> separator -> ... -> end
+
+    def parse(final):
+        nonlocal buffer, state
+        pos = 0
+        size = len(buffer)
+        while True:
+            while pos < size and buffer[pos] in WHITESPACE:
+                pos += 1
+            if pos == size:
+                break
+            char = buffer[pos]
+            if state == "start":
+                if char != "[":
+                    raise ValueError(f"Ожидался JSON-массив, получено {buffer[pos:pos + 40]!r}")
+                pos += 1
+                state = "first"
+            elif state in ("first", "value"):
+                if char == "]" and state == "first":
+                    pos += 1
+                    state = "end"
+                    continue
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break
+                # Число на границе куска может быть обрезано, ждём следующий кусок
+                if end == size and not final:
+                    break
+                yield value
+                pos = end
+                state = "separator"
+            elif state == "separator":
+                if char == ",":
+                    state = "value"
+                elif char == "]":
+                    state = "end"
+                else:
+                    raise ValueError(f"Некорректный JSON-массив около {buffer[pos:pos + 40]!r}")
+                pos += 1
+            else:
+                raise ValueError(f"Лишние данные после JSON-массива: {buffer[pos:pos + 40]!r}")
+        buffer = buffer[pos:]
+
+    for chunk in chunks:
+        buffer += utf8.decode(chunk)
+        yield from parse(final=False)
+    buffer += utf8.decode(b"", final=True)
+    yield from parse(final=True)
+    if state != "end":
+        raise ValueError("JSON-массив оборвался до закрывающей скобки")
+
+
+class ItemStream:
+    """Потоковый ответ списка объявлений: статус доступен сразу, элементы читаются по мере итерации"""
+
+    def __init__(self, response, chunk_size=64 * 1024):
+        self.response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        try:
+            yield from iter_json_array(self.response.iter_content(self.chunk_size))
+        finally:
+            self.close()
+
+    def json(self):
+        """Весь ответ целиком, например тело ошибки при статусе не 200"""
+        return self.response.json()
+
+    def close(self):
+        self.response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
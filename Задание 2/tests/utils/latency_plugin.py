@@ -0,0 +1,158 @@
+"""pytest-плагин с бюджетами задержек и сравнением с сохранённым baseline.
+
+Тест объявляет бюджет маркером и прогоняет вызов через фикстуру latency_budget:
+
+    @pytest.mark.latency_budget(p95=300, repeat=20)
+    def test_get_item_latency(self, latency_budget, api_client, sample_item_id):
+        latency_budget(lambda: api_client.get_item(sample_item_id))
+
+Бюджеты задаются в миллисекундах (p50, p95, p99). Выборки хранятся в baseline-файле
+отдельно для каждого стенда (фикстура api_target); обновляются опцией --update-latency-baseline.
+
+Тесты с бюджетом пропускаются без --latency (или AVITO_LATENCY=1): они шлют на стенд десятки запросов,
+а параллельно с остальными тестами под xdist замер шумит. Мерить стоит с -n 0.
+"""
+import json
+import os
+import statistics
+import time
+from collections import Counter
+
+import pytest
+
+from utils.metrics import mann_whitney_greater, percentile
+
+latency_samples_key = pytest.StashKey()
+
+# Замедление считается регрессией, только если оно статистически значимо и заметно по медиане
+REGRESSION_P_VALUE = 0.01
+REGRESSION_MIN_SLOWDOWN = 0.10
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("latency", "бюджеты задержек")
+    group.addoption("--latency", action="store_true", default=os.getenv("AVITO_LATENCY") == "1",
+                    help="запускать тесты с бюджетами задержек, по умолчанию они пропускаются")
+    group.addoption("--latency-repeat", type=int, default=20, help="сколько раз повторять вызов по умолчанию")
+    group.addoption("--latency-baseline", default="latency_baseline.json",
+                    help="файл с baseline-выборками (относительно rootdir)")
+    group.addoption("--update-latency-baseline", action="store_true",
+                    help="записать выборки текущего прогона в baseline вместо сравнения")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "latency_budget(p50=None, p95=None, p99=None, repeat=None): бюджет задержки в мс")
+    config.stash[latency_samples_key] = {}
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--latency") or config.getoption("--update-latency-baseline"):
+        return
+    skip = pytest.mark.skip(reason="бюджет задержки проверяется только с --latency")
+    for item in items:
+        if item.get_closest_marker("latency_budget"):
+            item.add_marker(skip)
+
+
+def _baseline_path(config):
+    return os.path.join(str(config.rootpath), config.getoption("--latency-baseline"))
+
+
+def _load_baseline(config):
+    path = _baseline_path(config)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _check_status(response, errors):
+    """True, если ответ успешный; код ошибки (>= 400) считается в errors. Без status_code - успех"""
+    status = getattr(response, "status_code", None)
+    if status is not None and status >= 400:
+        errors[status] += 1
+        return False
+    return True
+
+
+class LatencyBudget:
+    def __init__(self, name, target, budgets, repeat, baseline_samples, results):
+        self.name = name
+        self.target = target
+        self.budgets = budgets
+        self.repeat = repeat
+        self.baseline_samples = baseline_samples
+        self.results = results
+
+    def __call__(self, call, repeat=None):
+        """call возвращает ответ: быстрые 4xx и 5xx в выборку не идут, а их наличие проваливает бюджет"""
+        errors = Counter()
+        _check_status(call(), errors)  # прогрев: соединение и кеши не должны попадать в выборку
+        samples = []
+        for _ in range(repeat or self.repeat):
+            started = time.perf_counter()
+            response = call()
+            elapsed = time.perf_counter() - started
+            if _check_status(response, errors):
+                samples.append(elapsed)
+        if errors:
+            statuses = ", ".join(f"{status} x{count}" for status, count in sorted(errors.items()))
+            pytest.fail(f"{self.name}: ответы с ошибкой ({statuses}) - задержка ошибок не измеряет бюджет",
+                        pytrace=False)
+        self.results.setdefault(self.target, {})[self.name] = samples
+
+        ordered = sorted(samples)
+        lines = [f"{self.name}: n={len(samples)} "
+                 + " ".join(f"p{q}={percentile(ordered, q) * 1000:.1f}мс" for q in (50, 95, 99))]
+        failures = []
+        for key, budget_ms in sorted(self.budgets.items()):
+            actual_ms = percentile(ordered, int(key[1:])) * 1000
+            if actual_ms > budget_ms:
+                failures.append(f"{key} = {actual_ms:.1f} мс превышает бюджет {budget_ms} мс")
+
+        if self.baseline_samples:
+            p_value = mann_whitney_greater(samples, self.baseline_samples)
+            baseline_median = statistics.median(self.baseline_samples)
+            slowdown = statistics.median(samples) / baseline_median - 1 if baseline_median else 0.0
+            lines.append(f"относительно baseline: медиана {slowdown:+.1%}, p-value={p_value:.4f}")
+            if p_value < REGRESSION_P_VALUE and slowdown > REGRESSION_MIN_SLOWDOWN:
+                failures.append(f"статистически значимое замедление относительно baseline на {slowdown:.1%}")
+
+        if failures:
+            pytest.fail("\n".join(["Нарушен бюджет задержки:"] + lines + failures), pytrace=False)
+        return samples
+
+
+@pytest.fixture
+def latency_budget(request, api_target):
+    config = request.config
+    marker = request.node.get_closest_marker("latency_budget")
+    budgets = {key: value for key, value in (marker.kwargs if marker else {}).items()
+               if key in ("p50", "p95", "p99") and value is not None}
+    repeat = (marker.kwargs.get("repeat") if marker else None) or config.getoption("--latency-repeat")
+
+    baseline_samples = None
+    if not config.getoption("--update-latency-baseline"):
+        baseline_samples = _load_baseline(config).get(api_target, {}).get(request.node.nodeid)
+    return LatencyBudget(request.node.nodeid, api_target, budgets, repeat, baseline_samples,
+                         config.stash[latency_samples_key])
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    results = config.stash[latency_samples_key]
+    if hasattr(config, "workeroutput"):
+        config.workeroutput["latency_samples"] = results
+    elif results and config.getoption("--update-latency-baseline"):
+        baseline = _load_baseline(config)
+        for target, samples in results.items():
+            baseline.setdefault(target, {}).update(samples)
+        with open(_baseline_path(config), "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=1, sort_keys=True)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    results = node.config.stash[latency_samples_key]
+    for target, samples in getattr(node, "workeroutput", {}).get("latency_samples", {}).items():
+        results.setdefault(target, {}).update(samples)
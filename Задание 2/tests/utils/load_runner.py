@@ -0,0 +1,227 @@
+"""Нагрузочный прогон эндпоинтов APIClient.
+
+Пример (из директории tests):
+    python -m utils.load_runner --local --mix get_item=70,get_seller_items=20,post_item=10 --rps 200 --duration 10
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+
+from utils.api_client import APIClient, response_item_id
+from utils.metrics import is_error_status, percentile
+
+DEFAULT_MIX = {"get_item": 70, "get_seller_items": 20, "post_item": 10}
+DEFAULT_SELLER_ID = 999665
+SCENARIO_ENDPOINTS = ("get_item", "get_seller_items", "post_item", "post_item_on_payload", "get_item_statistics")
+
+
+def parse_mix(mix):
+    """Разбирает строку вида 'get_item=70,post_item=30' в словарь весов"""
+    weights = {}
+    for part in mix.split(","):
+        endpoint, _, weight = part.partition("=")
+        weights[endpoint.strip()] = float(weight)
+    return weights
+
+
+def check_mix(mix, endpoints=SCENARIO_ENDPOINTS):
+    """Проверяет, что все эндпоинты mix есть в сценарии, - до того, как сценарий создаст объявление"""
+    unknown = set(mix) - set(endpoints)
+    if unknown:
+        raise ValueError(f"Неизвестные эндпоинты в сценарии: {sorted(unknown)}")
+
+
+def build_scenario(client, seller_id=DEFAULT_SELLER_ID, write_seller_id=None):
+    """Создаёт объявление для читающих эндпоинтов и возвращает вызовы по именам методов APIClient.
+
+    write_seller_id - продавец для POST-вызовов сценария, чтобы список seller_id не рос за прогон.
+    """
+    item_data = {
+        "name": "Нагрузочный товар",
+        "price": 1000,
+        "sellerId": seller_id,
+        "statistics": {"contacts": 1, "likes": 1, "viewCount": 1}
+    }
+    response = client.post_item(item_data)
+    item_id = response_item_id(response)
+    assert item_id, f"Не удалось создать объявление для нагрузки, ответ: {response.text}"
+    write_data = dict(item_data, sellerId=write_seller_id or seller_id)
+
+    return {
+        "get_item": lambda: client.get_item(item_id),
+        "get_seller_items": lambda: client.get_seller_items(seller_id),
+        "post_item": lambda: client.post_item(write_data),
+        "post_item_on_payload": lambda: client.post_item_on_payload(write_data["sellerId"], write_data["name"],
+                                                                    write_data["price"]),
+        "get_item_statistics": lambda: client.get_item_statistics(item_id),
+    }
+
+
+class Pacer:
+    """Общее для потоков равномерное расписание: n-й запрос уходит в started + n / rate.
+    Без rate запрос уходит сразу."""
+
+    def __init__(self, rate=None, started=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.started = time.perf_counter() if started is None else started
+        self.sent = 0
+        self.lock = threading.Lock()
+
+    def next_slot(self):
+        if not self.interval:
+            return time.perf_counter()
+        with self.lock:
+            slot = self.started + self.sent * self.interval
+            self.sent += 1
+        return slot
+
+    @staticmethod
+    def sleep_until(slot):
+        delay = slot - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class LoadResult:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.elapsed = 0.0
+
+    def record(self, endpoint, status, latency):
+        with self.lock:
+            self.latencies[endpoint].append(latency)
+            self.statuses[endpoint][status] += 1
+
+    def summary(self):
+        endpoints = {}
+        all_latencies = []
+        all_statuses = Counter()
+        for endpoint, latencies in self.latencies.items():
+            all_latencies.extend(latencies)
+            all_statuses.update(self.statuses[endpoint])
+            endpoints[endpoint] = self._describe(sorted(latencies), self.statuses[endpoint])
+
+        total = self._describe(sorted(all_latencies), all_statuses)
+        total["throughput_rps"] = total["requests"] / self.elapsed if self.elapsed else 0.0
+        total["elapsed_s"] = self.elapsed
+        return {"total": total, "endpoints": endpoints}
+
+    @staticmethod
+    def _describe(latencies, statuses):
+        requests_count = sum(statuses.values())
+        errors = {str(status): count for status, count in statuses.items() if is_error_status(status)}
+        return {
+            "requests": requests_count,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "error_rate": sum(errors.values()) / requests_count if requests_count else 0.0,
+            "errors_by_status": errors,
+        }
+
+
+def run_load(base_url, mix=None, concurrency=8, rps=None, duration=10.0, seller_id=DEFAULT_SELLER_ID, seed=None,
+             http2=False):
+    """Запускает нагрузку и возвращает LoadResult.
+
+    Без rps каждый из concurrency потоков шлёт запросы подряд (закрытая модель).
+    С rps запросы планируются по расписанию, а задержка считается от запланированного
+    момента отправки, чтобы очередь на клиенте не скрывала деградацию сервиса.
+    """
+    check_mix(mix or DEFAULT_MIX)
+    with APIClient(base_url, pool_maxsize=concurrency, retries=0, http2=http2) as client:
+        return run_calls(build_scenario(client, seller_id), mix, concurrency, rps, duration, random.Random(seed))
+
+
+def run_calls(calls, mix=None, concurrency=8, rps=None, duration=10.0, rng=None, result=None):
+    """Гоняет уже готовые вызовы из build_scenario; клиент переживает несколько прогонов, см. utils.soak.
+    result - куда складывать замеры, по умолчанию новый LoadResult"""
+    mix = mix or DEFAULT_MIX
+    endpoints = list(mix)
+    weights = [mix[endpoint] for endpoint in endpoints]
+    check_mix(mix, calls)
+    rng = rng or random.Random()
+    rng_lock = threading.Lock()
+
+    result = result if result is not None else LoadResult()
+    started = time.perf_counter()
+    deadline = started + duration
+    pacer = Pacer(rps, started)
+
+    def worker():
+        while True:
+            scheduled = pacer.next_slot()
+            if scheduled >= deadline:
+                return
+            pacer.sleep_until(scheduled)
+            with rng_lock:
+                endpoint = rng.choices(endpoints, weights)[0]
+            try:
+                status = calls[endpoint]().status_code
+            except Exception as e:
+                status = type(e).__name__
+            result.record(endpoint, status, time.perf_counter() - scheduled)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def format_report(summary):
+    lines = [f"{'endpoint':<22}{'requests':>10}{'p50, ms':>10}{'p95, ms':>10}{'p99, ms':>10}{'errors':>9}"]
+    rows = sorted(summary["endpoints"].items()) + [("TOTAL", summary["total"])]
+    for endpoint, stats in rows:
+        lines.append(f"{endpoint:<22}{stats['requests']:>10}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+                     f"{stats['p99_ms']:>10.2f}{stats['error_rate']:>9.2%}")
+    total = summary["total"]
+    lines.append(f"Пропускная способность: {total['throughput_rps']:.1f} RPS за {total['elapsed_s']:.1f} с")
+    if total["errors_by_status"]:
+        lines.append(f"Ошибки по статусам: {total['errors_by_status']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон API объявлений")
+    parser.add_argument("--base-url", default="https://qa-internship.avito.com")
+    parser.add_argument("--local", action="store_true", help="поднять локальную замену сервиса и грузить её")
+    parser.add_argument("--mix", default="get_item=70,get_seller_items=20,post_item=10")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rps", type=float, default=None, help="целевой RPS; без него - максимальный темп")
+    parser.add_argument("--duration", type=float, default=10.0, help="длительность в секундах")
+    parser.add_argument("--seller-id", type=int, default=DEFAULT_SELLER_ID)
+    parser.add_argument("--http2", action="store_true", help="HTTP/2: все запросы потоками одного соединения")
+    parser.add_argument("--json", dest="json_path", help="сохранить отчёт в JSON")
+    args = parser.parse_args(argv)
+
+    server = None
+    base_url = args.base_url
+    if args.local:
+        from utils.stub_server import StubServer
+        server = StubServer().start()
+        base_url = server.url
+
+    try:
+        result = run_load(base_url, parse_mix(args.mix), args.concurrency, args.rps, args.duration, args.seller_id,
+                          http2=args.http2)
+    finally:
+        if server is not None:
+            server.stop()
+
+    summary = result.summary()
+    print(format_report(summary))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
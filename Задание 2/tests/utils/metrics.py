@@ -0,0 +1,228 @@
+import bisect
+import csv
+import json
+import math
+import threading
+from collections import defaultdict
+
+# Границы корзин гистограммы задержек, мс
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def is_error_status(status):
+    """Общее для отчётов определение ошибки: ответа нет (0, None или имя исключения), 429 или 5xx.
+
+    Остальные 4xx - ответ сервиса на содержимое запроса: негативные тесты ждут их намеренно.
+    """
+    if not isinstance(status, int) or isinstance(status, bool) or not status:
+        return True
+    return status == 429 or status >= 500
+
+
+def percentile(sorted_values, q):
+    """Перцентиль по методу ближайшего ранга для уже отсортированного списка"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def mann_whitney_greater(current, baseline):
+    """p-value односторонней гипотезы «current медленнее baseline» (U-критерий Манна-Уитни,
+    нормальное приближение). Не требует нормальности задержек и устойчив к выбросам."""
+    n1, n2 = len(current), len(baseline)
+    if not n1 or not n2:
+        return 1.0
+
+    combined = sorted([(value, True) for value in current] + [(value, False) for value in baseline])
+    rank_sum = 0.0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        average_rank = (i + j) / 2 + 1
+        rank_sum += average_rank * sum(1 for k in range(i, j + 1) if combined[k][1])
+        i = j + 1
+
+    u = rank_sum - n1 * (n1 + 1) / 2
+    sigma = math.sqrt(n1 * n2 * (n1 + n2 + 1) / 12)
+    z = (u - n1 * n2 / 2 - 0.5) / sigma
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+class LatencySketch:
+    """Сливаемый скетч задержек с относительной точностью alpha (логарифмические корзины, как DDSketch).
+
+    Значение x попадает в корзину ceil(log_gamma(x)), gamma = (1 + alpha) / (1 - alpha). Перцентиль
+    отличается от точного не больше чем на alpha от его значения, размер не зависит от числа замеров,
+    а слияние - сложение счётчиков корзин, поэтому скетчи агентов можно объединять без сырых выборок.
+    """
+
+    def __init__(self, alpha=0.01):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.log_gamma = math.log(self.gamma)
+        self.bins = defaultdict(int)
+        # Нулевые и отрицательные значения логарифмом не покрываются
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        if value > 0:
+            self.bins[math.ceil(math.log(value) / self.log_gamma)] += 1
+        else:
+            self.zero_count += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        if other.alpha != self.alpha:
+            raise ValueError(f"Скетчи с разной точностью не сливаются: {self.alpha} и {other.alpha}")
+        for index, count in other.bins.items():
+            self.bins[index] += count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        """Перцентиль q (0-100) по тому же рангу, что и percentile()"""
+        if not self.count:
+            return 0.0
+        rank = min(max(math.ceil(q / 100 * self.count) - 1, 0), self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                # Середина корзины (gamma^(i-1), gamma^i] в смысле относительной ошибки
+                estimate = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def as_dict(self):
+        return {"alpha": self.alpha, "bins": sorted(self.bins.items()), "zero_count": self.zero_count,
+                "count": self.count, "total": self.total,
+                "min": self.min if self.count else None, "max": self.max if self.count else None}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["alpha"])
+        sketch.bins.update((int(index), count) for index, count in data["bins"])
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.total = data["total"]
+        if sketch.count:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        return sketch
+
+
+class RequestRecord:
+    """Замер одного вызова APIClient. Времена в секундах, status 0 - запрос не дошёл до ответа"""
+    FIELDS = ("started_at", "endpoint", "template", "method", "status", "dns", "connect", "tls", "ttfb", "total",
+              "request_bytes", "response_bytes")
+    __slots__ = FIELDS
+
+    def __init__(self, **values):
+        for field in self.FIELDS:
+            setattr(self, field, values.get(field))
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+class MetricsRegistry:
+    """Сборщик замеров за сессию; экземпляр подключается к APIClient как hook"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records = []
+
+    def __call__(self, record):
+        self.record(record)
+
+    def __len__(self):
+        return len(self.records)
+
+    def record(self, record):
+        with self.lock:
+            self.records.append(record)
+
+    def extend(self, rows):
+        """Добавляет замеры в виде словарей, например пришедшие от воркеров xdist"""
+        with self.lock:
+            self.records.extend(RequestRecord(**row) for row in rows)
+
+    def as_rows(self):
+        with self.lock:
+            return [record.as_dict() for record in self.records]
+
+    def by_endpoint(self):
+        grouped = defaultdict(list)
+        with self.lock:
+            for record in self.records:
+                grouped[record.endpoint].append(record)
+        return grouped
+
+    def summary(self):
+        summary = {}
+        for endpoint, records in sorted(self.by_endpoint().items()):
+            totals = sorted(record.total for record in records)
+            summary[endpoint] = {
+                "template": records[0].template,
+                "requests": len(records),
+                "errors": sum(1 for record in records if is_error_status(record.status)),
+                "p50_ms": percentile(totals, 50) * 1000,
+                "p95_ms": percentile(totals, 95) * 1000,
+                "p99_ms": percentile(totals, 99) * 1000,
+                "max_ms": totals[-1] * 1000,
+                "histogram_ms": histogram(totals),
+            }
+        return summary
+
+    def histogram_report(self):
+        lines = []
+        for endpoint, stats in self.summary().items():
+            lines.append(f"{endpoint} {stats['template']}: n={stats['requests']} p50={stats['p50_ms']:.1f} "
+                         f"p95={stats['p95_ms']:.1f} p99={stats['p99_ms']:.1f} max={stats['max_ms']:.1f} мс")
+            peak = max(stats["histogram_ms"].values())
+            for bucket, count in stats["histogram_ms"].items():
+                if count:
+                    lines.append(f"    {bucket:>12} | {'#' * max(1, round(count / peak * 40)):<40} {count}")
+        return "\n".join(lines)
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"summary": self.summary(), "records": self.as_rows()}, f, ensure_ascii=False, indent=2)
+
+    def write_csv(self, path):
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=RequestRecord.FIELDS)
+            writer.writeheader()
+            writer.writerows(self.as_rows())
+
+
+def histogram(latencies):
+    """Раскладывает задержки (в секундах) по корзинам HISTOGRAM_BOUNDS_MS"""
+    labels = []
+    lower = 0
+    for upper in HISTOGRAM_BOUNDS_MS:
+        labels.append(f"{lower}-{upper}")
+        lower = upper
+    labels.append(f">{lower}")
+
+    counts = dict.fromkeys(labels, 0)
+    for latency in latencies:
+        ms = latency * 1000
+        counts[labels[bisect.bisect_right(HISTOGRAM_BOUNDS_MS, ms)]] += 1
+    return counts
@@ -0,0 +1,89 @@
+"""pytest-плагин: собирает замеры APIClient за сессию и в конце прогона выводит отчёт.
+
+При запуске через pytest-xdist воркеры передают свои замеры контроллеру через workeroutput.
+Кроме JSON/CSV прогона замеры дописываются в колоночное хранилище <metrics-dir>/store
+(utils.metrics_store) для отчётов за недели и месяцы. Хранятся только последние --metrics-keep-runs
+прогонов и история за --metrics-retention.
+"""
+import glob
+import os
+import time
+
+import pytest
+
+from utils.metrics import MetricsRegistry
+from utils.metrics_store import MetricsStore, parse_duration
+
+metrics_registry_key = pytest.StashKey()
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--metrics-dir",
+        default=".api_metrics",
+        help="куда сохранять JSON/CSV с замерами запросов; пустая строка отключает запись файлов",
+    )
+    parser.addoption("--metrics-keep-runs", type=int, default=20,
+                     help="сколько последних run-*.json и .csv хранить, 0 - не удалять")
+    parser.addoption("--metrics-retention", default="90d",
+                     help="за сколько хранить историю в <metrics-dir>/store, например 30d; пусто - без ограничения")
+
+
+def pytest_configure(config):
+    config.stash[metrics_registry_key] = MetricsRegistry()
+
+
+def prune_runs(metrics_dir, keep):
+    """Оставляет keep последних прогонов: имена run-<время> сортируются по времени"""
+    paths = glob.glob(os.path.join(metrics_dir, "run-*.json"))
+    names = sorted(os.path.basename(path)[:-len(".json")] for path in paths)
+    removed = names[:-keep] if keep > 0 else []
+    for name in removed:
+        for extension in (".json", ".csv"):
+            path = os.path.join(metrics_dir, name + extension)
+            if os.path.exists(path):
+                os.remove(path)
+    return removed
+
+
+@pytest.fixture(scope="session")
+def metrics_registry(pytestconfig):
+    return pytestconfig.stash[metrics_registry_key]
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    if hasattr(config, "workeroutput"):
+        config.workeroutput["api_metrics"] = config.stash[metrics_registry_key].as_rows()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    rows = getattr(node, "workeroutput", {}).get("api_metrics")
+    if rows:
+        node.config.stash[metrics_registry_key].extend(rows)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    registry = config.stash[metrics_registry_key]
+    if not len(registry):
+        return
+
+    terminalreporter.write_sep("=", "API latency")
+    terminalreporter.write_line(registry.histogram_report())
+
+    metrics_dir = config.getoption("--metrics-dir")
+    if metrics_dir:
+        metrics_dir = os.path.join(str(config.rootpath), metrics_dir)
+        os.makedirs(metrics_dir, exist_ok=True)
+        name = time.strftime("run-%Y%m%d-%H%M%S")
+        registry.write_json(os.path.join(metrics_dir, f"{name}.json"))
+        registry.write_csv(os.path.join(metrics_dir, f"{name}.csv"))
+        store = MetricsStore(os.path.join(metrics_dir, "store"))
+        store.append(registry.records)
+        prune_runs(metrics_dir, config.getoption("--metrics-keep-runs"))
+        retention = config.getoption("--metrics-retention")
+        if retention:
+            store.prune(time.time() - parse_duration(retention))
+        terminalreporter.write_line(f"Замеры запросов сохранены в {metrics_dir}/{name}.json и .csv, "
+                                    f"история - в {metrics_dir}/store")
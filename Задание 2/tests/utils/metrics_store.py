@@ -0,0 +1,333 @@
+"""Колоночное хранилище замеров запросов и отчёты по нему.
+
+Каждая колонка RequestRecord лежит в своём файле с типизированными значениями фиксированной
+ширины (array.array). Файлы разбиты на партиции по суткам UTC и номеру эндпоинта:
+<store>/<YYYY-MM-DD>/<endpoint_id>.<column>, имена эндпоинтов - в endpoints.json. Запись только
+дописывает в конец, чтение - один frombytes на колонку без разбора JSON, поэтому месяц истории
+загружается за доли секунды, а отчёт по эндпоинту или периоду не читает чужие партиции.
+
+Пример (из директории tests):
+    python -m utils.metrics_store --store ../../.api_metrics/store report --since 7d --window 1h
+    python -m utils.metrics_store --store ../../.api_metrics/store import ../../.api_metrics/run-*.json
+"""
+import argparse
+import bisect
+import fcntl
+import json
+import math
+import operator
+import os
+import re
+import shutil
+import time
+from array import array
+from collections import defaultdict
+from datetime import datetime, timezone
+from itertools import compress, islice
+
+from utils.metrics import is_error_status, percentile
+
+# Колонка -> typecode array: время старта как float64, задержки в секундах как float32.
+# Номер эндпоинта - ключ партиции, отдельной колонкой не хранится
+COLUMNS = (
+    ("started_at", "d"),
+    ("status", "H"),
+    ("dns", "f"),
+    ("connect", "f"),
+    ("tls", "f"),
+    ("ttfb", "f"),
+    ("total", "f"),
+    ("request_bytes", "I"),
+    ("response_bytes", "I"),
+)
+DAY_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+PARTITION_RE = re.compile(r"^(\d+)\.started_at$")
+DURATION_RE = re.compile(r"^(\d+(?:\.\d+)?)([smhd])$")
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(text):
+    """'30s', '15m', '1h', '7d' -> секунды"""
+    match = DURATION_RE.match(text.strip())
+    if not match:
+        raise ValueError(f"Не удалось разобрать длительность {text!r}, ожидается например 15m или 7d")
+    return float(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+
+def _day(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _empty_columns():
+    return {column: array(typecode) for column, typecode in COLUMNS}
+
+
+class Frame:
+    """Загруженные замеры: номер эндпоинта -> колонки array.array одинаковой длины"""
+
+    def __init__(self, partitions, endpoints):
+        self.partitions = partitions
+        # (endpoint, template, method) по номеру эндпоинта
+        self.endpoints = endpoints
+
+    def __len__(self):
+        return sum(len(columns["started_at"]) for columns in self.partitions.values())
+
+    def endpoint(self, name):
+        """Колонки одного эндпоинта, пустые, если замеров нет"""
+        merged = _empty_columns()
+        for endpoint_id, columns in self.partitions.items():
+            if self.endpoints[endpoint_id][0] == name:
+                for column, values in columns.items():
+                    merged[column].extend(values)
+        return merged
+
+
+class MetricsStore:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.endpoints_path = os.path.join(path, "endpoints.json")
+
+    def _load_endpoints(self):
+        if not os.path.exists(self.endpoints_path):
+            return []
+        with open(self.endpoints_path, encoding="utf-8") as f:
+            return [tuple(entry) for entry in json.load(f)]
+
+    def _column_path(self, day, endpoint_id, column):
+        return os.path.join(self.path, day, f"{endpoint_id}.{column}")
+
+    def _trim_partition(self, day, endpoint_id):
+        """Обрезает колонки партиции до числа полных строк, общего для всех колонок.
+
+        Вызывается под блокировкой записи: без этого новая пачка легла бы сразу за оборванной
+        записью упавшего писателя, и все следующие значения колонки сместились бы.
+        """
+        sizes = {}
+        for column, typecode in COLUMNS:
+            path = self._column_path(day, endpoint_id, column)
+            sizes[column] = (os.path.getsize(path) if os.path.exists(path) else 0, array(typecode).itemsize)
+        rows = min(size // itemsize for size, itemsize in sizes.values())
+        for column, (size, itemsize) in sizes.items():
+            if size > rows * itemsize:
+                os.truncate(self._column_path(day, endpoint_id, column), rows * itemsize)
+
+    def append(self, records):
+        """Дописывает RequestRecord или словари с теми же полями; возвращает число записанных"""
+        rows = [record if isinstance(record, dict) else record.as_dict() for record in records]
+        if not rows:
+            return 0
+        # Отсортированные по времени партиции отчёт режет на окна бинарным поиском
+        rows.sort(key=lambda row: row["started_at"])
+
+        with open(os.path.join(self.path, ".lock"), "w") as lock:
+            # Один писатель за раз: справочник эндпоинтов и колонки партиции должны остаться согласованы
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            endpoints = self._load_endpoints()
+            ids = {entry: index for index, entry in enumerate(endpoints)}
+
+            partitions = defaultdict(_empty_columns)
+            for row in rows:
+                key = (row["endpoint"], row["template"], row["method"])
+                if key not in ids:
+                    ids[key] = len(endpoints)
+                    endpoints.append(key)
+                columns = partitions[(_day(row["started_at"]), ids[key])]
+                columns["started_at"].append(row["started_at"])
+                columns["status"].append(row["status"] or 0)
+                for column in ("dns", "connect", "tls", "ttfb", "total"):
+                    value = row[column]
+                    columns[column].append(math.nan if value is None else value)
+                columns["request_bytes"].append(row["request_bytes"] or 0)
+                columns["response_bytes"].append(row["response_bytes"] or 0)
+
+            with open(self.endpoints_path, "w", encoding="utf-8") as f:
+                json.dump(endpoints, f, ensure_ascii=False)
+            for (day, endpoint_id), columns in partitions.items():
+                os.makedirs(os.path.join(self.path, day), exist_ok=True)
+                self._trim_partition(day, endpoint_id)
+                for column, values in columns.items():
+                    with open(self._column_path(day, endpoint_id, column), "ab") as f:
+                        values.tofile(f)
+        return len(rows)
+
+    def prune(self, before):
+        """Удаляет партиции за сутки раньше before (timestamp) и возвращает их даты"""
+        with open(os.path.join(self.path, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            days = [day for day in self.days() if day < _day(before)]
+            for day in days:
+                shutil.rmtree(os.path.join(self.path, day))
+        return days
+
+    def days(self, since=None, until=None):
+        days = sorted(name for name in os.listdir(self.path) if DAY_RE.match(name))
+        if since is not None:
+            days = [day for day in days if day >= _day(since)]
+        if until is not None:
+            days = [day for day in days if day <= _day(until)]
+        return days
+
+    def _read_partition(self, day, endpoint_id):
+        partition = {}
+        for column, typecode in COLUMNS:
+            values = array(typecode)
+            with open(self._column_path(day, endpoint_id, column), "rb") as f:
+                data = f.read()
+            # Оборванная запись (упавший писатель) оставляет неполный хвост - отбрасываем его
+            values.frombytes(data[:len(data) - len(data) % values.itemsize])
+            partition[column] = values
+        rows = min(len(values) for values in partition.values())
+        if any(len(values) > rows for values in partition.values()):
+            partition = {column: values[:rows] for column, values in partition.items()}
+        return partition
+
+    def load(self, since=None, until=None, endpoint=None):
+        """Замеры за период [since, until) (unix time), при endpoint - только его партиции"""
+        endpoints = self._load_endpoints()
+        wanted = {index for index, entry in enumerate(endpoints) if endpoint is None or entry[0] == endpoint}
+        low = since if since is not None else -math.inf
+        high = until if until is not None else math.inf
+        boundary_days = {_day(value) for value in (since, until) if value is not None}
+
+        partitions = defaultdict(_empty_columns)
+        for day in self.days(since, until):
+            for match in map(PARTITION_RE.match, sorted(os.listdir(os.path.join(self.path, day)))):
+                if not match or int(match.group(1)) not in wanted:
+                    continue
+                endpoint_id = int(match.group(1))
+                partition = self._read_partition(day, endpoint_id)
+                # Фильтр по времени нужен только в крайних сутках периода, остальные берутся целиком
+                if day in boundary_days:
+                    mask = [low <= value < high for value in partition["started_at"]]
+                    partition = {column: array(values.typecode, compress(values, mask))
+                                 for column, values in partition.items()}
+                for column, values in partition.items():
+                    partitions[endpoint_id][column].extend(values)
+        return Frame(dict(partitions), endpoints)
+
+
+def _windows(timestamps, window):
+    """(начало окна, begin, end) по отсортированным меткам времени; без window - одно окно на всё"""
+    if not timestamps:
+        return
+    if not window:
+        yield timestamps[0], 0, len(timestamps)
+        return
+    begin = 0
+    while begin < len(timestamps):
+        window_start = timestamps[begin] // window * window
+        end = bisect.bisect_left(timestamps, window_start + window, begin)
+        yield window_start, begin, end
+        begin = end
+
+
+def report(frame, window=None, endpoint=None):
+    """Строки отчёта: окно, эндпоинт, число запросов, p50/p95/p99 в мс, доля ошибок.
+
+    Без window - одно окно на весь период. Ошибка - по utils.metrics.is_error_status.
+    Загрузка идёт через frombytes, а отчёт - обычный Python: маска ошибок строится вызовом
+    is_error_status на каждый статус, перцентили - сортировкой среза окна; векторных операций здесь нет.
+    """
+    rows = []
+    for endpoint_id, columns in sorted(frame.partitions.items()):
+        name, template, _ = frame.endpoints[endpoint_id]
+        if endpoint is not None and name != endpoint:
+            continue
+        timestamps, totals = columns["started_at"], columns["total"]
+        failed = bytes(map(is_error_status, columns["status"]))
+        # Запись сортирует каждую пачку по времени, так что несортированная партиция - редкость
+        # (например, два прогона писали одновременно); тогда упорядочиваем выборку целиком
+        if not all(map(operator.le, timestamps, islice(timestamps, 1, None))):
+            order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+            timestamps = array("d", map(timestamps.__getitem__, order))
+            totals = array("f", map(totals.__getitem__, order))
+            failed = bytes(map(failed.__getitem__, order))
+
+        for window_start, begin, end in _windows(timestamps, window):
+            latencies = sorted(totals[begin:end])
+            rows.append({
+                "window_start": window_start,
+                "endpoint": name,
+                "template": template,
+                "requests": end - begin,
+                "p50_ms": percentile(latencies, 50) * 1000,
+                "p95_ms": percentile(latencies, 95) * 1000,
+                "p99_ms": percentile(latencies, 99) * 1000,
+                "error_rate": failed.count(1, begin, end) / (end - begin),
+            })
+    rows.sort(key=lambda row: (row["window_start"], row["endpoint"]))
+    return rows
+
+
+def trends(rows):
+    """Изменение p95 и доли ошибок между первым и последним окном по каждому эндпоинту"""
+    by_endpoint = defaultdict(list)
+    for row in rows:
+        by_endpoint[row["endpoint"]].append(row)
+    result = {}
+    for endpoint, windows in by_endpoint.items():
+        first, last = windows[0], windows[-1]
+        result[endpoint] = {
+            "windows": len(windows),
+            "p95_change": last["p95_ms"] / first["p95_ms"] - 1 if first["p95_ms"] else 0.0,
+            "error_rate_change": last["error_rate"] - first["error_rate"],
+        }
+    return result
+
+
+def format_report(rows):
+    lines = [f"{'window (UTC)':<18}{'endpoint':<28}{'requests':>10}{'p50, ms':>10}{'p95, ms':>10}{'p99, ms':>10}"
+             f"{'errors':>9}"]
+    for row in rows:
+        window = datetime.fromtimestamp(row["window_start"], timezone.utc).strftime("%Y-%m-%d %H:%M")
+        lines.append(f"{window:<18}{row['endpoint']:<28}{row['requests']:>10}{row['p50_ms']:>10.2f}"
+                     f"{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}{row['error_rate']:>9.2%}")
+    for endpoint, change in sorted(trends(rows).items()):
+        if change["windows"] > 1:
+            lines.append(f"{endpoint}: p95 {change['p95_change']:+.1%}, ошибки {change['error_rate_change']:+.2%} "
+                         f"за {change['windows']} окон")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Колоночное хранилище замеров API")
+    parser.add_argument("--store", default=os.path.join(".api_metrics", "store"), help="каталог хранилища")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    report_parser = commands.add_parser("report", help="перцентили и доля ошибок по окнам времени")
+    report_parser.add_argument("--since", default="7d", help="начало периода: 7d назад или дата YYYY-MM-DD")
+    report_parser.add_argument("--window", default=None, help="ширина окна, например 1h; без неё - весь период")
+    report_parser.add_argument("--endpoint", default=None)
+    report_parser.add_argument("--json", dest="json_path", help="сохранить строки отчёта в JSON")
+
+    import_parser = commands.add_parser("import", help="перенести run-*.json из utils.metrics_plugin в хранилище")
+    import_parser.add_argument("files", nargs="+")
+    args = parser.parse_args(argv)
+
+    store = MetricsStore(args.store)
+    if args.command == "import":
+        for path in args.files:
+            with open(path, encoding="utf-8") as f:
+                count = store.append(json.load(f)["records"])
+            print(f"{path}: {count} замеров")
+        return
+
+    if DURATION_RE.match(args.since):
+        since = time.time() - parse_duration(args.since)
+    else:
+        since = datetime.strptime(args.since, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+    started = time.perf_counter()
+    frame = store.load(since=since, endpoint=args.endpoint)
+    loaded = time.perf_counter() - started
+    rows = report(frame, parse_duration(args.window) if args.window else None, args.endpoint)
+    print(format_report(rows))
+    print(f"{len(frame)} замеров загружено за {loaded * 1000:.0f} мс")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
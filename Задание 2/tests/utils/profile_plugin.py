@@ -0,0 +1,93 @@
+"""pytest-плагин с профилем тестов (utils.profiling): на что уходит время теста на стороне клиента.
+
+С --profile профилируется каждый тест, без флага - только тесты с маркером profile:
+
+    @pytest.mark.profile
+    def test_post_many_and_get_seller_items_match(self, ...):
+
+Профилируется только вызов теста, без фикстур. Время сэмплов делится на сеть (ожидание сокета),
+декодирование JSON, проверки (схемы и код теста), сам клиент и ожидание блокировок, поэтому видно,
+медленный ли сервис или тест. Для каждого теста в --profile-dir пишутся <тест>.folded - свёрнутые
+стеки для flamegraph.pl или speedscope - и <тест>.json с горячими кадрами и выделениями памяти;
+в конце прогона выводится таблица по категориям. Воркеры xdist передают профили контроллеру
+через workeroutput.
+"""
+import json
+import os
+import re
+
+import pytest
+
+from utils.profiling import TestProfile, format_profiles
+
+profiles_key = pytest.StashKey()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("profile", "профиль тестов")
+    group.addoption("--profile", action="store_true", help="профилировать все тесты, а не только с маркером profile")
+    group.addoption("--profile-dir", default=".test_profiles",
+                    help="куда сохранять свёрнутые стеки и JSON профилей (относительно rootdir), пусто - не сохранять")
+    group.addoption("--profile-interval", type=float, default=2.0, help="шаг сэмплирования стеков, мс")
+    group.addoption("--profile-top", type=int, default=10, help="сколько горячих кадров и строк выделений сохранять")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "profile: сэмплировать стеки и выделения памяти во время теста")
+    config.stash[profiles_key] = []
+
+
+def profile_filename(nodeid):
+    """Имя файла профиля из nodeid: без разделителей пути и скобок параметров"""
+    return re.sub(r"[^\w.-]+", "_", nodeid).strip("_")[-150:]
+
+
+def _profile_dir(config):
+    path = config.getoption("--profile-dir")
+    return os.path.join(str(config.rootpath), path) if path else None
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    config = item.config
+    if not config.getoption("--profile") and item.get_closest_marker("profile") is None:
+        yield
+        return
+
+    with TestProfile(item.nodeid, interval=config.getoption("--profile-interval") / 1000) as profile:
+        yield
+    result = profile.as_dict(config.getoption("--profile-top"))
+    config.stash[profiles_key].append(result)
+
+    profile_dir = _profile_dir(config)
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        name = os.path.join(profile_dir, profile_filename(item.nodeid))
+        with open(f"{name}.folded", "w", encoding="utf-8") as f:
+            f.write(profile.sampler.folded())
+        with open(f"{name}.json", "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    if hasattr(config, "workeroutput"):
+        config.workeroutput["test_profiles"] = config.stash[profiles_key]
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    profiles = getattr(node, "workeroutput", {}).get("test_profiles")
+    if profiles:
+        node.config.stash[profiles_key].extend(profiles)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    profiles = config.stash[profiles_key]
+    if not profiles:
+        return
+    terminalreporter.write_sep("=", "Профиль тестов, мс")
+    terminalreporter.write_line(format_profiles(profiles))
+    profile_dir = _profile_dir(config)
+    if profile_dir:
+        terminalreporter.write_line(f"Свёрнутые стеки и горячие кадры сохранены в {profile_dir}")
@@ -0,0 +1,244 @@
+"""Профиль одного теста: сэмплы стеков потоков и трассировка выделений памяти.
+
+Сэмплер раз в interval снимает стеки всех потоков процесса (sys._current_frames). Каждый сэмпл
+относится к одной категории по самому глубокому кадру, который под неё попадает:
+сеть - ожидание сокета, json - декодирование ответа, validation - схемы, проверки и код теста,
+client - APIClient, requests, urllib3 и httpx, import - ленивые импорты, idle - поток ждёт блокировку
+или очередь. Время категорий - сумма по потокам: с пулом потоков она больше длительности теста.
+Потоки локального сервиса (--local-api) не сэмплируются, чтобы не смешиваться с клиентом.
+
+Стеки сохраняются в свёрнутом формате flamegraph.pl и speedscope: "кадр;кадр;кадр число".
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from functools import lru_cache
+
+CATEGORIES = ("network", "json", "validation", "client", "import", "idle", "other")
+
+# Фрагменты путей кадров; проверяются от самого глубокого кадра наружу
+CATEGORY_PATHS = (
+    ("network", ("/socket.py", "/ssl.py", "/selectors.py", "/urllib3/util/wait.py", "/httpcore/_backends/")),
+    ("json", ("/json/", "/utils/json_stream.py", "/charset_normalizer/", "/chardet/")),
+    ("validation", ("/utils/schemas.py", "/utils/assertions.py", "/utils/case_table.py",
+                    "/_pytest/assertion/util.py")),
+    ("client", ("/utils/api_client.py", "/utils/transport.py", "/utils/rate_limit.py", "/utils/response_cache.py",
+                "/utils/cassette.py", "/requests/", "/urllib3/", "/httpx/", "/httpcore/", "/h2/", "/hpack/",
+                "/http/client.py", "/idna/")),
+    # Ленивые импорты: httpx и бэкенды anyio подгружаются при первом запросе
+    ("import", ("<frozen importlib", "/importlib/", "/_pytest/assertion/rewrite.py")),
+)
+SERVER_PATHS = ("/socketserver.py", "/http/server.py", "/utils/stub_server.py")
+IDLE_PATHS = ("/threading.py", "/queue.py", "/concurrent/futures/")
+
+
+@lru_cache(maxsize=None)
+def file_category(filename):
+    """Категория кадра по файлу; server и harness - потоки, которые к клиенту не относятся"""
+    path = filename.replace(os.sep, "/")
+    if path.endswith(SERVER_PATHS):
+        return "server"
+    if "/execnet/" in path:
+        return "harness"
+    if path.endswith("/_pytest/python.py"):
+        return "pytest"
+    if any(fragment in path for fragment in IDLE_PATHS):
+        return "idle"
+    for category, fragments in CATEGORY_PATHS:
+        if any(fragment in path for fragment in fragments):
+            return category
+    # Код самого теста - обход ответа и проверки
+    return "validation" if os.path.basename(path).startswith("test_") else None
+
+
+def classify(stack):
+    """Категория сэмпла по стеку: список (файл, функция, строка) от внешнего кадра к глубокому.
+
+    None - поток не клиентский: локальный сервис (--local-api) или поток ввода-вывода execnet в воркере xdist.
+    """
+    categories = [file_category(frame[0]) for frame in stack]
+    if "server" in categories or ("harness" in categories and "pytest" not in categories):
+        return None
+    if categories and categories[-1] == "idle":
+        return "idle"
+    for category in reversed(categories):
+        if category in CATEGORIES and category != "idle":
+            return category
+    return "other"
+
+
+def frame_label(frame):
+    filename, function, line = frame
+    return f"{os.path.basename(filename)}:{function}:{line}"
+
+
+def trim_harness(stack):
+    """Стек без кадров pytest и pluggy над тестовой функцией и без запуска потока из threading"""
+    for index in range(len(stack) - 1, -1, -1):
+        filename, function, _ = stack[index]
+        if filename.replace(os.sep, "/").endswith("/_pytest/python.py") and function == "pytest_pyfunc_call":
+            return stack[index + 1:]
+    start = 0
+    while start < len(stack) and stack[start][0].replace(os.sep, "/").endswith("/threading.py"):
+        start += 1
+    return stack[start:]
+
+
+class StackSampler:
+    """Фоновый поток, который раз в interval секунд снимает стеки остальных потоков процесса"""
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.stacks = Counter()
+        self.self_samples = Counter()
+        self.categories = Counter()
+        self.samples = 0
+        self.ticks = 0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self._started
+        return self
+
+    @property
+    def tick_ms(self):
+        """Фактический шаг сэмплирования: под нагрузкой на GIL сэмплер просыпается реже interval"""
+        return self.elapsed * 1000 / self.ticks if self.ticks else self.interval * 1000
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        self.ticks += 1
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append((frame.f_code.co_filename, frame.f_code.co_name, frame.f_lineno))
+                frame = frame.f_back
+            stack.reverse()
+            category = classify(stack)
+            if category is None:
+                continue
+            self.categories[category] += 1
+            self.samples += 1
+            stack = trim_harness(stack)
+            if not stack:
+                continue
+            thread_name = names.get(thread_id, str(thread_id))
+            self.stacks[";".join([thread_name] + [frame_label(frame) for frame in stack])] += 1
+            if category != "idle":
+                self.self_samples[(frame_label(stack[-1]), category)] += 1
+
+    def category_ms(self):
+        return {category: round(self.categories[category] * self.tick_ms, 1)
+                for category in CATEGORIES if self.categories[category]}
+
+    def hot_spots(self, top=10):
+        """Самые частые глубокие кадры без ожидания блокировок"""
+        return [{"frame": label, "category": category, "ms": round(count * self.tick_ms, 1)}
+                for (label, category), count in self.self_samples.most_common(top)]
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+
+class AllocationTracer:
+    """tracemalloc на время теста: пик памяти и строки, за которыми к концу теста числится больше всего памяти"""
+
+    def __init__(self, frames=1):
+        self.frames = frames
+        self.started = False
+        self.snapshot = None
+        self.peak = 0
+
+    def start(self):
+        # Если трассировка уже включена (python -X tracemalloc), она не выключается после теста
+        self.started = not tracemalloc.is_tracing()
+        if self.started:
+            tracemalloc.start(self.frames)
+        tracemalloc.reset_peak()
+        return self
+
+    def stop(self):
+        self.peak = tracemalloc.get_traced_memory()[1]
+        self.snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+        if self.started:
+            tracemalloc.stop()
+        return self
+
+    def top(self, top=10):
+        return [{"line": f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                 "kb": round(stat.size / 1024, 1), "count": stat.count}
+                for stat in self.snapshot.statistics("lineno")[:top]]
+
+
+class TestProfile:
+    """Профиль одного вызова: время, категории сэмплов, горячие кадры и выделения памяти"""
+
+    __test__ = False
+
+    def __init__(self, nodeid, interval=0.002, allocations=True):
+        self.nodeid = nodeid
+        self.sampler = StackSampler(interval)
+        self.tracer = AllocationTracer() if allocations else None
+        self.duration = 0.0
+
+    def __enter__(self):
+        if self.tracer is not None:
+            self.tracer.start()
+        self.sampler.start()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.duration = time.perf_counter() - self._started
+        self.sampler.stop()
+        if self.tracer is not None:
+            self.tracer.stop()
+
+    def as_dict(self, top=10):
+        return {
+            "nodeid": self.nodeid,
+            "duration_ms": round(self.duration * 1000, 1),
+            "samples": self.sampler.samples,
+            "tick_ms": round(self.sampler.tick_ms, 3),
+            "categories_ms": self.sampler.category_ms(),
+            "hot_spots": self.sampler.hot_spots(top),
+            "allocations": self.tracer.top(top) if self.tracer is not None else [],
+            "peak_kb": round(self.tracer.peak / 1024, 1) if self.tracer is not None else None,
+        }
+
+
+def format_profiles(profiles, top=3):
+    """Таблица категорий по тестам, от самого долгого, и по top горячих кадров у каждого"""
+    lines = [f"{'тест':<60} {'мс':>8} " + " ".join(f"{category:>10}" for category in CATEGORIES)]
+    for profile in sorted(profiles, key=lambda p: -p["duration_ms"]):
+        categories = profile["categories_ms"]
+        name = profile["nodeid"].rsplit("/", 1)[-1]
+        lines.append(f"{name[-60:]:<60} {profile['duration_ms']:>8.1f} "
+                     + " ".join(f"{categories.get(category, 0):>10.1f}" for category in CATEGORIES))
+        for spot in profile["hot_spots"][:top]:
+            lines.append(f"    {spot['ms']:>8.1f} мс  {spot['category']:<10} {spot['frame']}")
+    return "\n".join(lines)
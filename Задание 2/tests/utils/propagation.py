@@ -0,0 +1,143 @@
+"""Проверки чтения после записи: через сколько созданное объявление становится видно на чтение.
+
+wait_until_visible опрашивает условие с растущей паузой до дедлайна, probe_propagation
+создаёт объявление и параллельно ждёт его появления в get_item, get_seller_items и
+get_item_statistics. Задержки видимости уходят в hooks клиента как RequestRecord
+с endpoint вида "visible:get_item", поэтому попадают в отчёт utils.metrics_plugin вместе с запросами.
+"""
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.api_client import response_item_id
+from utils.metrics import RequestRecord
+
+DEFAULT_TIMEOUT = 5.0
+
+
+class PropagationTimeout(AssertionError):
+    pass
+
+
+def wait_until_visible(check, timeout=DEFAULT_TIMEOUT, description="объявление", initial_delay=0.02,
+                       max_delay=0.5, factor=2.0, clock=time.monotonic, sleep=time.sleep):
+    """Вызывает check() до первого непустого результата и возвращает его.
+
+    Пауза между попытками растёт в factor раз до max_delay (со случайным разбросом, чтобы
+    параллельные опросы не шли в ногу) и не выходит за дедлайн. По истечении timeout
+    поднимает PropagationTimeout.
+    """
+    deadline = clock() + timeout
+    delay = initial_delay
+    attempts = 0
+    while True:
+        attempts += 1
+        result = check()
+        if result:
+            return result
+        remaining = deadline - clock()
+        if remaining <= 0:
+            raise PropagationTimeout(f"{description} не стало видно за {timeout} с ({attempts} попыток)")
+        sleep(min(delay * random.uniform(0.5, 1.0), remaining))
+        delay = min(delay * factor, max_delay)
+
+
+def item_visible(client, item_id):
+    """Объявление из GET /api/1/item/{id} или None, пока его не видно"""
+    response = client.get_item(item_id)
+    if response.status_code != 200:
+        return None
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    items = body if isinstance(body, list) else [body]
+    return next((item for item in items if isinstance(item, dict) and item.get("id") == item_id), None)
+
+
+def seller_item_visible(client, seller_id, item_id):
+    """Объявление из списка продавца или None; список читается потоково до первого совпадения"""
+    with client.get_seller_items(seller_id, stream=True) as items:
+        if items.status_code != 200:
+            return None
+        try:
+            return next((item for item in items if isinstance(item, dict) and item.get("id") == item_id), None)
+        except ValueError:
+            return None
+
+
+def statistics_visible(client, item_id):
+    """Статистика объявления или None, пока её не видно"""
+    response = client.get_item_statistics(item_id)
+    if response.status_code != 200:
+        return None
+    try:
+        return response.json() or None
+    except ValueError:
+        return None
+
+
+# endpoint -> (шаблон пути, проверка видимости по клиенту, sellerId и id объявления)
+PROBES = {
+    "get_item": ("/api/1/item/{id}", lambda client, seller_id, item_id: item_visible(client, item_id)),
+    "get_seller_items": ("/api/1/{sellerId}/item", seller_item_visible),
+    "get_item_statistics": ("/api/1/statistic/{id}",
+                            lambda client, seller_id, item_id: statistics_visible(client, item_id)),
+}
+
+
+class PropagationResult:
+    def __init__(self, item_id, visible_after, attempts):
+        self.item_id = item_id
+        # endpoint -> секунды от ответа на POST до первого успешного чтения, None - не дождались
+        self.visible_after = visible_after
+        self.attempts = attempts
+
+    @property
+    def lagging(self):
+        return sorted(endpoint for endpoint, lag in self.visible_after.items() if lag is None)
+
+    @property
+    def max_lag(self):
+        lags = [lag for lag in self.visible_after.values() if lag is not None]
+        return max(lags) if lags else None
+
+
+def probe_propagation(client, payload, timeout=DEFAULT_TIMEOUT, endpoints=tuple(PROBES)):
+    """Создаёт объявление и замеряет, через сколько оно видно в каждом из endpoints"""
+    # Кеш GET-ответов спрятал бы появление объявления, опрашиваем мимо него
+    client = client.with_cache(None)
+    response = client.post_item(payload)
+    posted_at = time.perf_counter()
+    started_at = time.time()
+    item_id = response_item_id(response)
+    if item_id is None:
+        raise ValueError(f"Не удалось создать объявление: {response.status_code} {response.text}")
+
+    seller_id = payload.get("sellerId", payload.get("sellerID"))
+    attempts = dict.fromkeys(endpoints, 0)
+
+    def probe(endpoint):
+        visible = PROBES[endpoint][1]
+
+        def check():
+            attempts[endpoint] += 1
+            return visible(client, seller_id, item_id)
+
+        try:
+            wait_until_visible(check, timeout, f"{item_id} в {endpoint}")
+        except PropagationTimeout:
+            return None
+        return time.perf_counter() - posted_at
+
+    with ThreadPoolExecutor(max_workers=len(endpoints)) as executor:
+        visible_after = dict(zip(endpoints, executor.map(probe, endpoints)))
+
+    for endpoint, lag in visible_after.items():
+        record = RequestRecord(started_at=started_at, endpoint=f"visible:{endpoint}", template=PROBES[endpoint][0],
+                               method="VISIBLE", status=200 if lag is not None else 0, dns=0.0, connect=0.0,
+                               tls=0.0, ttfb=None, total=lag if lag is not None else timeout,
+                               request_bytes=0, response_bytes=0)
+        for hook in client.hooks:
+            hook(record)
+    return PropagationResult(item_id, visible_after, attempts)
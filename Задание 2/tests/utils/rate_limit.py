@@ -0,0 +1,122 @@
+"""Ограничение темпа запросов к API, общее для потоков и процессов (воркеров xdist).
+
+Для каждого эндпоинта - token bucket в форме GCRA: вместо пары (жетоны, время пополнения)
+хранится одна «теоретическая метка прибытия» tat и текущий темп rate. Состояние лежит в
+отображённом в память файле, изменения идут под fcntl-блокировкой, так что все процессы
+прогона делят один бюджет. Ожидание вычисляется под блокировкой, а спит каждый вызов сам, вне неё.
+
+Темп адаптивный: 429 откладывает эндпоинт на Retry-After и вдвое снижает темп, каждый
+успешный ответ понемногу поднимает его обратно к заданному потолку (AIMD, как в TCP).
+"""
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+ENDPOINTS = ("get_item", "get_seller_items", "post_item", "post_item_on_payload", "get_item_statistics")
+# tat, rate; последний слот - для эндпоинтов вне ENDPOINTS
+SLOT = struct.Struct("<dd")
+SLOTS = {endpoint: index for index, endpoint in enumerate(ENDPOINTS)}
+FILE_SIZE = SLOT.size * (len(ENDPOINTS) + 1)
+THROTTLED_STATUSES = (429,)
+
+
+def retry_after(response, attempt, base=0.5, cap=10.0):
+    """Пауза перед повтором: Retry-After в секундах или HTTP-дате, иначе экспоненциальная"""
+    header = response.headers.get("Retry-After")
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(header).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    return min(cap, base * 2 ** attempt)
+
+
+class SharedRateLimiter:
+    def __init__(self, path, rate, burst=None, rates=None, min_rate=0.5, max_retries=5, clock=time.monotonic):
+        """rate - потолок запросов в секунду на эндпоинт для всех процессов вместе, rates - исключения по эндпоинтам"""
+        self.path = path
+        self.max_rates = dict.fromkeys(ENDPOINTS + (None,), float(rate))
+        self.max_rates.update(rates or {})
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self.min_rate = min_rate
+        self.max_retries = max_retries
+        # CLOCK_MONOTONIC общий для всех процессов машины, поэтому метки из файла сравнимы между воркерами
+        self.clock = clock
+        self.lock = threading.Lock()
+
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self.fd).st_size < FILE_SIZE:
+            os.ftruncate(self.fd, FILE_SIZE)
+        self.mapped = mmap.mmap(self.fd, FILE_SIZE)
+
+    @contextmanager
+    def _locked(self):
+        # flock общий для потоков процесса, поэтому сначала сериализуем их обычной блокировкой
+        with self.lock:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def _slot(self, endpoint):
+        key = endpoint if endpoint in SLOTS else None
+        return SLOT.size * SLOTS.get(endpoint, len(ENDPOINTS)), self.max_rates[key]
+
+    def _read(self, offset, max_rate):
+        tat, rate = SLOT.unpack_from(self.mapped, offset)
+        # Нулевой темп - слот ещё никто не трогал
+        return tat, rate or max_rate
+
+    def reserve(self, endpoint):
+        """Занимает место в расписании эндпоинта и возвращает, сколько секунд подождать перед запросом"""
+        offset, max_rate = self._slot(endpoint)
+        with self._locked():
+            tat, rate = self._read(offset, max_rate)
+            now = self.clock()
+            interval = 1.0 / rate
+            tat = max(tat, now)
+            wait = max(0.0, tat - (self.burst - 1) * interval - now)
+            SLOT.pack_into(self.mapped, offset, tat + interval, rate)
+        return wait
+
+    def acquire(self, endpoint):
+        wait = self.reserve(endpoint)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def record(self, endpoint, status, delay=0.0):
+        """Подстраивает темп по ответу: 429 - пауза delay и темп вдвое ниже, иначе плавный рост к потолку"""
+        offset, max_rate = self._slot(endpoint)
+        if status not in THROTTLED_STATUSES:
+            # Быстрая проверка без блокировки: на потолке делать нечего
+            if SLOT.unpack_from(self.mapped, offset)[1] in (0.0, max_rate):
+                return
+            with self._locked():
+                tat, rate = self._read(offset, max_rate)
+                SLOT.pack_into(self.mapped, offset, tat, min(max_rate, rate + 1.0 / rate))
+            return
+
+        with self._locked():
+            tat, rate = self._read(offset, max_rate)
+            rate = max(self.min_rate, rate / 2)
+            # После паузы запросы возобновляются по одному, без накопленного burst
+            resume = self.clock() + delay + (self.burst - 1) / rate
+            SLOT.pack_into(self.mapped, offset, max(tat, resume), rate)
+
+    def rate(self, endpoint):
+        offset, max_rate = self._slot(endpoint)
+        return self._read(offset, max_rate)[1]
+
+    def close(self):
+        self.mapped.close()
+        os.close(self.fd)
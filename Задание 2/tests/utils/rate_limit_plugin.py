@@ -0,0 +1,62 @@
+"""pytest-плагин с общим на весь прогон ограничением темпа запросов (utils.rate_limit).
+
+С --rate-limit N клиенты из фикстур api_client и async_api_client вместе, во всех
+воркерах xdist, шлют каждому эндпоинту не больше N запросов в секунду, а на 429
+ждут Retry-After и повторяют запрос. Файл состояния создаёт контроллер и передаёт воркерам.
+"""
+import os
+import tempfile
+
+import pytest
+
+from utils.rate_limit import FILE_SIZE, SharedRateLimiter
+
+rate_limit_path_key = pytest.StashKey()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("rate-limit", "ограничение темпа запросов")
+    group.addoption("--rate-limit", type=float, default=None,
+                    help="запросов в секунду на эндпоинт для всего прогона, включая воркеры xdist")
+    group.addoption("--rate-limit-burst", type=int, default=None,
+                    help="сколько запросов можно отправить подряд без паузы (по умолчанию - секунда темпа)")
+    group.addoption("--rate-limit-retries", type=int, default=5, help="сколько раз повторять запрос после 429")
+
+
+def pytest_configure(config):
+    if not config.getoption("--rate-limit"):
+        return
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput is not None:
+        config.stash[rate_limit_path_key] = (workerinput["rate_limit_path"], False)
+        return
+    fd, path = tempfile.mkstemp(prefix="rate_limit_", suffix=".bin")
+    os.ftruncate(fd, FILE_SIZE)
+    os.close(fd)
+    config.stash[rate_limit_path_key] = (path, True)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    if rate_limit_path_key in node.config.stash:
+        node.workerinput["rate_limit_path"] = node.config.stash[rate_limit_path_key][0]
+
+
+def pytest_unconfigure(config):
+    path, owner = config.stash.get(rate_limit_path_key, (None, False))
+    if owner:
+        os.unlink(path)
+
+
+@pytest.fixture(scope="session")
+def rate_limiter(request):
+    """Общий лимитер прогона или None без --rate-limit"""
+    config = request.config
+    if rate_limit_path_key not in config.stash:
+        yield None
+        return
+    limiter = SharedRateLimiter(config.stash[rate_limit_path_key][0], config.getoption("--rate-limit"),
+                                burst=config.getoption("--rate-limit-burst"),
+                                max_retries=config.getoption("--rate-limit-retries"))
+    yield limiter
+    limiter.close()
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+
+# TTL по умолчанию, секунды: объявление меняется редко, список продавца и статистика - чаще
+DEFAULT_TTLS = {"get_item": 30.0, "get_seller_items": 5.0, "get_item_statistics": 5.0}
+
+
+class CacheEntry:
+    def __init__(self, response, stored_at):
+        self.response = response
+        self.stored_at = stored_at
+
+    def validators(self):
+        """Заголовки условного запроса, если сервер прислал ETag или Last-Modified"""
+        headers = {}
+        if "ETag" in self.response.headers:
+            headers["If-None-Match"] = self.response.headers["ETag"]
+        if "Last-Modified" in self.response.headers:
+            headers["If-Modified-Since"] = self.response.headers["Last-Modified"]
+        return headers
+
+
+class ResponseCache:
+    """LRU-кеш успешных GET-ответов с TTL на эндпоинт.
+
+    Ключ - пара (эндпоинт, аргумент), например ("get_seller_items", "999665"), чтобы
+    POST мог точечно сбросить список своего продавца. generation растёт при каждом сбросе:
+    ответ GET, начатого до сброса, store не сохраняет, иначе он вернул бы в кеш устаревший список.
+    """
+
+    def __init__(self, max_entries=256, ttls=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.generation = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, endpoint, key):
+        """Возвращает (entry, fresh): свежую запись можно отдавать без запроса, устаревшую - перепроверить"""
+        with self.lock:
+            entry = self.entries.get((endpoint, key))
+            if entry is None:
+                self.misses += 1
+                return None, False
+            self.entries.move_to_end((endpoint, key))
+            fresh = self.clock() - entry.stored_at < self.ttls.get(endpoint, 0)
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry, fresh
+
+    def store(self, endpoint, key, response, generation=None):
+        """generation - значение self.generation до отправки GET; если с тех пор был сброс, ответ не сохраняется"""
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.entries[(endpoint, key)] = CacheEntry(response, self.clock())
+            self.entries.move_to_end((endpoint, key))
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def refresh(self, entry):
+        """Сервер ответил 304: запись снова свежая"""
+        with self.lock:
+            entry.stored_at = self.clock()
+            self.revalidated += 1
+
+    def invalidate(self, endpoint=None, key=None):
+        with self.lock:
+            self.generation += 1
+            if endpoint is None:
+                self.entries.clear()
+                return
+            for cached_endpoint, cached_key in list(self.entries):
+                if cached_endpoint == endpoint and (key is None or cached_key == key):
+                    del self.entries[(cached_endpoint, cached_key)]
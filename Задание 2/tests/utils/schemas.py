@@ -0,0 +1,214 @@
+"""Декларативные схемы ответов API и их валидаторы.
+
+Схема один раз компилируется в функцию-валидатор, которая за один проход по ответу
+собирает все нарушения сразу. Виды нарушений (Violation.kind):
+    missing - нет обязательного поля, extra - лишнее поле,
+    object  - ожидался объект/список, type - неверный тип, value - значение не подходит под шаблон.
+"""
+import re
+from functools import cached_property
+
+ITEM_ID_PATTERN = r"[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}"
+# Диапазон sellerId, который принимает сервис; sellerId = 0 и вне диапазона - дефект (BUGS.md, пункт 5)
+SELLER_ID_RANGE = (111111, 999999)
+
+
+class Violation:
+    ERROR_TYPES = {"missing": KeyError, "extra": KeyError, "object": TypeError, "type": TypeError, "value": AssertionError}
+
+    def __init__(self, kind, path, message):
+        self.kind = kind
+        self.path = path
+        self.message = message
+
+    def __repr__(self):
+        return f"Violation({self.kind!r}, {self.path!r}, {self.message!r})"
+
+    def __str__(self):
+        return f"{self.path}: {self.message}"
+
+    def as_error(self):
+        return self.ERROR_TYPES[self.kind](str(self))
+
+
+class Pattern:
+    """Строка, целиком совпадающая с регулярным выражением"""
+
+    def __init__(self, regex):
+        self.regex = re.compile(regex)
+
+
+class IntRange:
+    """Целое число в диапазоне [low, high] включительно"""
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+
+class ListOf:
+    def __init__(self, item):
+        self.item = item
+
+    @cached_property
+    def validate(self):
+        check_item = _compile(self.item)
+
+        def validate(value, path="$"):
+            if not isinstance(value, list):
+                return [Violation("object", path, f"ожидался список, получен {type(value).__name__}")]
+            violations = []
+            for index, item in enumerate(value):
+                check_item(item, f"{path}[{index}]", violations)
+            return violations
+
+        return validate
+
+
+class OneOrListOf(ListOf):
+    """Список из item или один item без списка: GET /api/1/item/{id} может отдать объявление и так"""
+
+    @cached_property
+    def validate(self):
+        check_item = _compile(self.item)
+        validate_list = ListOf(self.item).validate
+
+        def validate(value, path="$"):
+            if not isinstance(value, dict):
+                return validate_list(value, path)
+            violations = []
+            check_item(value, path, violations)
+            return violations
+
+        return validate
+
+
+class Schema:
+    def __init__(self, name, fields, required=None, allow_extra=False):
+        self.name = name
+        self.fields = fields
+        self.required = tuple(fields) if required is None else tuple(required)
+        self.allow_extra = allow_extra
+
+    @cached_property
+    def validate(self):
+        check = _compile(self)
+
+        def validate(value, path="$"):
+            violations = []
+            check(value, path, violations)
+            return violations
+
+        return validate
+
+
+def _is_instance_check(expected):
+    expected = expected if isinstance(expected, tuple) else (expected,)
+    # bool - подкласс int, но для числовых полей API это ошибка типа
+    reject_bool = bool not in expected and any(issubclass(t, (int, float)) for t in expected)
+    names = " или ".join(t.__name__ for t in expected)
+
+    def check(value, path, violations):
+        if not isinstance(value, expected) or (reject_bool and isinstance(value, bool)):
+            violations.append(Violation("type", path, f"ожидался {names}, получен {type(value).__name__}"))
+
+    return check
+
+
+def _compile(spec):
+    if isinstance(spec, Schema):
+        return _compile_schema(spec)
+    if isinstance(spec, ListOf):
+        validate = spec.validate
+
+        def check(value, path, violations):
+            violations.extend(validate(value, path))
+
+        return check
+    if isinstance(spec, Pattern):
+        regex = spec.regex
+
+        def check(value, path, violations):
+            if not isinstance(value, str):
+                violations.append(Violation("type", path, f"ожидался str, получен {type(value).__name__}"))
+            elif not regex.fullmatch(value):
+                violations.append(Violation("value", path, f"значение {value!r} не соответствует {regex.pattern}"))
+
+        return check
+    if isinstance(spec, IntRange):
+        check_type = _is_instance_check(int)
+        low, high = spec.low, spec.high
+
+        def check(value, path, violations):
+            found = len(violations)
+            check_type(value, path, violations)
+            if len(violations) == found and not low <= value <= high:
+                violations.append(Violation("value", path, f"значение {value} вне диапазона [{low}, {high}]"))
+
+        return check
+    return _is_instance_check(spec)
+
+
+def _compile_schema(schema):
+    field_checks = tuple((field, _compile(spec)) for field, spec in schema.fields.items())
+    required = frozenset(schema.required)
+    allowed = frozenset(schema.fields)
+    allow_extra = schema.allow_extra
+    name = schema.name
+
+    def check(value, path, violations):
+        if not isinstance(value, dict):
+            violations.append(Violation("object", path, f"'{name}' должен быть словарём, получен {type(value).__name__}"))
+            return
+        keys = value.keys()
+        for field in sorted(required - keys):
+            violations.append(Violation("missing", path, f"ответ не содержит ключ '{field}'"))
+        if not allow_extra:
+            extra = keys - allowed
+            if extra:
+                violations.append(Violation("extra", path, f"найдены лишние поля: {sorted(extra)}"))
+        for field, check_field in field_checks:
+            if field in value:
+                check_field(value[field], f"{path}.{field}", violations)
+
+    return check
+
+
+STATISTICS = Schema("statistics", {"likes": int, "viewCount": int, "contacts": int})
+
+ITEM = Schema(
+    "item",
+    {
+        "createdAt": str,
+        "id": str,
+        "name": str,
+        "price": (int, float),
+        "sellerId": int,
+        "statistics": STATISTICS,
+    },
+    required=("name", "price", "sellerId", "statistics"),
+)
+
+ITEM_LIST = ListOf(ITEM)
+# Любой JSON-список, элементы не проверяются
+JSON_LIST = ListOf(object)
+ITEM_OR_LIST = OneOrListOf(ITEM)
+# В списке продавца статистика не обязательна: проверяем только name, price и sellerId
+SELLER_ITEM_LIST = ListOf(Schema("item", ITEM.fields, required=("name", "price", "sellerId")))
+STATISTICS_LIST = ListOf(STATISTICS)
+POST_STATUS = Schema("status", {"status": Pattern(rf"Сохранили объявление - {ITEM_ID_PATTERN}")})
+
+# Тело POST /api/1/item: обязателен только sellerId из SELLER_ID_RANGE, статистика может быть неполной,
+# price может прийти null (так шлёт post_item_on_payload без цены)
+POST_ITEM = Schema(
+    "post_item",
+    {
+        "name": str,
+        "price": (int, float, type(None)),
+        "sellerId": IntRange(*SELLER_ID_RANGE),
+        "statistics": Schema("statistics", {"likes": int, "viewCount": int, "contacts": int}, required=(),
+                             allow_extra=True),
+    },
+    required=("sellerId",),
+    allow_extra=True,
+)
@@ -0,0 +1,192 @@
+"""Теневая модель объявлений, созданных за сессию, и инкрементальная сверка списков продавцов с ней.
+
+APIClient с inventory=ShadowInventory() записывает каждое успешно созданное объявление: id, sellerId,
+ожидаемые поля из payload и их 64-битный хеш. check_seller читает список продавца один раз (разбор
+ответа - O(размера списка)). Поля сравниваются хешем только у новых объявлений; у сверенных раньше
+проверяется лишь, что id есть в списке ровно один раз - поиск в словаре без сериализации и хеширования.
+Поэтому после тысяч созданий повторная сверка сравнивает поля только у появившихся с прошлого раза
+объявлений. full=True заново сверяет поля у всех.
+
+Сверка ловит потерянные объявления, дубли одного id в списке и изменённые поля (см. BUGS.md, пункты 1-3).
+Объявления продавца, созданные не в этой сессии, в сверке не участвуют; ids сужает сверку до своих
+объявлений теста, чтобы на неё не влияли объявления соседних тестов того же воркера.
+"""
+import hashlib
+import json
+import threading
+
+from utils.api_client import response_item_id
+from utils.propagation import DEFAULT_TIMEOUT, PropagationTimeout, wait_until_visible
+
+STATISTIC_FIELDS = ("likes", "viewCount", "contacts")
+
+
+def expected_fields(endpoint, payload):
+    """Поля объявления, которые сервис должен вернуть для payload, в виде ответа GET"""
+    if endpoint == "post_item_on_payload":
+        payload = dict(payload, sellerId=payload.get("sellerID"))
+    fields = {key: payload[key] for key in ("sellerId", "name", "price") if key in payload}
+    statistics = payload.get("statistics")
+    if isinstance(statistics, dict):
+        fields["statistics"] = {key: statistics[key] for key in STATISTIC_FIELDS if key in statistics}
+    return fields
+
+
+def project(item, template):
+    """Часть item с ключами template; вложенные словари - тоже по ключам шаблона"""
+    if not isinstance(item, dict):
+        return item
+    return {key: project(item.get(key), value) if isinstance(value, dict) else item.get(key)
+            for key, value in template.items()}
+
+
+def canonical(value):
+    """45000 и 45000.0 - одна цена: сравнение через == их не различает, значит и хеш не должен"""
+    if isinstance(value, dict):
+        return {key: canonical(item) for key, item in value.items()}
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def item_hash(item_id, fields):
+    raw = json.dumps([item_id, canonical(fields)], sort_keys=True, ensure_ascii=False, default=str)
+    return int.from_bytes(hashlib.blake2b(raw.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class ShadowItem:
+    def __init__(self, item_id, seller_id, fields):
+        self.id = item_id
+        self.seller_id = seller_id
+        self.fields = fields
+        self.hash = item_hash(item_id, fields)
+
+    def hash_of(self, item):
+        """Хеш объявления из ответа сервиса по тем же полям, что ожидаются"""
+        return item_hash(item.get("id"), project(item, self.fields))
+
+
+class SellerShadow:
+    """Объявления одного продавца и id тех, чьи поля ещё не сверены"""
+
+    def __init__(self):
+        self.items = {}
+        self.pending = set()
+
+
+class InventoryDiff:
+    """Итог сверки списка продавца: missing - нет в списке, duplicated - id -> сколько раз встретился,
+    changed - id -> (ожидаемые поля, поля из ответа)"""
+
+    def __init__(self, seller_id, checked=0, missing=(), duplicated=None, changed=None):
+        self.seller_id = seller_id
+        self.checked = checked
+        self.missing = sorted(missing)
+        self.duplicated = duplicated or {}
+        self.changed = changed or {}
+
+    @property
+    def consistent(self):
+        return not (self.missing or self.duplicated or self.changed)
+
+    def errors(self):
+        errors = [AssertionError(f"Объявление с ID {item_id} не найдено в списке товаров продавца {self.seller_id}")
+                  for item_id in self.missing]
+        errors.extend(AssertionError(f"Объявление с ID {item_id} встречается в списке продавца {count} раз")
+                      for item_id, count in sorted(self.duplicated.items()))
+        errors.extend(AssertionError(f"Объявление с ID {item_id} не совпадает. Ожидалось {expected}, получено {actual}")
+                      for item_id, (expected, actual) in sorted(self.changed.items()))
+        return errors
+
+
+class ShadowInventory:
+    """Индекс созданных за сессию объявлений по id и по sellerId"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.by_id = {}
+        self.sellers = {}
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def record(self, endpoint, payload, response):
+        """Запоминает объявление из успешного ответа на создание; вызывается из APIClient"""
+        if response.status_code not in (200, 201) or not isinstance(payload, dict):
+            return None
+        item_id = response_item_id(response)
+        if item_id is None:
+            return None
+        fields = expected_fields(endpoint, payload)
+        return self.add(item_id, fields.get("sellerId"), fields)
+
+    def add(self, item_id, seller_id, fields):
+        item = ShadowItem(item_id, seller_id, fields)
+        with self.lock:
+            self.by_id[item_id] = item
+            seller = self.sellers.setdefault(seller_id, SellerShadow())
+            seller.items[item_id] = item
+            seller.pending.add(item_id)
+        return item
+
+    def seller_ids(self, seller_id):
+        with self.lock:
+            seller = self.sellers.get(seller_id)
+            return set(seller.items) if seller is not None else set()
+
+    def check(self, seller_id, items, ids=None, full=False):
+        """Сверяет список продавца items (любой итерируемый, например ItemStream) с моделью.
+
+        ids - сверять только эти объявления, full - сравнивать поля и у сверенных раньше.
+        Новые объявления, найденные и совпавшие, становятся сверенными; не найденные остаются
+        новыми и попадают в missing - с задержкой видимости их можно сверить следующим вызовом.
+        """
+        with self.lock:
+            seller = self.sellers.get(seller_id)
+            if seller is None:
+                return InventoryDiff(seller_id)
+            known = seller.items if ids is None else {item_id: seller.items[item_id]
+                                                       for item_id in ids if item_id in seller.items}
+            known = dict(known)
+            compare = set(known) if full else seller.pending & known.keys()
+
+        counts = {}
+        changed = {}
+        for item in items:
+            item_id = item.get("id") if isinstance(item, dict) else None
+            shadow = known.get(item_id)
+            if shadow is None:
+                continue
+            counts[item_id] = counts.get(item_id, 0) + 1
+            if counts[item_id] == 1 and item_id in compare and shadow.hash_of(item) != shadow.hash:
+                changed[item_id] = (shadow.fields, project(item, shadow.fields))
+
+        duplicated = {item_id: count for item_id, count in counts.items() if count > 1}
+        missing = known.keys() - counts.keys()
+        with self.lock:
+            seller.pending -= compare - missing - changed.keys() - duplicated.keys()
+        return InventoryDiff(seller_id, checked=sum(counts.values()), missing=missing, duplicated=duplicated,
+                             changed=changed)
+
+    def check_seller(self, client, seller_id, ids=None, full=False):
+        """Читает список продавца потоково через APIClient и сверяет с моделью"""
+        with client.get_seller_items(seller_id, stream=True) as items:
+            if items.status_code != 200:
+                raise AssertionError(
+                    f"Ожидался код 200 для списка продавца {seller_id}, но получен {items.status_code}")
+            return self.check(seller_id, items, ids, full)
+
+    def wait_for_seller(self, client, seller_id, ids=None, timeout=DEFAULT_TIMEOUT):
+        """Перечитывает список, пока в нём не найдутся все созданные объявления продавца (или из ids),
+        и возвращает последнюю сверку; по таймауту возвращает её же, с пропавшими объявлениями в missing"""
+        last = []
+
+        def check():
+            last[:] = [self.check_seller(client, seller_id, ids)]
+            return not last[0].missing
+
+        try:
+            wait_until_visible(check, timeout, f"Созданные объявления продавца {seller_id}")
+        except PropagationTimeout:
+            pass
+        return last[0]
@@ -0,0 +1,288 @@
+"""Длительный (soak) прогон: сценарий из методов APIClient крутится часами на одном клиенте.
+
+Прогон идёт окнами по interval секунд. После каждого окна снимается срез процесса-клиента:
+RSS, открытые дескрипторы и сокеты, число потоков, p95 задержки окна. В конце по срезам
+ищется монотонный рост (тау Кендалла по времени + прирост медианы последней трети относительно
+первой сверх допуска) - признак утечки памяти, соединений или деградации задержек.
+
+Пример (из директории tests):
+    python -m utils.soak --local --duration 3600 --interval 30 --client async --json soak.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from utils.api_client import APIClient, response_item_id
+from utils.async_api_client import AsyncAPIClient
+from utils.isolation import allocate_seller_id
+from utils.load_runner import LoadResult, Pacer, build_scenario, check_mix, parse_mix, run_calls
+
+SOAK_MIX = {"get_item": 60, "get_seller_items": 20, "get_item_statistics": 15, "post_item": 5}
+# Допустимый прирост за прогон: абсолютный для ресурсов, относительный для p95
+TOLERANCES = {"rss_mb": 8.0, "fds": 2, "sockets": 2, "threads": 2}
+LATENCY_DRIFT_TOLERANCE = 0.25
+# Начиная с какого тау Кендалла ряд считаем монотонно растущим
+MONOTONIC_TAU = 0.6
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def process_stats():
+    """(rss_mb, fds, sockets) текущего процесса. Без /proc (macOS) - пиковый RSS, дескрипторы не считаются"""
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * PAGE_SIZE
+        fds = os.listdir("/proc/self/fd")
+    except FileNotFoundError:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 0, 0
+
+    sockets = 0
+    for fd in fds:
+        try:
+            sockets += os.readlink(f"/proc/self/fd/{fd}").startswith("socket:")
+        except OSError:
+            # Дескриптор самого listdir уже закрыт
+            pass
+    return rss / (1024 * 1024), len(fds), sockets
+
+
+class Sample:
+    FIELDS = ("elapsed_s", "rss_mb", "fds", "sockets", "threads", "requests", "p95_ms", "error_rate")
+    __slots__ = FIELDS
+
+    def __init__(self, **values):
+        for field in self.FIELDS:
+            setattr(self, field, values.get(field))
+
+    @classmethod
+    def take(cls, elapsed, result):
+        rss_mb, fds, sockets = process_stats()
+        total = result.summary()["total"]
+        return cls(elapsed_s=elapsed, rss_mb=rss_mb, fds=fds, sockets=sockets, threads=threading.active_count(),
+                   requests=total["requests"], p95_ms=total["p95_ms"], error_rate=total["error_rate"])
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __str__(self):
+        return (f"[{self.elapsed_s:8.1f} с] rss={self.rss_mb:.1f} МБ fds={self.fds} sockets={self.sockets} "
+                f"threads={self.threads} requests={self.requests} p95={self.p95_ms:.1f} мс "
+                f"errors={self.error_rate:.2%}")
+
+
+def kendall_tau(values):
+    """Тау Кендалла ряда относительно времени: 1 - строго растёт, 0 - нет тренда"""
+    n = len(values)
+    if n < 2:
+        return 0.0
+    score = 0
+    for i in range(n - 1):
+        for j in range(i + 1, n):
+            score += (values[j] > values[i]) - (values[j] < values[i])
+    return score / (n * (n - 1) / 2)
+
+
+def trend(values, tolerance, relative=False):
+    third = max(1, len(values) // 3)
+    first = statistics.median(values[:third])
+    last = statistics.median(values[-third:])
+    growth = last - first
+    if relative:
+        growth = growth / first if first else 0.0
+    tau = kendall_tau(values)
+    return {"first": first, "last": last, "growth": growth, "tau": tau,
+            "growing": tau >= MONOTONIC_TAU and growth > tolerance}
+
+
+class SoakReport:
+    def __init__(self, samples, warmup=1):
+        self.samples = samples
+        self.warmup = warmup
+
+    @property
+    def trends(self):
+        # Первые окна прогревают пул соединений и аллокатор, рост в них не утечка
+        data = self.samples[self.warmup:]
+        if len(data) < 3:
+            return {}
+        trends = {metric: trend([getattr(sample, metric) for sample in data], tolerance)
+                  for metric, tolerance in TOLERANCES.items()}
+        trends["p95_ms"] = trend([sample.p95_ms for sample in data], LATENCY_DRIFT_TOLERANCE, relative=True)
+        return trends
+
+    @property
+    def leaks(self):
+        return sorted(metric for metric, stats in self.trends.items() if stats["growing"])
+
+    def as_dict(self):
+        return {"samples": [sample.as_dict() for sample in self.samples], "trends": self.trends, "leaks": self.leaks}
+
+    def format(self):
+        trends = self.trends
+        if not trends:
+            return f"Срезов после прогрева меньше трёх ({len(self.samples)} всего), тренд не оценить"
+        lines = [f"{'metric':<10}{'first':>10}{'last':>10}{'growth':>10}{'tau':>8}"]
+        for metric, stats in trends.items():
+            mark = "  РОСТ" if stats["growing"] else ""
+            lines.append(f"{metric:<10}{stats['first']:>10.2f}{stats['last']:>10.2f}{stats['growth']:>10.2f}"
+                         f"{stats['tau']:>8.2f}{mark}")
+        lines.append(f"Монотонный рост: {', '.join(self.leaks)}" if self.leaks else "Монотонного роста не найдено")
+        return "\n".join(lines)
+
+
+async def build_async_scenario(client, seller_id, write_seller_id=None):
+    """Асинхронный аналог utils.load_runner.build_scenario для AsyncAPIClient"""
+    item_data = {
+        "name": "Soak-товар",
+        "price": 1000,
+        "sellerId": seller_id,
+        "statistics": {"contacts": 1, "likes": 1, "viewCount": 1}
+    }
+    response = await client.post_item(item_data)
+    item_id = response_item_id(response)
+    assert item_id, f"Не удалось создать объявление для soak-прогона, ответ: {response.text}"
+    write_data = dict(item_data, sellerId=write_seller_id or seller_id)
+
+    return {
+        "get_item": lambda: client.get_item(item_id),
+        "get_seller_items": lambda: client.get_seller_items(seller_id),
+        "post_item": lambda: client.post_item(write_data),
+        "post_item_on_payload": lambda: client.post_item_on_payload(write_data["sellerId"], write_data["name"],
+                                                                    write_data["price"]),
+        "get_item_statistics": lambda: client.get_item_statistics(item_id),
+    }
+
+
+async def run_async_calls(calls, mix, concurrency, rps, duration, rng):
+    """Окно нагрузки корутинами поверх одного AsyncAPIClient, семантика как у run_calls"""
+    endpoints = list(mix)
+    weights = [mix[endpoint] for endpoint in endpoints]
+    check_mix(mix, calls)
+
+    result = LoadResult()
+    started = time.perf_counter()
+    deadline = started + duration
+    pacer = Pacer(rps, started)
+
+    async def worker():
+        while True:
+            scheduled = pacer.next_slot()
+            if scheduled >= deadline:
+                return
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            endpoint = rng.choices(endpoints, weights)[0]
+            try:
+                status = (await calls[endpoint]()).status_code
+            except Exception as e:
+                status = type(e).__name__
+            result.record(endpoint, status, time.perf_counter() - scheduled)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def run_soak(base_url, mix=None, duration=3600.0, interval=30.0, concurrency=8, rps=None, client="sync",
+             seller_id=None, seed=None, warmup=1, on_sample=None):
+    """Крутит сценарий окнами по interval секунд на одном клиенте и возвращает SoakReport"""
+    if client not in ("sync", "async"):
+        raise ValueError(f"Неизвестный клиент: {client}")
+    mix = mix or SOAK_MIX
+    check_mix(mix)
+    seller_id = seller_id or allocate_seller_id()
+    # POST-вызовы пишут другому продавцу: иначе список seller_id растёт весь прогон,
+    # и дрейф задержки get_seller_items оказывается свойством сценария, а не клиента
+    write_seller_id = allocate_seller_id(str(seller_id), index=1)
+    rng = random.Random(seed)
+    samples = []
+    started = time.perf_counter()
+
+    def windows():
+        while True:
+            elapsed = time.perf_counter() - started
+            if elapsed >= duration:
+                return
+            yield min(interval, duration - elapsed)
+
+    def take(result):
+        sample = Sample.take(time.perf_counter() - started, result)
+        samples.append(sample)
+        if on_sample is not None:
+            on_sample(sample)
+
+    if client == "sync":
+        with APIClient(base_url, pool_maxsize=concurrency, retries=0) as api_client:
+            calls = build_scenario(api_client, seller_id, write_seller_id)
+            for window in windows():
+                take(run_calls(calls, mix, concurrency, rps, window, rng))
+    else:
+        async def soak():
+            async with AsyncAPIClient(base_url, concurrency=concurrency, retries=0) as api_client:
+                calls = await build_async_scenario(api_client, seller_id, write_seller_id)
+                for window in windows():
+                    take(await run_async_calls(calls, mix, concurrency, rps, window, rng))
+
+        asyncio.run(soak())
+    return SoakReport(samples, warmup)
+
+
+def start_stub_process():
+    """Локальный сервис отдельным процессом, чтобы его память не смешивалась с замерами клиента"""
+    tests_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen([sys.executable, "-m", "utils.stub_server", "--port", "0"], cwd=tests_dir,
+                               stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line:
+        process.kill()
+        raise RuntimeError("Локальный сервис не запустился")
+    return process, line.rsplit(" ", 1)[-1].strip()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soak-прогон API объявлений с контролем утечек")
+    parser.add_argument("--base-url", default="https://qa-internship.avito.com")
+    parser.add_argument("--local", action="store_true", help="поднять локальную замену сервиса отдельным процессом")
+    parser.add_argument("--client", choices=("sync", "async"), default="sync")
+    parser.add_argument("--mix", default=",".join(f"{endpoint}={weight}" for endpoint, weight in SOAK_MIX.items()))
+    parser.add_argument("--duration", type=float, default=3600.0, help="длительность в секундах")
+    parser.add_argument("--interval", type=float, default=30.0, help="длина окна между срезами, с")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rps", type=float, default=None, help="целевой RPS; без него - максимальный темп")
+    parser.add_argument("--warmup", type=int, default=1, help="сколько первых срезов не учитывать в тренде")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", dest="json_path", help="сохранить срезы и тренды в JSON")
+    args = parser.parse_args(argv)
+
+    process = None
+    base_url = args.base_url
+    if args.local:
+        process, base_url = start_stub_process()
+
+    try:
+        report = run_soak(base_url, parse_mix(args.mix), args.duration, args.interval, args.concurrency, args.rps,
+                          args.client, seed=args.seed, warmup=args.warmup, on_sample=print)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print(report.format())
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report.as_dict(), f, ensure_ascii=False, indent=2)
+    # Ненулевой код возврата, чтобы CI заметил утечку
+    return 1 if report.leaks else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Замер старта тестового прогона: время импорта conftest и накладные расходы прогона одного теста.
+
+Импорт замеряется через python -X importtime. Накладные расходы - время прогона одного теста
+без длительности самого теста (setup, call и teardown из junitxml) и без времени пустого pytest
+с одним тестом на этой же машине: остаётся то, что добавляют conftest, плагины и сбор тестов.
+Каждый замер - медиана нескольких запусков в отдельных процессах.
+
+Пример (из директории tests):
+    python -m utils.startup_bench --runs 5 --max-overhead-ms 200 --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ElementTree
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(os.path.dirname(TESTS_DIR))
+DEFAULT_ARGS = ["-q", "--local-api", "--metrics-dir=", "--history-file=", "-k", "get_item-invalid-id"]
+
+
+def parse_importtime(stderr, module):
+    """Из вывода -X importtime: (время импорта module, {прямой импорт: время}) в миллисекундах"""
+    # Вложенные импорты печатаются до импортирующего модуля, с отступом на уровень глубже
+    pending = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        ms = int(cumulative) / 1000
+        if depth == 1:
+            pending[name.strip()] = ms
+        elif depth == 0:
+            if name.strip() == module:
+                return ms, pending
+            pending = {}
+    raise ValueError(f"в выводе -X importtime нет модуля {module}")
+
+
+def import_times(module="conftest", runs=5):
+    totals = []
+    direct = {}
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=TESTS_DIR,
+                                capture_output=True, text=True, check=True)
+        total, imports = parse_importtime(result.stderr, module)
+        totals.append(total)
+        for name, ms in imports.items():
+            direct.setdefault(name, []).append(ms)
+    return statistics.median(totals), {name: statistics.median(values) for name, values in direct.items()}
+
+
+def junit_duration(path):
+    """Сумма длительностей тестов из junitxml, с"""
+    return sum(float(case.get("time", 0)) for case in ElementTree.parse(path).iter("testcase"))
+
+
+def time_pytest(args, cwd, runs=5):
+    """(медиана времени процесса, медиана длительности тестов) для прогона python -m pytest args, с"""
+    walls, durations = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        junit_path = os.path.join(tmp, "junit.xml")
+        for _ in range(runs):
+            started = time.perf_counter()
+            result = subprocess.run([sys.executable, "-m", "pytest", *args, f"--junitxml={junit_path}"], cwd=cwd,
+                                    capture_output=True, text=True)
+            walls.append(time.perf_counter() - started)
+            if result.returncode != 0:
+                raise RuntimeError(f"pytest завершился с кодом {result.returncode}:\n{result.stdout[-2000:]}")
+            durations.append(junit_duration(junit_path))
+    return statistics.median(walls), statistics.median(durations)
+
+
+def pytest_floor(runs=5):
+    """Время пустого pytest с одним тестом: интерпретатор, сам pytest и плагины из окружения"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "pytest.ini"), "w") as f:
+            f.write("[pytest]\n")
+        with open(os.path.join(tmp, "test_floor.py"), "w") as f:
+            f.write("def test_floor():\n    pass\n")
+        return time_pytest(["-q", "-p", "no:cacheprovider", "-p", "no:anyio", "test_floor.py"], tmp, runs)
+
+
+def measure(pytest_args=None, runs=5):
+    conftest_ms, imports = import_times(runs=runs)
+    wall, tests = time_pytest(pytest_args or DEFAULT_ARGS, ROOT_DIR, runs)
+    floor_wall, floor_tests = pytest_floor(runs)
+    return {
+        "conftest_import_ms": round(conftest_ms, 1),
+        "imports_ms": {name: round(ms, 1) for name, ms in sorted(imports.items(), key=lambda kv: -kv[1])[:10]},
+        "wall_ms": round(wall * 1000, 1),
+        "tests_ms": round(tests * 1000, 1),
+        "pytest_floor_ms": round((floor_wall - floor_tests) * 1000, 1),
+        "overhead_ms": round((wall - tests - floor_wall + floor_tests) * 1000, 1),
+    }
+
+
+def format_report(report, baseline=None):
+    lines = []
+    for key in ("conftest_import_ms", "wall_ms", "tests_ms", "pytest_floor_ms", "overhead_ms"):
+        line = f"{key}: {report[key]:.1f}"
+        if baseline and key in baseline:
+            line += f" (baseline {baseline[key]:.1f}, {report[key] - baseline[key]:+.1f})"
+        lines.append(line)
+    lines.append("Самые долгие импорты conftest:")
+    lines.extend(f"  {name}: {ms:.1f} мс" for name, ms in report["imports_ms"].items())
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замер времени старта тестового прогона")
+    parser.add_argument("--runs", type=int, default=5, help="сколько раз повторять каждый замер")
+    parser.add_argument("--baseline", help="JSON прошлого замера для сравнения")
+    parser.add_argument("--max-overhead-ms", type=float, default=None,
+                        help="код возврата 1, если накладные расходы прогона одного теста больше")
+    parser.add_argument("--json", dest="json_path", help="сохранить замер в JSON")
+    parser.add_argument("pytest_args", nargs="*", help="аргументы pytest после --, по умолчанию - один тест")
+    args = parser.parse_args(argv)
+
+    report = measure(args.pytest_args, args.runs)
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print(format_report(report, baseline))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    # Ненулевой код возврата, чтобы CI заметил замедление старта
+    return 1 if args.max_overhead_ms is not None and report["overhead_ms"] > args.max_overhead_ms else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
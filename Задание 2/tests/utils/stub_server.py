@@ -0,0 +1,462 @@
+"""Локальная замена сервиса объявлений для офлайн-прогонов и нагрузочных сценариев.
+
+Запуск отдельным процессом: python -m utils.stub_server --port 8080
+Кроме HTTP/1.1 понимает HTTP/2 без TLS (h2c с prior knowledge), если установлен пакет h2.
+"""
+import argparse
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from email.message import Message
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.schemas import SELLER_ID_RANGE
+
+UUID_PATTERN = re.compile(r"^[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}$")
+ITEM_PATH = re.compile(r"^/api/1/item/([^/]+)$")
+SELLER_ITEMS_PATH = re.compile(r"^/api/1/([^/]+)/item$")
+STATISTIC_PATH = re.compile(r"^/api/1/statistic/([^/]+)$")
+STATISTIC_FIELDS = ("likes", "viewCount", "contacts")
+H2_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+
+# Объявления, на которые ссылаются тесты в tests/test_api
+SEED_ITEMS = [
+    {
+        "createdAt": "2025-02-10 12:00:00.000000 +0300 +0300",
+        "id": "b55a1222-e2ce-490d-9bec-06210269671e",
+        "name": "Телевизор",
+        "price": 36500,
+        "sellerId": 999665,
+        "statistics": {"likes": 25, "viewCount": 25, "contacts": 9},
+    },
+    {
+        "createdAt": "2025-02-10 12:00:01.000000 +0300 +0300",
+        "id": "0cd4183f-a699-4486-83f8-b513dfde477a",
+        "name": "Перстень",
+        "price": 100,
+        "sellerId": 12345,
+        "statistics": {"likes": 10, "viewCount": 50, "contacts": 5},
+    },
+]
+
+
+class ValidationError(Exception):
+    pass
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class ItemStore:
+    def __init__(self, seed=SEED_ITEMS, visibility_delay=0.0):
+        self.lock = threading.Lock()
+        self.items = {}
+        self.items_by_seller = defaultdict(dict)
+        # Имитация репликации: созданное объявление видно на чтение только через visibility_delay секунд
+        self.visibility_delay = visibility_delay
+        self.visible_at = {}
+        for item in seed:
+            self.add(dict(item, statistics=dict(item["statistics"])))
+
+    def add(self, item):
+        with self.lock:
+            self.items[item["id"]] = item
+            self.items_by_seller[item["sellerId"]][item["id"]] = item
+
+    def create(self, payload):
+        if not isinstance(payload, dict):
+            raise ValidationError("тело запроса должно быть объектом")
+
+        seller_id = payload.get("sellerId", payload.get("sellerID"))
+        name = payload.get("name", "")
+        price = payload.get("price")
+        statistics = payload.get("statistics", {})
+
+        if not _is_int(seller_id):
+            raise ValidationError("поле sellerID обязательно и должно быть числом")
+        if not SELLER_ID_RANGE[0] <= seller_id <= SELLER_ID_RANGE[1]:
+            raise ValidationError(f"поле sellerID должно быть в диапазоне {SELLER_ID_RANGE[0]}-{SELLER_ID_RANGE[1]}")
+        if not isinstance(name, str):
+            raise ValidationError("поле name должно быть строкой")
+        if price is not None and not _is_number(price):
+            raise ValidationError("поле price должно быть числом")
+        if not name and price is None:
+            raise ValidationError("пустое объявление")
+        if not isinstance(statistics, dict):
+            raise ValidationError("поле statistics должно быть объектом")
+        for field in STATISTIC_FIELDS:
+            if field in statistics and not _is_int(statistics[field]):
+                raise ValidationError(f"поле statistics.{field} должно быть числом")
+
+        item = {
+            "createdAt": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f +0000 +0000"),
+            "id": str(uuid.uuid4()),
+            "name": name,
+            "price": price if price is not None else 0,
+            "sellerId": seller_id,
+            "statistics": {field: statistics.get(field, 0) for field in STATISTIC_FIELDS},
+        }
+        if self.visibility_delay:
+            self.visible_at[item["id"]] = time.monotonic() + self.visibility_delay
+        self.add(item)
+        return item
+
+    def _visible(self, item_id, now):
+        visible_at = self.visible_at.get(item_id)
+        return visible_at is None or visible_at <= now
+
+    def get(self, item_id):
+        item = self.items.get(item_id)
+        return item if item is not None and self._visible(item_id, time.monotonic()) else None
+
+    def by_seller(self, seller_id):
+        now = time.monotonic()
+        with self.lock:
+            return [item for item_id, item in self.items_by_seller.get(seller_id, {}).items()
+                    if self._visible(item_id, now)]
+
+
+def _route(path):
+    """Шаблон пути без идентификаторов: лимит считается на маршрут, а не на конкретный id"""
+    for pattern in (ITEM_PATH, SELLER_ITEMS_PATH, STATISTIC_PATH):
+        if pattern.match(path):
+            return pattern.pattern
+    return path
+
+
+class ServerRateLimit:
+    """Token bucket на каждый маршрут, как у лимитера перед настоящим API: сверх темпа - 429 с Retry-After"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def check(self, route):
+        """None, если запрос пропущен, иначе сколько секунд ждать следующего жетона"""
+        with self.lock:
+            now = time.monotonic()
+            tokens, updated = self.buckets.get(route, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                self.buckets[route] = (tokens - 1, now)
+                return None
+            self.buckets[route] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+
+class StubRoutes:
+    """Маршруты API поверх _respond(status, headers, content): общие для HTTP/1.1 и h2c.
+    Наследник задаёт server, command, path и headers текущего запроса"""
+
+    def _respond(self, status, headers, content):
+        raise NotImplementedError
+
+    def _send_json(self, status, body):
+        content = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        etag = None
+        if self.command == "GET" and status == 200:
+            # Условные GET: клиентский кеш перепроверяет устаревшие ответы по ETag
+            etag = '"' + hashlib.sha1(content).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._respond(304, [("ETag", etag), ("Content-Length", "0")], b"")
+        headers = [("Content-Type", "application/json"), ("Content-Length", str(len(content)))]
+        if etag:
+            headers.append(("ETag", etag))
+        self._respond(status, headers, content)
+
+    def _send_error(self, status, message):
+        self._send_json(status, {"result": {"message": message, "messages": {}}, "status": str(status)})
+
+    def _throttled(self, route):
+        limit = self.server.rate_limit
+        wait = limit.check(route) if limit is not None else None
+        if wait is None:
+            return False
+        content = json.dumps({"result": {"message": "too many requests", "messages": {}}, "status": "429"}).encode()
+        # Retry-After целый по RFC 9110, округляем вверх
+        self._respond(429, [("Content-Type", "application/json"), ("Content-Length", str(len(content))),
+                            ("Retry-After", str(math.ceil(wait)))], content)
+        return True
+
+    def _get(self):
+        store = self.server.store
+        path = self.path.split("?", 1)[0]
+        if self._throttled(("GET", _route(path))):
+            return
+
+        match = ITEM_PATH.match(path) or STATISTIC_PATH.match(path)
+        if match:
+            item_id = match.group(1)
+            if not UUID_PATTERN.match(item_id):
+                return self._send_error(400, "ID айтема не UUID")
+            item = store.get(item_id)
+            if item is None:
+                return self._send_error(404, f"item {item_id} not found")
+            if path.startswith("/api/1/statistic/"):
+                return self._send_json(200, [dict(item["statistics"])])
+            return self._send_json(200, [item])
+
+        match = SELLER_ITEMS_PATH.match(path)
+        if match:
+            try:
+                seller_id = int(match.group(1))
+            except ValueError:
+                return self._send_error(400, "передан некорректный идентификатор продавца")
+            return self._send_json(200, store.by_seller(seller_id))
+
+        self._send_error(404, "route not found")
+
+    def _post(self, raw_body):
+        path = self.path.split("?", 1)[0]
+        if self._throttled(("POST", _route(path))):
+            return
+
+        if path != "/api/1/item":
+            return self._send_error(404, "route not found")
+
+        try:
+            payload = json.loads(raw_body or b"{}")
+            item = self.server.store.create(payload)
+        except (ValueError, ValidationError) as e:
+            return self._send_error(400, str(e))
+        self._send_json(200, {"status": f"Сохранили объявление - {item['id']}"})
+
+
+class StubRequestHandler(StubRoutes, BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "AvitoStub/1.0"
+    # Заголовки и тело уходят отдельными write, без TCP_NODELAY каждый ответ ждёт delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.count_connection()
+
+    def handle(self):
+        # h2c с prior knowledge: клиент сразу шлёт преамбулу HTTP/2 вместо строки запроса.
+        # Клиент отправляет её одним write, поэтому одного peek хватает
+        if self.server.http2 and self.rfile.peek(len(H2_PREFACE)).startswith(H2_PREFACE):
+            return H2Connection(self).serve()
+        super().handle()
+
+    def _respond(self, status, headers, content):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if content:
+            self.wfile.write(content)
+
+    def do_GET(self):
+        self._get()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self._post(self.rfile.read(length) if length else b"")
+
+
+class H2Request(StubRoutes):
+    def __init__(self, server, headers):
+        self.server = server
+        self.headers = Message()
+        for name, value in headers:
+            if name.startswith(":"):
+                continue
+            self.headers[name] = value
+        pseudo = dict(header for header in headers if header[0].startswith(":"))
+        self.command = pseudo.get(":method", "GET")
+        self.path = pseudo.get(":path", "/")
+        self.body = bytearray()
+        self.response = None
+
+    def _respond(self, status, headers, content):
+        self.response = (status, headers, content)
+
+    def dispatch(self):
+        if self.command == "GET":
+            self._get()
+        elif self.command == "POST":
+            self._post(bytes(self.body))
+        else:
+            self._send_error(405, "method not allowed")
+        return self.response
+
+
+class H2Connection:
+    """HTTP/2 без TLS (h2c) поверх сокета обработчика. Потоки соединения обрабатываются по очереди
+    в одном потоке сервера: хранилище в памяти отвечает быстрее, чем идут кадры по сети"""
+
+    def __init__(self, handler):
+        from h2.config import H2Configuration
+        from h2.connection import H2Connection as Connection
+
+        self.handler = handler
+        self.conn = Connection(H2Configuration(client_side=False, header_encoding="utf-8"))
+        self.requests = {}
+        # stream_id -> неотправленный остаток тела, ждёт WINDOW_UPDATE от клиента
+        self.pending = {}
+
+    def _flush(self):
+        data = self.conn.data_to_send()
+        if data:
+            self.handler.wfile.write(data)
+
+    def _send_body(self, stream_id):
+        body = self.pending[stream_id]
+        while body:
+            size = min(len(body), self.conn.local_flow_control_window(stream_id), self.conn.max_outbound_frame_size)
+            if size <= 0:
+                self.pending[stream_id] = body
+                return
+            self.conn.send_data(stream_id, body[:size])
+            body = body[size:]
+        self.conn.end_stream(stream_id)
+        del self.pending[stream_id]
+
+    def _respond(self, stream_id):
+        request = self.requests.pop(stream_id)
+        status, headers, content = request.dispatch()
+        headers = [(":status", str(status)), ("server", StubRequestHandler.server_version)] + \
+                  [(name.lower(), value) for name, value in headers]
+        self.conn.send_headers(stream_id, headers, end_stream=not content)
+        if content:
+            self.pending[stream_id] = content
+            self._send_body(stream_id)
+
+    def serve(self):
+        from h2 import events
+        from h2.exceptions import ProtocolError
+
+        self.conn.initiate_connection()
+        self._flush()
+        while True:
+            try:
+                data = self.handler.rfile.read1(65535)
+            except OSError:
+                return
+            if not data:
+                return
+            try:
+                received = self.conn.receive_data(data)
+            except ProtocolError:
+                self._flush()
+                return
+            for event in received:
+                if isinstance(event, events.RequestReceived):
+                    self.requests[event.stream_id] = H2Request(self.handler.server, event.headers)
+                elif isinstance(event, events.DataReceived):
+                    self.requests[event.stream_id].body += event.data
+                    self.conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                elif isinstance(event, events.StreamEnded):
+                    self._respond(event.stream_id)
+                elif isinstance(event, events.WindowUpdated):
+                    for stream_id in [event.stream_id] if event.stream_id else list(self.pending):
+                        if stream_id in self.pending:
+                            self._send_body(stream_id)
+                elif isinstance(event, events.StreamReset):
+                    self.requests.pop(event.stream_id, None)
+                    self.pending.pop(event.stream_id, None)
+                elif isinstance(event, events.ConnectionTerminated):
+                    self._flush()
+                    return
+            self._flush()
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, store, rate_limit=None, http2=True):
+        super().__init__(address, StubRequestHandler)
+        self.store = store
+        # Необязательный ServerRateLimit: имитация ограничения запросов на стенде
+        self.rate_limit = rate_limit
+        # h2c по преамбуле; False - сервер понимает только HTTP/1.1, как стенд без HTTP/2
+        self.http2 = http2
+        self.connections = 0
+        self.connections_lock = threading.Lock()
+
+    def count_connection(self):
+        with self.connections_lock:
+            self.connections += 1
+
+
+class StubServer:
+    def __init__(self, host="127.0.0.1", port=0, store=None, rate_limit=None, http2=True):
+        self.httpd = StubHTTPServer((host, port), store if store is not None else ItemStore(), rate_limit, http2)
+        self.thread = None
+
+    @property
+    def store(self):
+        return self.httpd.store
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def connections(self):
+        """Сколько TCP-соединений сервер принял с запуска"""
+        return self.httpd.connections
+
+    def start(self):
+        # Короткий интервал опроса: shutdown() ждёт его окончания, с умолчанием 0.5 с каждая остановка - полсекунды
+        self.thread = threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальная замена API объявлений")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--visibility-delay", type=float, default=0.0,
+                        help="через сколько секунд созданное объявление становится видно на чтение")
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="запросов в секунду на маршрут, сверх - 429 с Retry-After")
+    parser.add_argument("--no-http2", action="store_true", help="отвечать только по HTTP/1.1")
+    args = parser.parse_args()
+
+    rate_limit = ServerRateLimit(args.rate_limit) if args.rate_limit else None
+    server = StubServer(args.host, args.port, ItemStore(visibility_delay=args.visibility_delay), rate_limit,
+                        http2=not args.no_http2)
+    # Первая строка вывода - адрес сервера, её читает utils.soak при --port 0
+    print(f"Сервер запущен на {server.url}", flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""Транспорт requests, который замеряет фазы соединения: DNS, TCP connect, TLS и время до первого байта.
+
+Замеры пишутся в thread-local словарь: запросы requests синхронны, поэтому всё, что
+соединение успело замерить между start_timings() и возвратом ответа, относится к текущему вызову.
+
+HTTP2Adapter отправляет запросы requests через httpx по HTTP/2: параллельные запросы к одному
+хосту идут потоками одного соединения. Для него замеряется только время до заголовков ответа.
+httpx импортируется только при создании HTTP2Adapter: вместе с httpcore он грузится дольше, чем requests.
+"""
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests import Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers, select_proxy
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+_local = threading.local()
+# Запросы, которые можно повторить по HTTP/1.1 после неудачной преамбулы h2c (RFC 9110, 9.2.2)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"})
+
+
+def start_timings():
+    """Сбрасывает замеры текущего потока перед новым запросом и возвращает их словарь"""
+    _local.timings = {"dns": 0.0, "connect": 0.0, "tls": 0.0, "headers_at": None}
+    return _local.timings
+
+
+def current_timings():
+    timings = getattr(_local, "timings", None)
+    return timings if timings is not None else start_timings()
+
+
+class TimedConnectionMixin:
+    def _new_conn(self):
+        timings = current_timings()
+        host = self._dns_host.strip("[]")
+
+        started = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror:
+            # Пусть urllib3 сам повторит резолв и поднимет свою NameResolutionError
+            return super()._new_conn()
+        resolved = time.perf_counter()
+        timings["dns"] += resolved - started
+
+        # Резолвим сами, чтобы отделить DNS от connect; SNI и проверка сертификата
+        # по-прежнему идут по self.host, _dns_host используется только для сокета
+        dns_host = self._dns_host
+        error = None
+        try:
+            for address in dict.fromkeys(info[4][0] for info in addresses):
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                except NewConnectionError as e:
+                    error = e
+                    continue
+                timings["connect"] += time.perf_counter() - resolved
+                return sock
+        finally:
+            self._dns_host = dns_host
+        if error is None:
+            # Как в urllib3.util.connection.create_connection, обёрнутое так же, как _new_conn оборачивает OSError
+            e = OSError("getaddrinfo returns an empty list")
+            raise NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+        raise error
+
+    def getresponse(self, *args, **kwargs):
+        response = super().getresponse(*args, **kwargs)
+        current_timings()["headers_at"] = time.perf_counter()
+        return response
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        timings = current_timings()
+        started = time.perf_counter()
+        tcp_before = timings["dns"] + timings["connect"]
+        super().connect()
+        tcp_spent = timings["dns"] + timings["connect"] - tcp_before
+        timings["tls"] += time.perf_counter() - started - tcp_spent
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+
+class CassetteAdapter(TimedHTTPAdapter):
+    """Адаптер поверх utils.cassette.Cassette: пишет ответы сети в кассету или отдаёт их из неё без сети"""
+
+    def __init__(self, cassette, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        if self.cassette.recording:
+            response = super().send(request, **kwargs)
+            self.cassette.record(request.method, request.url, request.body, response.status_code,
+                                 response.headers, response.content)
+            return response
+
+        status, headers, content = self.cassette.play(request.method, request.url, request.body)
+        response = Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response._content = content
+        response._content_consumed = True
+        return response
+
+
+class _StreamBody:
+    """raw для потокового requests.Response: отдаёт уже раскодированное тело ответа httpx"""
+
+    def __init__(self, response):
+        self.response = response
+        self.chunks = response.iter_bytes()
+        self.buffer = b""
+
+    def read(self, amt=None):
+        while amt is None or len(self.buffer) < amt:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.buffer += chunk
+        if amt is None:
+            data, self.buffer = self.buffer, b""
+        else:
+            data, self.buffer = self.buffer[:amt], self.buffer[amt:]
+        return data
+
+    def close(self):
+        self.response.close()
+
+
+class HTTP2Adapter(BaseAdapter):
+    """requests-адаптер поверх httpx.Client с HTTP/2.
+
+    По https версия согласуется через ALPN. По http сервер не может сообщить о поддержке HTTP/2,
+    поэтому первый запрос к хосту идёт как h2c с prior knowledge; если сервер его не понял,
+    хост запоминается и дальше обслуживается по HTTP/1.1. Повторить по HTTP/1.1 можно только
+    идемпотентный запрос: обрыв мог случиться и после того, как сервер обработал запрос. Поэтому
+    перед первым POST к незнакомому хосту поддержка h2c проверяется отдельным запросом OPTIONS.
+    Повторы после 5xx и 429 - по тем же правилам urllib3 Retry, что и у TimedHTTPAdapter;
+    ошибки httpx переводятся в исключения requests.
+
+    verify, cert и прокси из requests (включая переменные окружения) передаются httpx: на каждое их
+    сочетание заводится свой набор клиентов. Через прокси http-хосты идут по HTTP/1.1 - h2c прокси не передаёт.
+    """
+
+    def __init__(self, pool_maxsize=16, max_retries=None):
+        import httpx
+
+        super().__init__()
+        self.max_retries = max_retries
+        self.connect_retries = (max_retries.connect or 0) if max_retries is not None else 0
+        self.limits = httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize)
+        self.lock = threading.Lock()
+        # (verify, cert, proxy) -> HTTPXClients
+        self.clients = {}
+        self.http1_origins = set()
+        # Хосты, уже ответившие по h2c: обрыв соединения с ними - сетевая ошибка, а не отказ от HTTP/2
+        self.http2_origins = set()
+
+    def _clients(self, verify=True, cert=None, proxy=None):
+        key = (verify, cert, proxy)
+        with self.lock:
+            clients = self.clients.get(key)
+            if clients is None:
+                clients = self.clients[key] = HTTPXClients(self.limits, self.connect_retries, verify, cert, proxy)
+        return clients
+
+    def _client(self, origin, clients):
+        if origin[0] == "https":
+            return clients.negotiating
+        if origin in self.http1_origins or clients.proxy is not None:
+            return clients.http1
+        return clients.prior_knowledge
+
+    def _probe_h2c(self, origin, timeout, clients):
+        """Проверяет h2c идемпотентным OPTIONS: любой ответ по HTTP/2, даже 405, значит поддержку"""
+        import httpx
+
+        try:
+            clients.prior_knowledge.request("OPTIONS", f"{origin[0]}://{origin[1]}/", timeout=timeout)
+        except (httpx.RemoteProtocolError, httpx.ReadError, httpx.WriteError):
+            self.http1_origins.add(origin)
+        else:
+            self.http2_origins.add(origin)
+
+    def _send_once(self, request, timeout, clients):
+        import httpx
+
+        url = urlsplit(request.url)
+        origin = (url.scheme, url.netloc)
+        unknown = origin[0] == "http" and origin not in self.http1_origins and origin not in self.http2_origins
+        if unknown and clients.proxy is None and request.method not in IDEMPOTENT_METHODS:
+            self._probe_h2c(origin, timeout, clients)
+        client = self._client(origin, clients)
+        built = client.build_request(request.method, request.url, headers=dict(request.headers),
+                                     content=request.body, timeout=timeout)
+        try:
+            response = client.send(built, stream=True)
+        except (httpx.RemoteProtocolError, httpx.ReadError, httpx.WriteError):
+            if client is not clients.prior_knowledge or origin in self.http2_origins \
+                    or request.method not in IDEMPOTENT_METHODS:
+                raise
+            # Сервер не понял преамбулу HTTP/2 и ответил ошибкой HTTP/1.1 или закрыл соединение;
+            # запрос идемпотентный, поэтому его можно повторить по HTTP/1.1, даже если сервер его обработал
+            self.http1_origins.add(origin)
+            return self._send_once(request, timeout, clients)
+        if client is clients.prior_knowledge:
+            self.http2_origins.add(origin)
+        return response
+
+    def _retry_delay(self, response, attempt):
+        retry = self.max_retries
+        if retry is None or attempt >= (retry.total or 0):
+            return None
+        has_retry_after = "Retry-After" in response.headers
+        if not retry.is_retry(response.request.method, response.status_code, has_retry_after):
+            return None
+        if has_retry_after and retry.respect_retry_after_header:
+            return retry.parse_retry_after(response.headers["Retry-After"])
+        # Как у urllib3: первый повтор сразу, дальше экспоненциальная пауза
+        return retry.backoff_factor * 2 ** attempt if attempt else 0.0
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        import httpx
+
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        if urlsplit(request.url).scheme != "https":
+            # Настройки TLS к http не относятся, лишний набор клиентов не нужен
+            verify, cert = True, None
+        if isinstance(cert, list):
+            cert = tuple(cert)
+        # Неверный путь к сертификатам, как и у requests, - OSError
+        clients = self._clients(verify, cert, select_proxy(request.url, proxies or {}))
+        attempt = 0
+        while True:
+            try:
+                response = self._send_once(request, timeout, clients)
+            except httpx.ConnectTimeout as e:
+                raise requests.ConnectTimeout(e, request=request)
+            except httpx.TimeoutException as e:
+                raise requests.ReadTimeout(e, request=request)
+            except httpx.TransportError as e:
+                raise requests.ConnectionError(e, request=request)
+            current_timings()["headers_at"] = time.perf_counter()
+
+            delay = self._retry_delay(response, attempt)
+            if delay is None:
+                return self._build_response(request, response, stream)
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def _build_response(self, request, response, stream):
+        import httpx
+
+        result = Response()
+        result.status_code = response.status_code
+        result.reason = response.reason_phrase
+        result.headers = CaseInsensitiveDict(response.headers)
+        result.encoding = get_encoding_from_headers(result.headers)
+        result.url = request.url
+        result.request = request
+        result.connection = self
+        result.http_version = response.http_version
+        if stream:
+            result.raw = _StreamBody(response)
+        else:
+            try:
+                result._content = response.read()
+            except httpx.TransportError as e:
+                raise requests.ConnectionError(e, request=request)
+            finally:
+                response.close()
+            result._content_consumed = True
+        return result
+
+    def close(self):
+        with self.lock:
+            clients, self.clients = list(self.clients.values()), {}
+        for client_set in clients:
+            client_set.close()
+
+
+class HTTPXClients:
+    """Три клиента httpx HTTP2Adapter с одними настройками TLS и прокси: с согласованием версии
+    (https), h2c с prior knowledge и HTTP/1.1"""
+
+    def __init__(self, limits, connect_retries, verify=True, cert=None, proxy=None):
+        import httpx
+
+        self.proxy = proxy
+
+        def client(http1, http2):
+            transport = httpx.HTTPTransport(http1=http1, http2=http2, limits=limits, retries=connect_retries,
+                                            verify=verify, cert=cert, proxy=proxy)
+            return httpx.Client(transport=transport)
+
+        self.negotiating = client(http1=True, http2=True)
+        self.prior_knowledge = client(http1=False, http2=True)
+        self.http1 = client(http1=True, http2=False)
+
+    def close(self):
+        for client in (self.negotiating, self.prior_knowledge, self.http1):
+            client.close()